@@ -4,24 +4,35 @@ Advanced Arabic Language Processor - Enhanced Version
 """
 import re
 import logging
+from array import array
 from collections import Counter
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Any
 from pathlib import Path
 import sys
+import asyncio
+import threading
 
 # إضافة مسار utils للاستيراد
 utils_path = Path(__file__).parent / "utils"
 if str(utils_path) not in sys.path:
     sys.path.insert(0, str(utils_path))
 
+# مسار محلل الخليل (يستورد مباشرة لتجنب تحميل واجهة التوليد الصرفي)
+khalil_path = Path(__file__).parent / "features" / "morphological_generation"
+
 try:
-    from advanced_logger import AdvancedLogger, log_arabic_processing, log_function_call, error_handler
+    from advanced_logger import (
+        AdvancedLogger, log_arabic_processing, log_function_call, error_handler, set_log_level
+    )
     from performance_optimizer import (
-        main_cache, performance_optimizer, cached_arabic_processing, parallel_processing
+        main_cache, performance_optimizer, cached_arabic_processing, WorkerTask, estimate_words,
+        MISSING
     )
     from settings_manager import settings_manager, get_setting
+    from async_api import AsyncBatcher, run_in_pool
     
-    # إنشاء المسجل الرئيسي
+    # إنشاء المسجل الرئيسي بمستوى التسجيل المحدد في الإعدادات
+    set_log_level(get_setting('logging', 'log_level', 'INFO'))
     main_logger = AdvancedLogger("arabic_processor")
     
 except ImportError:
@@ -30,14 +41,75 @@ except ImportError:
     AdvancedLogger = logging.getLogger
     def log_arabic_processing(logger): return lambda func: func
     def log_function_call(logger): return lambda func: func
-    def cached_arabic_processing(func): return func
-    def parallel_processing(chunk_size=1000): return lambda func: func
+    def cached_arabic_processing(func=None, **kwargs): return func if func else (lambda f: f)
     def get_setting(category, key, default=None): return default
     error_handler = None
     main_cache = None
     performance_optimizer = None
+    WorkerTask = None
+    AsyncBatcher = None
     settings_manager = None
     main_logger = logging.getLogger("arabic_processor")
+    def set_log_level(level): main_logger.setLevel(getattr(level, 'value', level))
+
+
+class TokenSpans:
+    """
+    تسلسل كلمات مع مواضعها في النص الأصلي
+    
+    تخزن مواضع البداية والنهاية في مصفوفات array('I') مضغوطة بدلاً من كائن
+    لكل كلمة، بحيث يمكن ربط النتائج بالنص الأصلي دون إعادة مسحه.
+    """
+    
+    __slots__ = ('tokens', 'starts', 'ends')
+    
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.starts = array('I')
+        self.ends = array('I')
+    
+    def append(self, token: str, start: int, end: int):
+        """إضافة كلمة مع موضعها"""
+        self.tokens.append(token)
+        self.starts.append(start)
+        self.ends.append(end)
+    
+    def __len__(self) -> int:
+        return len(self.tokens)
+    
+    def __iter__(self):
+        return zip(self.tokens, self.starts, self.ends)
+    
+    def span(self, index: int) -> Tuple[int, int]:
+        """موضع الكلمة (البداية، النهاية) في النص الأصلي"""
+        return self.starts[index], self.ends[index]
+    
+    def context(self, text: str, index: int, size: int) -> Tuple[str, str]:
+        """
+        السياق الأيسر والأيمن للكلمة من النص الأصلي
+        
+        Args:
+            text: النص الأصلي الذي استخرجت منه الكلمات
+            index: ترتيب الكلمة
+            size: عدد الكلمات في كل جهة
+            
+        Returns:
+            (السياق السابق، السياق اللاحق) كما وردا في النص الأصلي
+        """
+        first = max(0, index - size)
+        last = min(len(self.tokens) - 1, index + size)
+        left = text[self.starts[first]:self.starts[index]].strip()
+        right = text[self.ends[index]:self.ends[last]].strip()
+        return left, right
+
+
+def _tokenize_key_args(processor, text, remove_stop=None, stem=None):
+    """معاملات مفتاح tokenize_advanced بعد إبدال None بالإعدادات (يوافقها atokenize)"""
+    if remove_stop is None:
+        remove_stop = get_setting('arabic_processing', 'remove_stop_words', True)
+    if stem is None:
+        stem = get_setting('arabic_processing', 'enable_stemming', True)
+    return (processor, text, remove_stop, stem), {}
 
 
 class ArabicProcessor:
@@ -65,6 +137,22 @@ class ArabicProcessor:
     # أحرف التشكيل العربية
     TASHKEEL = re.compile(r'[\u064B-\u065F\u0670]')
     
+    # الكلمات العربية (تتابع أحرف من النطاق العربي)
+    ARABIC_WORD = re.compile(r'[\u0600-\u06FF]+')
+    ARABIC_CHAR = re.compile(r'[\u0600-\u06FF]')
+    
+    # مقاطع النص لحساب الملف الإحصائي في مسح واحد
+    # (علامة الاستفهام العربية ضمن النطاق العربي لكنها تعامل كنهاية جملة)
+    PROFILE_SEGMENTS = re.compile(
+        r'(?P<sentence>[.!?؟]+)'
+        r'|(?P<arabic>[\u0600-\u061E\u0620-\u06FF]+)'
+        r'|(?P<latin>[A-Za-z\u00C0-\u024F]+)'
+        r'|(?P<digit>[0-9]+)'
+        r'|(?P<space>\s+)'
+        r'|(?P<other>.)',
+        re.DOTALL
+    )
+    
     # حروف العلة
     HARAKAT = ['ً', 'ٌ', 'ٍ', 'َ', 'ُ', 'ِ', 'ّ', 'ْ', 'ـ']
     
@@ -87,6 +175,9 @@ class ArabicProcessor:
         'لكن', 'بل', 'حتى', 'كي', 'لكي', 'ما', 'ماذا', 'متى', 'أين', 'كيف'
     ]
     
+    # الحد الأقصى لعدد الكلمات المحفوظة في جدول الجذوع داخل الذاكرة
+    STEM_CACHE_SIZE = 50000
+    
     def __init__(self, logger: Optional[AdvancedLogger] = None):
         """
         تهيئة المعالج العربي
@@ -103,6 +194,15 @@ class ArabicProcessor:
             'words_tokenized': 0,
             'errors_handled': 0
         }
+        
+        # جدول محدود لجذوع الكلمات المطبعة (مرة واحدة لكل صيغة مميزة). قاموس عادي
+        # لا يحفظ مرجعاً للمعالج فلا ينشئ دورة مراجع تؤخر تحريره
+        self._stem_table: Dict[str, str] = {}
+        self._stem_stats = {'hits': 0, 'misses': 0}
+        
+        # يفرغ الجدول عند اقتراب ذاكرة العملية من memory_limit_mb
+        if performance_optimizer:
+            performance_optimizer.memory.on_pressure(self._release_memory)
     
     @cached_arabic_processing
     @log_arabic_processing(main_logger)
@@ -291,39 +391,180 @@ class ArabicProcessor:
                 return word[:-len(suffix)]
         return word
     
-    def light_stem(self, word):
-        """استخراج جذر تقريبي للكلمة (light stemming)"""
-        word = self.normalize_text(word)
+    def _strip_affixes(self, word: str) -> str:
+        """إزالة السوابق واللواحق من كلمة مطبعة مسبقاً"""
         word = self.remove_prefixes(word)
         word = self.remove_suffixes(word)
         return word
     
+    def _stem_normalized(self, word: str) -> str:
+        """جذع كلمة مطبعة من الجدول (يفرغ الجدول عند بلوغ STEM_CACHE_SIZE)"""
+        stem = self._stem_table.get(word)
+        if stem is not None:
+            self._stem_stats['hits'] += 1
+            return stem
+        
+        self._stem_stats['misses'] += 1
+        stem = self._strip_affixes(word)
+        if len(self._stem_table) >= self.STEM_CACHE_SIZE:
+            self._stem_table.clear()
+        self._stem_table[word] = stem
+        return stem
+    
+    def light_stem(self, word):
+        """استخراج جذر تقريبي للكلمة (light stemming)"""
+        word = self.normalize_text(word)
+        if not word:
+            return word
+        return self._stem_normalized(word)
+    
     def is_arabic(self, text):
         """التحقق من كون النص عربياً"""
-        arabic_pattern = re.compile(r'[\u0600-\u06FF]')
-        return bool(arabic_pattern.search(text))
+        return bool(self.ARABIC_CHAR.search(text))
     
-    def extract_arabic_words(self, text):
-        """استخراج الكلمات العربية فقط"""
+    def extract_arabic_words(self, text, with_offsets: bool = False):
+        """
+        استخراج الكلمات العربية فقط
+        
+        Args:
+            text: النص المراد استخراج الكلمات منه
+            with_offsets: إرجاع الكلمات مع مواضعها في النص الأصلي
+            
+        Returns:
+            قائمة بالكلمات، أو TokenSpans إذا طلبت المواضع
+        """
+        if with_offsets:
+            return self.extract_arabic_spans(text)
         text = self.remove_tashkeel(text)
-        words = re.findall(r'[\u0600-\u06FF]+', text)
+        words = self.ARABIC_WORD.findall(text)
         return words
     
+    def extract_arabic_spans(self, text: str) -> TokenSpans:
+        """
+        استخراج الكلمات العربية مع مواضعها في النص الأصلي
+        
+        الكلمات مجردة من التشكيل كما في extract_arabic_words، أما المواضع
+        فتشير إلى النص الأصلي بتشكيله.
+        
+        Args:
+            text: النص المراد استخراج الكلمات منه
+            
+        Returns:
+            TokenSpans بالكلمات ومواضع بدايتها ونهايتها
+        """
+        spans = TokenSpans()
+        if not text:
+            return spans
+        
+        for match in self.ARABIC_WORD.finditer(text):
+            word = self.TASHKEEL.sub('', match.group())
+            if word:
+                spans.append(word, match.start(), match.end())
+        
+        return spans
+    
     def remove_stop_words(self, words):
         """إزالة كلمات الوقف"""
         return [w for w in words if w not in self.STOP_WORDS]
     
     def count_arabic_chars(self, text):
         """عد الحروف العربية"""
-        return len(re.findall(r'[\u0600-\u06FF]', text))
+        return len(self.ARABIC_CHAR.findall(text))
     
-    @parallel_processing(chunk_size=500)
-    @cached_arabic_processing
+    def profile(self, text: str) -> Dict[str, Any]:
+        """
+        الملف الإحصائي للنص في مسح واحد
+        
+        يحسب في مرور واحد على النص ما تحسبه is_arabic و count_arabic_chars
+        و extract_arabic_words وإحصائيات الجمل كل على حدة.
+        
+        Args:
+            text: النص المراد تحليله
+            
+        Returns:
+            قاموس يحتوي على عدد الحروف العربية، كثافة التشكيل، عدد الكلمات،
+            عدد الجمل، توزيع أطوال الكلمات، ونسب الأنظمة الكتابية
+        """
+        counts = Counter()
+        length_histogram = Counter()
+        arabic_types = set()
+        sentences = 0
+        in_sentence = False
+        
+        for match in self.PROFILE_SEGMENTS.finditer(text or ''):
+            kind = match.lastgroup
+            segment = match.group()
+            
+            if kind == 'sentence':
+                question_marks = segment.count('؟')
+                counts['arabic_chars'] += question_marks
+                counts['punctuation'] += len(segment) - question_marks
+                if in_sentence:
+                    sentences += 1
+                    in_sentence = False
+                continue
+            
+            if kind == 'space':
+                continue
+            
+            in_sentence = True
+            if kind == 'arabic':
+                word, diacritics = self.TASHKEEL.subn('', segment)
+                counts['arabic_chars'] += len(segment)
+                counts['diacritics'] += diacritics
+                if word:
+                    counts['arabic_words'] += 1
+                    length_histogram[len(word)] += 1
+                    arabic_types.add(word)
+            elif kind == 'latin':
+                counts['latin_chars'] += len(segment)
+                counts['latin_words'] += 1
+            elif kind == 'digit':
+                counts['digits'] += len(segment)
+                counts['numbers'] += 1
+            else:
+                counts['punctuation'] += 1
+        
+        if in_sentence:
+            sentences += 1
+        
+        arabic_letters = counts['arabic_chars'] - counts['diacritics']
+        visible_chars = counts['arabic_chars'] + counts['latin_chars'] + counts['digits'] + counts['punctuation']
+        
+        def ratio(value, total):
+            return round(value / total, 4) if total else 0.0
+        
+        return {
+            'total_chars': len(text or ''),
+            'arabic_chars': counts['arabic_chars'],
+            'arabic_letters': arabic_letters,
+            'diacritics': counts['diacritics'],
+            'diacritic_density': ratio(counts['diacritics'], arabic_letters),
+            'is_arabic': counts['arabic_chars'] > 0,
+            'arabic_words': counts['arabic_words'],
+            'unique_arabic_words': len(arabic_types),
+            'latin_words': counts['latin_words'],
+            'numbers': counts['numbers'],
+            'sentences': sentences,
+            'word_length_histogram': dict(sorted(length_histogram.items())),
+            'script_mix': {
+                'arabic': ratio(counts['arabic_chars'], visible_chars),
+                'latin': ratio(counts['latin_chars'], visible_chars),
+                'digits': ratio(counts['digits'], visible_chars),
+                'punctuation': ratio(counts['punctuation'], visible_chars)
+            }
+        }
+    
+    # نتائج التقسيم كبيرة، فلها نصف ميزانية الذاكرة حتى لا تزيح نتائج التطبيع
+    @cached_arabic_processing(budget=0.5, key_args=_tokenize_key_args)
     @log_arabic_processing(main_logger)
     def tokenize_advanced(self, text: str, remove_stop: bool = None, stem: bool = None) -> List[str]:
         """
         تقسيم متقدم للنص العربي مع خيارات معالجة
         
+        النصوص التي يتجاوز طولها حد المعالجة المتوازية تقسم عند حدود الكلمات
+        وتعالج في عمليات منفصلة، مع الحفاظ على ترتيب الكلمات.
+        
         Args:
             text: النص العربي المراد تقسيمه
             remove_stop: إزالة كلمات الوقف (إذا لم يتم تحديده، سيستخدم الإعدادات)
@@ -346,38 +587,15 @@ class ArabicProcessor:
             if stem is None:
                 stem = get_setting('arabic_processing', 'enable_stemming', True)
             
-            # إزالة التشكيل
-            text = self.remove_tashkeel(text)
-            
-            # استخراج الكلمات العربية فقط
-            words = self.extract_arabic_words(text)
-            
-            # تطبيع الكلمات
-            words = [self.normalize_text(w) for w in words]
-            
-            # فلترة الكلمات حسب الطول
-            min_length = get_setting('arabic_processing', 'min_word_length', 2)
-            max_length = get_setting('arabic_processing', 'max_word_length', 50)
-            words = [w for w in words if min_length <= len(w) <= max_length]
-            
-            # إزالة كلمات الوقف إذا طلب
-            if remove_stop:
-                words = self.remove_stop_words(words)
-                
-                # إضافة كلمات وقف مخصصة إذا كانت موجودة
-                custom_stop_words = get_setting('arabic_processing', 'custom_stop_words', [])
-                if custom_stop_words:
-                    words = [w for w in words if w not in custom_stop_words]
-            
-            # استخراج الجذور إذا طلب
-            if stem:
-                stemming_algorithm = get_setting('arabic_processing', 'stemming_algorithm', 'light')
-                if stemming_algorithm == 'light':
-                    words = [self.light_stem(w) for w in words]
-                # يمكن إضافة خوارزميات أخرى هنا
+            if self._should_parallelize(text):
+                words = self._tokenize_parallel(text, remove_stop, stem)
+            else:
+                words = self._tokenize_words(text, remove_stop, stem)
             
             self.stats['words_tokenized'] += len(words)
             self.logger.info(f"تم تقسيم النص إلى {len(words)} كلمة")
+            if performance_optimizer:
+                performance_optimizer.memory.tick()
             
             return words
             
@@ -386,6 +604,217 @@ class ArabicProcessor:
             self.logger.error(f"خطأ في تقسيم النص المتقدم", exception=e)
             raise
     
+    def _should_parallelize(self, text: str) -> bool:
+        """تحديد ما إذا كان النص كبيراً بما يكفي للمعالجة المتوازية"""
+        if performance_optimizer is None:
+            return False
+        if not get_setting('performance', 'parallel_processing', True):
+            return False
+        return len(text) >= get_setting('performance', 'parallel_threshold', 200000)
+    
+    def _tokenize_parallel(self, text: str, remove_stop: bool, stem: bool) -> List[str]:
+        """تقسيم النص بالتوازي في عمليات منفصلة مع الحفاظ على الترتيب"""
+        task = WorkerTask(_tokenize_text, (remove_stop, stem))
+        chunk_size = performance_optimizer.chunk_size_for(task, estimate_words(text))
+        chunks = performance_optimizer.split_text_at_token_boundaries(text, chunk_size)
+        if len(chunks) < 2:
+            return self._tokenize_words(text, remove_stop, stem)
+        
+        # الجزء الأخير أقصر عادة، فلا يحسب في قياس السرعة
+        results = performance_optimizer.process_chunks_in_processes(
+            chunks, task, initializer=_init_tokenize_worker, initargs=_worker_initargs(),
+            chunk_units=[chunk_size] * (len(chunks) - 1) + [None]
+        )
+        
+        words = []
+        for chunk_words in results:
+            words.extend(chunk_words)
+        return words
+    
+    def tokenize_batch(self, texts: List[str], remove_stop: Optional[bool] = None,
+                       stem: Optional[bool] = None, mode: Any = None) -> List[List[str]]:
+        """
+        تقسيم مجموعة من النصوص بالتوازي
+        
+        تعمل في خيوط أو في عمليات منفصلة حسب نمط المعالجة، ولكل عملية عاملة
+        معالجها ومحللها الخاصان يهيآن مرة واحدة.
+        
+        Args:
+            texts: النصوص المراد تقسيمها
+            remove_stop: إزالة كلمات الوقف (الافتراضي: حسب الإعدادات)
+            stem: استخراج الجذور (الافتراضي: حسب الإعدادات)
+            mode: نمط المعالجة (الافتراضي: الإعداد processing_mode)
+            
+        Returns:
+            قائمة كلمات كل نص بنفس ترتيب النصوص
+        """
+        if remove_stop is None:
+            remove_stop = get_setting('arabic_processing', 'remove_stop_words', True)
+        
+        if stem is None:
+            stem = get_setting('arabic_processing', 'enable_stemming', True)
+        
+        if performance_optimizer is None or not get_setting('performance', 'parallel_processing', True):
+            results = [self._tokenize_words(text, remove_stop, stem) for text in texts]
+        else:
+            results = performance_optimizer.batch_process(
+                texts, WorkerTask(_tokenize_text, (remove_stop, stem)), mode=mode,
+                initializer=_init_tokenize_worker, initargs=_worker_initargs()
+            )
+        
+        self.stats['words_tokenized'] += sum(len(words) for words in results)
+        return results
+    
+    def tokenize_stream(self, texts: Iterable[str], remove_stop: Optional[bool] = None,
+                        stem: Optional[bool] = None, mode: Any = None, ordered: bool = True,
+                        cancel: Any = None) -> Iterator[Tuple[int, Optional[List[str]], Optional[Exception]]]:
+        """
+        تقسيم نصوص كثيرة مع إرجاع كلمات كل نص فور اكتماله
+        
+        تقرأ النصوص تدريجياً ولا يتجاوز عدد النصوص قيد المعالجة ضعف عدد العمال،
+        فيصلح لكتابة النتائج على القرص أو عرضها أثناء المعالجة.
+        
+        Args:
+            texts: النصوص (أي كائن قابل للتكرار)
+            remove_stop: إزالة كلمات الوقف (الافتراضي: حسب الإعدادات)
+            stem: استخراج الجذور (الافتراضي: حسب الإعدادات)
+            mode: نمط المعالجة (الافتراضي: الإعداد processing_mode)
+            ordered: بترتيب النصوص (False: بترتيب الاكتمال)
+            cancel: كائن له is_set() يوقف المعالجة عند تفعيله
+            
+        Yields:
+            (موضع النص، كلماته، الخطأ) - الكلمات None والخطأ محدد إذا فشل النص
+        """
+        if remove_stop is None:
+            remove_stop = get_setting('arabic_processing', 'remove_stop_words', True)
+        
+        if stem is None:
+            stem = get_setting('arabic_processing', 'enable_stemming', True)
+        
+        if performance_optimizer is None or not get_setting('performance', 'parallel_processing', True):
+            for index, text in enumerate(texts):
+                if cancel is not None and cancel.is_set():
+                    return
+                try:
+                    words = self._tokenize_words(text, remove_stop, stem)
+                except Exception as e:
+                    yield index, None, e
+                    continue
+                self.stats['words_tokenized'] += len(words)
+                yield index, words, None
+            return
+        
+        results = performance_optimizer.imap(
+            WorkerTask(_tokenize_text, (remove_stop, stem)), texts, mode=mode,
+            initializer=_init_tokenize_worker, initargs=_worker_initargs(),
+            ordered=ordered, capture_errors=True, cancel=cancel
+        )
+        for result in results:
+            if result.ok:
+                self.stats['words_tokenized'] += len(result.value)
+            yield result
+    
+    async def atokenize(self, text: str, remove_stop: Optional[bool] = None,
+                        stem: Optional[bool] = None) -> List[str]:
+        """
+        نسخة غير متزامنة من tokenize_advanced لا تحجب حلقة الأحداث
+        
+        تشارك tokenize_advanced تخزينها المؤقت (المفتاح نفسه)، وعند غياب النتيجة
+        تدمج الطلبات القصيرة المتزامنة في دفعات تنفذ في مجمعات محسن الأداء
+        (خيوط أو عمليات حسب نمط المعالجة)، والنصوص الكبيرة تقسم بالتوازي كما في
+        tokenize_advanced.
+        
+        Raises:
+            ValueError: إذا كان النص فارغاً أو غير صالح
+        """
+        if not text or not isinstance(text, str):
+            raise ValueError("النص يجب أن يكون سلسلة نصية غير فارغة")
+        
+        if remove_stop is None:
+            remove_stop = get_setting('arabic_processing', 'remove_stop_words', True)
+        
+        if stem is None:
+            stem = get_setting('arabic_processing', 'enable_stemming', True)
+        
+        if AsyncBatcher is None:
+            return await asyncio.to_thread(self.tokenize_advanced, text, remove_stop, stem)
+        if self._should_parallelize(text):
+            return await run_in_pool(self.tokenize_advanced, text, remove_stop, stem)
+        
+        tokenize = ArabicProcessor.tokenize_advanced
+        key = tokenize.cache_key(self, text, remove_stop, stem)
+        words = main_cache.get(key, MISSING, tokenize.cache_group)
+        if words is not MISSING:
+            return words
+        
+        words = await _tokenize_batcher(remove_stop, stem).submit(text)
+        main_cache.set(key, words, tokenize.cache_group, tokenize.store_ttl(words))
+        self.stats['words_tokenized'] += len(words)
+        return words
+    
+    def _tokenize_words(self, text: str, remove_stop: bool, stem: bool) -> List[str]:
+        """المسار التسلسلي للتقسيم دون تخزين مؤقت أو تسجيل لكل جزء"""
+        # إزالة التشكيل واستخراج الكلمات العربية فقط
+        text = self.TASHKEEL.sub('', text)
+        words = self.ARABIC_WORD.findall(text)
+        
+        # تطبيع الكلمات (مرة واحدة لكل صيغة مميزة)
+        normalized_types = {w: self.normalize_text(w) for w in set(words)}
+        words = [normalized_types[w] for w in words]
+        
+        # فلترة الكلمات حسب الطول
+        min_length = get_setting('arabic_processing', 'min_word_length', 2)
+        max_length = get_setting('arabic_processing', 'max_word_length', 50)
+        words = [w for w in words if min_length <= len(w) <= max_length]
+        
+        # إزالة كلمات الوقف إذا طلب
+        if remove_stop:
+            words = self.remove_stop_words(words)
+            
+            # إضافة كلمات وقف مخصصة إذا كانت موجودة
+            custom_stop_words = get_setting('arabic_processing', 'custom_stop_words', [])
+            if custom_stop_words:
+                words = [w for w in words if w not in custom_stop_words]
+        
+        # استخراج الجذور إذا طلب
+        if stem:
+            stemming_algorithm = get_setting('arabic_processing', 'stemming_algorithm', 'light')
+            if stemming_algorithm == 'khalil':
+                words = self._khalil_stem(words)
+            elif stemming_algorithm == 'light':
+                # الكلمات مطبعة مسبقاً، فلا حاجة لإعادة التطبيع لكل كلمة
+                words = [self._stem_normalized(w) for w in words]
+            # يمكن إضافة خوارزميات أخرى هنا
+        
+        return words
+    
+    def _khalil_stem(self, words: List[str]) -> List[str]:
+        """
+        استخراج الجذور بمحلل الخليل لكل صيغة مميزة دفعة واحدة
+        
+        الكلمات التي لا يحدد لها جذر (أو عند تعذر تحميل المحلل) تستخرج
+        بالطريقة الخفيفة.
+        """
+        if get_khalil_analyzer() is None:
+            return [self._stem_normalized(w) for w in words]
+        
+        roots = {w: self.khalil_root(w) for w in dict.fromkeys(words)}
+        return [roots[w] or self._stem_normalized(w) for w in words]
+    
+    # تحليل الكلمات التي لا جذر لها مكلف كغيره، فتخزن النتائج None أيضاً
+    @cached_arabic_processing(negative=True)
+    def khalil_root(self, word: str) -> Optional[str]:
+        """
+        جذر الكلمة المطبعة بمحلل الخليل
+        
+        Returns:
+            الجذر، أو None إذا لم يحدد (أو تعذر تحميل المحلل)
+        """
+        analyzer = get_khalil_analyzer()
+        if analyzer is None:
+            return None
+        return analyzer.extract_root(word)
+    
     def get_word_info(self, word: str) -> Dict[str, Any]:
         """
         معلومات شاملة عن الكلمة العربية
@@ -439,6 +868,14 @@ class ArabicProcessor:
         """
         stats = self.get_stats()
         
+        # إحصائيات جدول الجذوع في الذاكرة
+        stats['stem_cache'] = {
+            'hits': self._stem_stats['hits'],
+            'misses': self._stem_stats['misses'],
+            'size': len(self._stem_table),
+            'max_size': self.STEM_CACHE_SIZE
+        }
+        
         # إضافة إحصائيات التخزين المؤقت إذا كان متاحاً
         if main_cache:
             cache_stats = main_cache.get_stats()
@@ -451,6 +888,13 @@ class ArabicProcessor:
         
         return stats
     
+    def _release_memory(self) -> int:
+        """تفريغ جدول الجذوع عند ضغط الذاكرة؛ يعيد عدد العناصر المحررة"""
+        released = len(self._stem_table)
+        self._stem_table.clear()
+        self.logger.warning(f"ضغط الذاكرة: تم تفريغ جدول الجذوع ({released} عنصر)")
+        return released
+    
     def cleanup_resources(self):
         """تنظيف الموارد وإغلاق الاتصالات"""
         if performance_optimizer:
@@ -462,3 +906,128 @@ class ArabicProcessor:
         
         self.logger.info("تم تنظيف الموارد")
 
+
+# محلل الخليل مشترك بين جميع المعالجات ويحمل عند أول استخدام
+_khalil_analyzer = None
+_khalil_lock = threading.Lock()
+
+
+def get_khalil_analyzer():
+    """الحصول على محلل الخليل المشترك، أو None إذا تعذر تحميله"""
+    global _khalil_analyzer
+    if _khalil_analyzer is None:
+        with _khalil_lock:
+            if _khalil_analyzer is None:
+                try:
+                    if str(khalil_path) not in sys.path:
+                        sys.path.insert(0, str(khalil_path))
+                    from khalil_analyzer import KhalilAnalyzer
+                    analyzer = KhalilAnalyzer()
+                    _configure_khalil_analyzer(analyzer)
+                    _khalil_analyzer = analyzer
+                except Exception as e:
+                    main_logger.error(f"تعذر تحميل محلل الخليل: {e}")
+                    _khalil_analyzer = False
+    return _khalil_analyzer or None
+
+
+def _configure_khalil_analyzer(analyzer):
+    """
+    ضبط المحلل المشترك من الإعدادات (عند إنشائه وعند تطبيق نمط معالجة)
+    
+    لا يضبط عند كل استدعاء لأن المحلل مشترك بين الخيوط.
+    """
+    analyzer.set_max_candidates(get_setting('arabic_processing', 'khalil_max_candidates', 3))
+
+
+def apply_processing_mode(mode: Any = None,
+                          settings: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    تطبيق نمط معالجة (fast، balanced، accurate) على المحرك
+    
+    يكتب إعدادات ملف النمط (PROCESSING_PROFILES في settings_manager)، ثم يطبق ما
+    لا يقرأ إلا عند الإنشاء: طبقات التخزين المؤقت ومستوى التسجيل وتقليم محلل
+    الخليل. نوع المجمع والمعالجة المتوازية وخوارزمية الجذور تقرأ عند كل استدعاء.
+    
+    Args:
+        mode: النمط المراد كتابة ملفه (None: تطبيق الإعدادات الحالية على المحرك
+            دون إعادة كتابة ملف النمط، كما بعد حفظها من نافذة الإعدادات)
+        settings: إعدادات تدمج في فئاتها قبل التطبيق (مثل ما جمعته نافذة الإعدادات)
+        
+    Returns:
+        إعدادات ملف النمط المكتوبة لكل فئة (فارغة عند mode=None)
+    """
+    if settings_manager is None:
+        return {}
+    for category, values in (settings or {}).items():
+        settings_manager.update_category(category, values)
+    profile = settings_manager.apply_processing_mode(mode) if mode is not None else {}
+    if mode is None:
+        mode = get_setting('performance', 'processing_mode', 'balanced')
+    
+    if main_cache:
+        main_cache.set_strategy(get_setting('performance', 'cache_strategy', 'hybrid'))
+    set_log_level(get_setting('logging', 'log_level', 'INFO'))
+    if _khalil_analyzer:
+        _configure_khalil_analyzer(_khalil_analyzer)
+    main_logger.info(f"نمط المعالجة: {getattr(mode, 'value', mode)}")
+    return profile
+
+
+# معالج خاص بكل عملية عاملة في المعالجة المتوازية
+_worker_processor: Optional[ArabicProcessor] = None
+_worker_lock = threading.Lock()
+
+
+def _worker_initargs() -> tuple:
+    """معاملات تهيئة العمال: لقطة من الإعدادات لضمان تطابق نتائجهم مع المسار التسلسلي"""
+    arabic_settings = settings_manager.get_category('arabic_processing') if settings_manager else {}
+    return (dict(arabic_settings),)
+
+
+def _init_tokenize_worker(arabic_settings: Dict[str, Any]):
+    """تهيئة العملية العاملة مرة واحدة بمعالج وإعدادات ومحلل مطابقة للعملية الرئيسية"""
+    global _worker_processor
+    if settings_manager and arabic_settings:
+        settings_manager.set_category('arabic_processing', arabic_settings)
+    _worker_processor = ArabicProcessor()
+    
+    # تحميل محلل الخليل (ومعجمه) عند التهيئة بدلاً من أول مهمة
+    if get_setting('arabic_processing', 'stemming_algorithm', 'light') == 'khalil':
+        get_khalil_analyzer()
+
+
+def _get_worker_processor() -> ArabicProcessor:
+    """معالج العملية الحالية (ينشأ عند أول استخدام في العملية الرئيسية مع الخيوط)"""
+    global _worker_processor
+    if _worker_processor is None:
+        with _worker_lock:
+            if _worker_processor is None:
+                _worker_processor = ArabicProcessor()
+    return _worker_processor
+
+
+def _tokenize_text(text: str, remove_stop: bool, stem: bool) -> List[str]:
+    """تقسيم نص أو جزء منه بمعالج العملية الحالية (مهمة WorkerTask)"""
+    return _get_worker_processor()._tokenize_words(text, remove_stop, stem)
+
+
+def _tokenize_texts(texts: List[str], remove_stop: bool, stem: bool) -> List[List[str]]:
+    """تقسيم دفعة من النصوص بمعالج العملية الحالية (دفعات atokenize)"""
+    processor = _get_worker_processor()
+    return [processor._tokenize_words(text, remove_stop, stem) for text in texts]
+
+
+# دفعات atokenize لكل مجموعة خيارات (remove_stop، stem)
+_tokenize_batchers: Dict[Tuple[bool, bool], Any] = {}
+
+
+def _tokenize_batcher(remove_stop: bool, stem: bool):
+    """مدمج الطلبات الخاص بخيارات التقسيم (ينشأ عند أول طلب)"""
+    key = (remove_stop, stem)
+    if key not in _tokenize_batchers:
+        _tokenize_batchers[key] = AsyncBatcher(
+            WorkerTask(_tokenize_texts, key), initializer=_init_tokenize_worker,
+            initargs=_worker_initargs
+        )
+    return _tokenize_batchers[key]
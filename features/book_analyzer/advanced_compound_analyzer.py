@@ -23,8 +23,8 @@ class AdvancedCompoundAnalyzer:
         }
         return stop_words
     
-    def extract_words(self, text):
-        """استخراج الكلمات من النص"""
+    def extract_words(self, text, job=None):
+        """استخراج الكلمات من النص (job: مهمة تسجل تقدمها كلمةً كلمة ويتحقق من إلغائها)"""
         # إزالة التشكيل
         text = re.sub(r'[\u064B-\u065F\u0670\u0617-\u061A]', '', text)
         
@@ -32,6 +32,9 @@ class AdvancedCompoundAnalyzer:
         arabic_pattern = re.compile(r'[\u0600-\u06FF]+')
         words = arabic_pattern.findall(text)
         
+        if job is not None:
+            words = job.iterate(words)
+        
         # تصفية الكلمات
         filtered_words = []
         for word in words:
@@ -42,10 +45,13 @@ class AdvancedCompoundAnalyzer:
         
         return filtered_words
     
-    def extract_bigrams(self, words):
+    def extract_bigrams(self, words, job=None):
         """استخراج المركبات الثنائية"""
+        indices = range(len(words) - 1)
+        if job is not None:
+            indices = job.iterate(indices, advance=False)
         bigrams = []
-        for i in range(len(words) - 1):
+        for i in indices:
             bigram = (words[i], words[i + 1])
             bigrams.append(bigram)
         return bigrams
@@ -122,10 +128,10 @@ class AdvancedCompoundAnalyzer:
         else:
             return "ضعيف جداً"
     
-    def analyze(self, text):
-        """تحليل المركبات المتقدم"""
+    def analyze(self, text, job=None):
+        """تحليل المركبات المتقدم (job: مهمة للتقدم والإلغاء أثناء الحلقات الطويلة)"""
         # استخراج الكلمات
-        words = self.extract_words(text)
+        words = self.extract_words(text, job)
         
         if len(words) < 2:
             return {
@@ -139,7 +145,7 @@ class AdvancedCompoundAnalyzer:
             }
         
         # استخراج المركبات
-        bigrams = self.extract_bigrams(words)
+        bigrams = self.extract_bigrams(words, job)
         bigram_counts = Counter(bigrams)
         word_counts = Counter(words)
         
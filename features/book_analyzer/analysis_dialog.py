@@ -16,6 +16,11 @@ from PyQt6.QtGui import QFont
 # استيراد خيط التحليل
 from .analysis_worker import BookAnalysisWorker
 
+try:
+    from utils.jobs import format_eta
+except ImportError:
+    from jobs import format_eta
+
 
 class BookAnalysisDialog(QDialog):
     """نافذة تحليل الكتاب المفرد"""
@@ -280,13 +285,16 @@ class BookAnalysisDialog(QDialog):
             
             # إعداد الواجهة
             self.progress_bar.setVisible(True)
-            self.progress_bar.setRange(0, 0)  # شريط متحرك
+            self.progress_bar.setRange(0, 0)
+            self.progress_bar.setValue(0)
             self.progress_label.setText("جارٍ تحليل الكتاب ...")
             self.progress_label.setVisible(True)
             
             # إنشاء وتشغيل خيط التحليل
             self.analysis_worker = BookAnalysisWorker("book_1", self.book_content)
             self.analysis_worker.progress_update.connect(self.update_progress)
+            self.analysis_worker.progress_changed.connect(self.on_progress_changed)
+            self.analysis_worker.analysis_cancelled.connect(self.on_analysis_cancelled)
             self.analysis_worker.analysis_complete.connect(self.on_analysis_complete)
             self.analysis_worker.analysis_error.connect(self.on_analysis_error)
             self.analysis_worker.start()
@@ -298,6 +306,25 @@ class BookAnalysisDialog(QDialog):
         """تحديث شريط التقدم"""
         self.progress_label.setText(message)
     
+    def on_progress_changed(self, progress):
+        """تحديث شريط التقدم بعدد العناصر المنجزة والوقت المتبقي"""
+        if progress.items_total and self.progress_bar.maximum() != progress.items_total:
+            self.progress_bar.setRange(0, progress.items_total)
+        self.progress_bar.setValue(progress.items_done)
+        if progress.eta is not None and not progress.finished:
+            self.progress_bar.setFormat(f"%v/%m - المتبقي: {format_eta(progress.eta)}")
+    
+    def on_analysis_cancelled(self):
+        """توقف التحليل بطلب المستخدم"""
+        self.progress_bar.setVisible(False)
+        self.progress_label.setVisible(False)
+    
+    def reject(self):
+        """إلغاء التحليل الجاري عند إغلاق النافذة"""
+        if self.analysis_worker is not None and self.analysis_worker.isRunning():
+            self.analysis_worker.cancel()
+        super().reject()
+    
     def on_analysis_complete(self, results):
         """اكتمال التحليل"""
         self.analysis_results = results
@@ -11,19 +11,34 @@ from .compound_analyzer import CompoundAnalyzer
 from .entity_extractor import EntityExtractor
 from .advanced_compound_analyzer import AdvancedCompoundAnalyzer
 
+try:
+    from utils.jobs import Job, JobCancelled
+except ImportError:
+    from jobs import Job, JobCancelled
+
 
 class BookAnalysisWorker(QThread):
     """خيط منفصل لتحليل كتاب واحد - شامل ومتقدم"""
     
     progress_update = pyqtSignal(str)  # رسالة التقدم
+    progress_changed = pyqtSignal(object)  # JobProgress: المراحل المنجزة والوقت المتبقي
     analysis_complete = pyqtSignal(dict)  # النتائج النهائية
     analysis_error = pyqtSignal(str)  # رسالة الخطأ
+    analysis_cancelled = pyqtSignal()  # توقف التحليل بطلب المستخدم
+    
+    # الكلمات كما تستخرجها المحللات (بعد إزالة التشكيل): وحدات التقدم داخل المراحل
+    DIACRITICS = re.compile(r'[\u064B-\u065F\u0670\u0617-\u061A]')
+    ARABIC_WORD = re.compile(r'[\u0600-\u06FF]+')
     
     def __init__(self, book_id, book_content):
         super().__init__()
         self.book_id = book_id
         self.book_content = book_content
-        self.is_cancelled = False
+        
+        # المهمة المشتركة مع أدوات سطر الأوامر: التقدم بالعناصر والإلغاء التعاوني.
+        # تمرر إلى المحللات فتسجل كل كلمة (أو نمط كيانات) وتتحقق من الإلغاء
+        # داخل حلقاتها؛ total_items يحسب في بداية run
+        self.job = Job(f"تحليل {book_id}", on_progress=self.progress_changed.emit)
         
         # إنشاء المحللات
         self.word_analyzer = WordAnalyzer()
@@ -31,46 +46,54 @@ class BookAnalysisWorker(QThread):
         self.entity_extractor = EntityExtractor()
         self.advanced_analyzer = AdvancedCompoundAnalyzer()
     
+    @property
+    def is_cancelled(self):
+        """هل طلب إلغاء التحليل"""
+        return self.job.cancelled
+    
     def run(self):
         """تنفيذ التحليل الشامل المتقدم"""
         try:
             results = {}
             
+            # ثلاث مراحل تمر على كل كلمة، ومرحلة الكيانات تمر على كل نمط
+            words = len(self.ARABIC_WORD.findall(self.DIACRITICS.sub('', self.book_content)))
+            self.job.total_items = 3 * words + self.entity_extractor.pattern_count
+            
             # 1. تحليل المركبات والكلمات الأساسي
             self.progress_update.emit("تحليل المركّبات والكلمات الأساسي ...")
-            if self.is_cancelled:
-                return
-            compound_results = self.compound_analyzer.analyze(self.book_content)
+            self.job.raise_if_cancelled()
+            compound_results = self.compound_analyzer.analyze(self.book_content, self.job)
             results.update(compound_results)
             
             # 2. التحليل المتقدم للمركبات (PMI, T-Score, etc.)
             self.progress_update.emit("التحليل المتقدم للمركّبات (PMI, T-Score, Log-Likelihood) ...")
-            if self.is_cancelled:
-                return
-            advanced_results = self.advanced_analyzer.analyze(self.book_content)
+            self.job.raise_if_cancelled()
+            advanced_results = self.advanced_analyzer.analyze(self.book_content, self.job)
             results['advanced_compounds'] = advanced_results
             
             # 3. استخراج الكيانات
             self.progress_update.emit("استخراج الكيانات المسمّاة ...")
-            if self.is_cancelled:
-                return
-            results['entities'] = self.entity_extractor.extract(self.book_content)
+            self.job.raise_if_cancelled()
+            results['entities'] = self.entity_extractor.extract(self.book_content, self.job)
             
             # 4. تحليل الكلمات المفردة
             self.progress_update.emit("تحليل الكلمات المفردة ...")
-            if self.is_cancelled:
-                return
-            word_results = self.word_analyzer.analyze(self.book_content)
+            self.job.raise_if_cancelled()
+            word_results = self.word_analyzer.analyze(self.book_content, self.job)
             results.update(word_results)
             
             # إرسال النتائج
-            if not self.is_cancelled:
-                self.progress_update.emit("انتهى التّحليل الشامل!")
-                self.analysis_complete.emit(results)
+            self.job.raise_if_cancelled()
+            self.job.finish()
+            self.progress_update.emit("انتهى التّحليل الشامل!")
+            self.analysis_complete.emit(results)
             
+        except JobCancelled:
+            self.analysis_cancelled.emit()
         except Exception as e:
             self.analysis_error.emit(str(e))
     
     def cancel(self):
-        """إلغاء عملية التحليل"""
-        self.is_cancelled = True
+        """إلغاء عملية التحليل (تتوقف المحللات داخل حلقاتها)"""
+        self.job.cancel()
@@ -23,8 +23,8 @@ class CompoundAnalyzer:
         }
         return stop_words
     
-    def extract_words(self, text):
-        """استخراج الكلمات من النص"""
+    def extract_words(self, text, job=None):
+        """استخراج الكلمات من النص (job: مهمة تسجل تقدمها كلمةً كلمة ويتحقق من إلغائها)"""
         # إزالة التشكيل
         text = re.sub(r'[\u064B-\u065F\u0670\u0617-\u061A]', '', text)
         
@@ -32,6 +32,9 @@ class CompoundAnalyzer:
         arabic_pattern = re.compile(r'[\u0600-\u06FF]+')
         words = arabic_pattern.findall(text)
         
+        if job is not None:
+            words = job.iterate(words)
+        
         # تصفية الكلمات
         filtered_words = []
         for word in words:
@@ -42,18 +45,24 @@ class CompoundAnalyzer:
         
         return filtered_words
     
-    def extract_bigrams(self, words):
+    def extract_bigrams(self, words, job=None):
         """استخراج المركبات الثنائية"""
+        indices = range(len(words) - 1)
+        if job is not None:
+            indices = job.iterate(indices, advance=False)
         bigrams = []
-        for i in range(len(words) - 1):
+        for i in indices:
             bigram = (words[i], words[i + 1])
             bigrams.append(bigram)
         return bigrams
     
-    def extract_trigrams(self, words):
+    def extract_trigrams(self, words, job=None):
         """استخراج المركبات الثلاثية"""
+        indices = range(len(words) - 2)
+        if job is not None:
+            indices = job.iterate(indices, advance=False)
         trigrams = []
-        for i in range(len(words) - 2):
+        for i in indices:
             trigram = (words[i], words[i + 1], words[i + 2])
             trigrams.append(trigram)
         return trigrams
@@ -78,10 +87,10 @@ class CompoundAnalyzer:
         pmi = log2(p_bigram / (p_word1 * p_word2))
         return pmi
     
-    def analyze(self, text):
-        """تحليل المركبات في النص"""
+    def analyze(self, text, job=None):
+        """تحليل المركبات في النص (job: مهمة للتقدم والإلغاء أثناء الحلقات الطويلة)"""
         # استخراج الكلمات
-        words = self.extract_words(text)
+        words = self.extract_words(text, job)
         
         if len(words) < 2:
             return {
@@ -94,8 +103,8 @@ class CompoundAnalyzer:
             }
         
         # استخراج المركبات
-        bigrams = self.extract_bigrams(words)
-        trigrams = self.extract_trigrams(words)
+        bigrams = self.extract_bigrams(words, job)
+        trigrams = self.extract_trigrams(words, job)
         
         # حساب التكرارات
         bigram_counts = Counter(bigrams)
@@ -106,12 +106,26 @@ class EntityExtractor:
         ]
         return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
     
-    def extract_entities_by_patterns(self, text, patterns):
-        """استخراج الكيانات باستخدام الأنماط"""
+    @property
+    def pattern_count(self):
+        """عدد الأنماط (وحدات التقدم في extract)"""
+        return (len(self.name_patterns) + len(self.place_patterns) +
+                len(self.organization_patterns))
+    
+    def extract_entities_by_patterns(self, text, patterns, job=None):
+        """استخراج الكيانات باستخدام الأنماط (job: مهمة تسجل تقدمها نمطاً نمطاً)"""
+        if job is None:
+            entities = []
+            for pattern in patterns:
+                matches = pattern.findall(text)
+                entities.extend(matches)
+            return entities
+        
+        # مع مهمة: التحقق من الإلغاء أثناء مسح النص بالنمط الواحد أيضاً
         entities = []
-        for pattern in patterns:
-            matches = pattern.findall(text)
-            entities.extend(matches)
+        for pattern in job.iterate(patterns, every=1):
+            matches = pattern.finditer(text)
+            entities.extend(match.group(0) for match in job.iterate(matches, advance=False))
         return entities
     
     def clean_entity(self, entity):
@@ -122,18 +136,18 @@ class EntityExtractor:
         entity = re.sub(r'^[^\w\u0600-\u06FF]+|[^\w\u0600-\u06FF]+$', '', entity)
         return entity
     
-    def extract(self, text):
-        """استخراج الكيانات من النص"""
+    def extract(self, text, job=None):
+        """استخراج الكيانات من النص (job: مهمة للتقدم والإلغاء أثناء الحلقات الطويلة)"""
         # استخراج الأسماء
-        names = self.extract_entities_by_patterns(text, self.name_patterns)
+        names = self.extract_entities_by_patterns(text, self.name_patterns, job)
         names = [self.clean_entity(name) for name in names if len(name.strip()) > 2]
         
         # استخراج الأماكن
-        places = self.extract_entities_by_patterns(text, self.place_patterns)
+        places = self.extract_entities_by_patterns(text, self.place_patterns, job)
         places = [self.clean_entity(place) for place in places if len(place.strip()) > 2]
         
         # استخراج المؤسسات
-        organizations = self.extract_entities_by_patterns(text, self.organization_patterns)
+        organizations = self.extract_entities_by_patterns(text, self.organization_patterns, job)
         organizations = [self.clean_entity(org) for org in organizations if len(org.strip()) > 2]
         
         # حساب التكرارات
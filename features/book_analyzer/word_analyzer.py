@@ -40,8 +40,10 @@ class WordAnalyzer:
         
         return words
     
-    def filter_words(self, words):
-        """تصفية الكلمات وإزالة كلمات الإيقاف"""
+    def filter_words(self, words, job=None):
+        """تصفية الكلمات وإزالة كلمات الإيقاف (job: مهمة تسجل تقدمها كلمةً كلمة)"""
+        if job is not None:
+            words = job.iterate(words)
         filtered_words = []
         
         for word in words:
@@ -54,13 +56,13 @@ class WordAnalyzer:
         
         return filtered_words
     
-    def analyze(self, text):
-        """تحليل الكلمات في النص"""
+    def analyze(self, text, job=None):
+        """تحليل الكلمات في النص (job: مهمة للتقدم والإلغاء أثناء الحلقات الطويلة)"""
         # استخراج الكلمات العربية
         words = self.extract_arabic_words(text)
         
         # تصفية الكلمات
-        filtered_words = self.filter_words(words)
+        filtered_words = self.filter_words(words, job)
         
         # حساب التكرارات
         word_counts = Counter(filtered_words)
@@ -15,6 +15,12 @@ from typing import List, Dict, Tuple, Optional
 class KhalilAnalyzer:
     """محلل الخليل الصرفي - النسخة النهائية"""
     
+    # الحد الأقصى لعدد الجذوع المحفوظة في جدول توافق الجذور
+    PLAUSIBILITY_CACHE_SIZE = 200000
+    
+    # الحد الأقصى لعدد الكلمات المحفوظة في جدول الجذور المستخرجة
+    ROOT_CACHE_SIZE = 100000
+    
     def __init__(self):
         # إعداد نظام التسجيل
         self.logger = logging.getLogger(__name__)
@@ -43,6 +49,14 @@ class KhalilAnalyzer:
             # خرائط مساعدة للوصول إلى فئة السابقة/اللاحقة بسرعة
             self._pref_class = {p.get('unvoweled'): (p.get('class') or '') for p in self.prefixes if p.get('unvoweled') is not None}
             self._suf_class = {s.get('unvoweled'): (s.get('class') or '') for s in self.suffixes if s.get('unvoweled') is not None}
+
+            # فهارس مساعدة لتسريع مطابقة الجذور والأنماط
+            self._build_indexes()
+            self._root_cache: Dict[str, Optional[str]] = {}
+            self._async_batcher = None
+            
+            # عدد التقسيمات التي تطابق مع الأنماط لكل كلمة (0: الكل دون تقليم)
+            self.max_candidates = 0
             
             self.logger.info(f"✅ تم تحميل قاعدة البيانات بنجاح:")
             self.logger.info(f"   📝 البادئات: {len(self.prefixes)}")
@@ -212,30 +226,85 @@ class KhalilAnalyzer:
             print(f"⚠️  خطأ في تحميل الجذور: {e}")
         return roots
 
+    def _build_indexes(self):
+        """بناء فهارس الجذور والأنماط مرة واحدة بعد تحميل قاعدة البيانات"""
+        # حروف الجذور المميزة مرتبة من الأطول للأقصر (بعض الملفات تفصل الحروف بمسافات "ص د ق")
+        letter_seqs = {}
+        for r in self.roots:
+            letters = tuple(ch for ch in (r.get('val') or '') if ch.strip())
+            if len(letters) >= 3 and letters not in letter_seqs:
+                letter_seqs[letters] = frozenset(letters)
+        self._root_letter_seqs = sorted(letter_seqs.items(), key=lambda item: len(item[0]), reverse=True)
+
+        # الجذور المعروفة للتحقق من مرشحي الأنماط (نفس حد الأمان السابق)
+        self._known_roots = {(r.get('val') or '').replace(' ', '') for r in self.roots[:5000]}
+
+        # الجذور والأنماط حسب قيمتها للمطابقة التامة
+        self._roots_by_val: Dict[str, List[Dict]] = {}
+        for r in self.roots:
+            if r['val']:
+                self._roots_by_val.setdefault(r['val'], []).append(r)
+        self._patterns_by_diac: Dict[str, List[Dict]] = {}
+        for pat in self.patterns:
+            if pat['diac']:
+                self._patterns_by_diac.setdefault(pat['diac'], []).append(pat)
+
+        # الأنماط منزوعة التشكيل مجمعة حسب الطول مع تعبيراتها النمطية المترجمة
+        self._patterns_by_length: Dict[int, List[Tuple[Dict, str, 're.Pattern']]] = {}
+        compiled: Dict[str, 're.Pattern'] = {}
+        for pat in self.patterns[:50000]:  # حد أمان
+            p = self._strip_diacritics(pat.get('diac') or '')
+            if not p:
+                continue
+            if p not in compiled:
+                compiled[p] = re.compile(self._pattern_regex(p))
+            self._patterns_by_length.setdefault(len(p), []).append((pat, p, compiled[p]))
+
+        self._plausibility_cache: Dict[str, int] = {}
+
+    @staticmethod
+    def _pattern_regex(p: str) -> str:
+        """بناء تعبير نمطي باستبدال placeholders (ف/ع/ل/ل) بحرف عربي"""
+        # ندعم الثلاثي (ف/ع/ل) والرباعي (ف/ع/ل/ل)
+        regex_parts = []
+        for ch in p:
+            if ch in ('ف', 'ع', 'ل'):
+                regex_parts.append('([\u0621-\u064A])')
+            else:
+                # حرف ثابت من النمط
+                regex_parts.append(re.escape(ch))
+        # يجب أن يطابق الطول الكامل
+        return '^' + ''.join(regex_parts) + '$'
+
     def _root_plausibility(self, stem: str) -> int:
         """قياس مدى توافق الجذع مع جذور محملة (بحروف مرتبة داخل الكلمة)."""
         if not self.roots:
             return 0
+        cached = self._plausibility_cache.get(stem)
+        if cached is not None:
+            return cached
         s = stem
+        stem_letters = set(s)
         best = 0
-        for r in self.roots:  # نفحص كل الجذور لضمان دقة أعلى
-            val = r.get('val') or ''
-            if not val:
+        # الجذور مرتبة تنازلياً حسب الطول، فأول تطابق هو الأطول
+        for letters, letter_set in self._root_letter_seqs:
+            if not letter_set <= stem_letters:
                 continue
-            letters = [ch for ch in val if ch.strip()]
-            # بعض ملفات الجذور قد تحتوي على مسافات بين الحروف "ص د ق"
-            if len(letters) >= 3:
-                # تحقق من وجود الحروف بترتيبها داخل الجذع
-                idx = 0
-                ok = True
-                for ch in letters:
-                    pos = s.find(ch, idx)
-                    if pos == -1:
-                        ok = False
-                        break
-                    idx = pos + 1
-                if ok:
-                    best = max(best, len(letters))
+            # تحقق من وجود الحروف بترتيبها داخل الجذع
+            idx = 0
+            ok = True
+            for ch in letters:
+                pos = s.find(ch, idx)
+                if pos == -1:
+                    ok = False
+                    break
+                idx = pos + 1
+            if ok:
+                best = len(letters)
+                break
+        if len(self._plausibility_cache) >= self.PLAUSIBILITY_CACHE_SIZE:
+            self._plausibility_cache.clear()
+        self._plausibility_cache[stem] = best * 100
         return best * 100
 
     def _class_compat_score(self, prefix_list: List[str], suffix_list: List[str], stem: Optional[str] = None, pattern_types: Optional[List[str]] = None) -> int:
@@ -374,30 +443,8 @@ class KhalilAnalyzer:
             stems_to_try.append(stem[2:])
 
         for st in stems_to_try:
-            for pat in self.patterns[:50000]:  # حد أمان
-                p = self._strip_diacritics(pat.get('diac') or '')
-                if not p:
-                    continue
-                # بناء تعبير نمطي باستبدال placeholders (ف/ع/ل/ل)
-                # ندعم الثلاثي (ف/ع/ل) والرباعي (ف/ع/ل/ل)
-                placeholders = []
-                regex_parts = []
-                for ch in p:
-                    if ch == 'ف':
-                        placeholders.append('R')
-                        regex_parts.append('([\u0621-\u064A])')
-                    elif ch == 'ع':
-                        placeholders.append('R')
-                        regex_parts.append('([\u0621-\u064A])')
-                    elif ch == 'ل':
-                        placeholders.append('R')
-                        regex_parts.append('([\u0621-\u064A])')
-                    else:
-                        # حرف ثابت من النمط
-                        regex_parts.append(re.escape(ch))
-                # يجب أن يطابق الطول الكامل
-                rx = '^' + ''.join(regex_parts) + '$'
-                m = re.match(rx, st)
+            for pat, p, rx in self._patterns_by_length.get(len(st), []):
+                m = rx.match(st)
                 if not m:
                     continue
                 # استخراج الجذور المقترحة
@@ -412,12 +459,7 @@ class KhalilAnalyzer:
                 # تحقق من وجود الجذر في قاعدة الجذور (مع أو بدون مسافات)
                 root_no_space = ''.join(root_letters)
                 root_spaced = ' '.join(root_letters)
-                exists = False
-                for r in self.roots[:5000]:
-                    val = (r.get('val') or '').replace(' ', '')
-                    if val == root_no_space:
-                        exists = True
-                        break
+                exists = root_no_space in self._known_roots
                 candidates.append({
                     'root': root_spaced if exists else root_spaced,
                     'pattern_id': pat.get('id'),
@@ -481,6 +523,75 @@ class KhalilAnalyzer:
         
         return results
     
+    def set_max_candidates(self, max_candidates: int):
+        """
+        تغيير درجة التقليم: عدد التقسيمات (حسب الدرجة الأولية) التي تطابق مع الأنماط
+        لكل كلمة، و0 لمطابقتها جميعاً. الجذور المحفوظة تحذف لأنها قد تتغير.
+        """
+        max_candidates = max(0, int(max_candidates or 0))
+        if max_candidates != self.max_candidates:
+            self.max_candidates = max_candidates
+            self._root_cache.clear()
+    
+    def analyze_words(self, words) -> Dict[str, List[Dict]]:
+        """تحليل مجموعة كلمات دفعة واحدة، مع تحليل كل صيغة مميزة مرة واحدة"""
+        return {word: self.analyze_word(word) for word in dict.fromkeys(words)}
+    
+    async def aanalyze_words(self, words) -> Dict[str, List[Dict]]:
+        """
+        نسخة غير متزامنة من analyze_words لا تحجب حلقة الأحداث
+        
+        الطلبات المتزامنة تدمج في دفعة واحدة تحلل كل صيغة مميزة فيها مرة واحدة،
+        وتنفذ دفعة واحدة في كل مرة في مجمع خيوط محسن الأداء (المحلل وجداوله في
+        العملية الحالية).
+        """
+        if self._async_batcher is None:
+            try:
+                from utils.async_api import AsyncBatcher
+            except ImportError:
+                from async_api import AsyncBatcher
+            self._async_batcher = AsyncBatcher(self._analyze_word_batches, mode='accurate',
+                                               max_concurrency=1)
+        return await self._async_batcher.submit(list(words))
+    
+    def _analyze_word_batches(self, requests: List[List[str]]) -> List[Dict[str, List[Dict]]]:
+        """تحليل عدة طلبات معاً ثم توزيع النتائج على كل طلب"""
+        analyses = self.analyze_words(word for words in requests for word in words)
+        return [{word: analyses[word] for word in dict.fromkeys(words)} for words in requests]
+    
+    def extract_root(self, word: str) -> Optional[str]:
+        """
+        استخراج جذر الكلمة (بدون مسافات) من أفضل تحليل لها
+        
+        Returns:
+            الجذر، أو None إذا لم يمكن تحديده (مثل الكلمات المساعدة)
+        """
+        if word in self._root_cache:
+            return self._root_cache[word]
+        
+        root = None
+        for result in self.analyze_word(word):
+            if result['type'] == 'morphological':
+                stem_analysis = result['stem_analysis']
+                # مرشحو الأنماط مرتبون بحيث تأتي الجذور الموجودة في القاعدة أولاً
+                candidates = stem_analysis.get('via_patterns') or stem_analysis['possible_roots']
+                if candidates:
+                    root = candidates[0]['root']
+            elif result['type'] == 'root_direct':
+                root = result['root']
+            if root:
+                root = root.replace(' ', '')
+                break
+        
+        if len(self._root_cache) >= self.ROOT_CACHE_SIZE:
+            self._root_cache.clear()
+        self._root_cache[word] = root
+        return root
+    
+    def extract_roots(self, words) -> Dict[str, Optional[str]]:
+        """استخراج جذور مجموعة كلمات دفعة واحدة (مرة واحدة لكل صيغة مميزة)"""
+        return {word: self.extract_root(word) for word in dict.fromkeys(words)}
+    
     def _analyze_toolwords(self, word: str) -> List[Dict]:
         """تحليل الكلمات المساعدة"""
         results = []
@@ -524,8 +635,10 @@ class KhalilAnalyzer:
         best = None
         best_score = -1
 
-        # تجميع كل المرشحين وتقييمهم ثم اختيار الأفضل وفق حد أدنى للجودة
-        candidates_ranked: List[Tuple[int, Tuple[List[str], str, List[str], Dict]]] = []
+        # تجميع كل المرشحين وتقييمهم ثم اختيار الأفضل وفق حد أدنى للجودة. الدرجة
+        # الأولية (الطول وتوافق الجذع والسوابق واللواحق) رخيصة، ومطابقة الأنماط أغلى
+        # الخطوات فتحسب للمرشحين الذين يبقيهم التقليم (max_candidates) فقط
+        candidates: List[Tuple[int, List[str], str, List[str]]] = []
         for pref_list, after_pref in prefix_candidates:
             if not after_pref:
                 continue
@@ -553,20 +666,6 @@ class KhalilAnalyzer:
                         score += 15
                     # توافق الجذور المباشر
                     score += self._root_plausibility(stem)
-                    # توافق الجذور بعد التطبيع للأفعال المعتلة (نأخذ أفضل بديل فقط)
-                    alt_scores = [self._root_plausibility(alt) for alt in self._normalize_weak_stems(stem)]
-                    if alt_scores:
-                        score += int(max(alt_scores) * 0.5)
-                    # نقاط وجود تطابق نمطي فعلي
-                    pattern_hits = self._extract_root_via_patterns(stem)
-                    pattern_types = [c.get('type') for c in pattern_hits] if pattern_hits else []
-                    if pattern_hits:
-                        if any(c.get('exists') for c in pattern_hits):
-                            score += 140
-                        else:
-                            score += 70
-                    # توافق الفئات (نمرر الجذع وأنواع الأنماط)
-                    score += self._class_compat_score(pref_list, suf_seq, stem, pattern_types)
                     # مكونات عربية شائعة
                     if pref_list:
                         score += 10
@@ -591,8 +690,32 @@ class KhalilAnalyzer:
                     # مكافأة لتقسيم غني: وجود و/ف + (ب/ك/ل/س) + ال + جمع
                     if any(x in ('و','ف') for x in pref_list) and any(x in ('ب','ك','ل','س') for x in pref_list) and 'ال' in pref_list and any(x in ('ون','ين','ات') for x in suf_seq):
                         score += 40
-                    # خزّن المرشح للتصنيف لاحقًا
-                    candidates_ranked.append((score, (pref_list, stem, suf_seq, {'pattern_hits': pattern_hits})))
+                    candidates.append((score, pref_list, stem, suf_seq))
+
+        # التقليم: إبقاء أعلى المرشحين درجة أولية (بترتيبهم الأصلي)
+        if self.max_candidates and len(candidates) > self.max_candidates:
+            ranked = sorted(range(len(candidates)), key=lambda i: candidates[i][0], reverse=True)
+            keep = set(ranked[:self.max_candidates])
+            candidates = [c for i, c in enumerate(candidates) if i in keep]
+
+        candidates_ranked: List[Tuple[int, Tuple[List[str], str, List[str], Dict]]] = []
+        for score, pref_list, stem, suf_seq in candidates:
+            # توافق الجذور بعد التطبيع للأفعال المعتلة (نأخذ أفضل بديل فقط)
+            alt_scores = [self._root_plausibility(alt) for alt in self._normalize_weak_stems(stem)]
+            if alt_scores:
+                score += int(max(alt_scores) * 0.5)
+            # نقاط وجود تطابق نمطي فعلي
+            pattern_hits = self._extract_root_via_patterns(stem)
+            pattern_types = [c.get('type') for c in pattern_hits] if pattern_hits else []
+            if pattern_hits:
+                if any(c.get('exists') for c in pattern_hits):
+                    score += 140
+                else:
+                    score += 70
+            # توافق الفئات (نمرر الجذع وأنواع الأنماط)
+            score += self._class_compat_score(pref_list, suf_seq, stem, pattern_types)
+            # خزّن المرشح للتصنيف لاحقًا
+            candidates_ranked.append((score, (pref_list, stem, suf_seq, {'pattern_hits': pattern_hits})))
 
         # اختر أفضل مرشح يتجاوز حدًا أدنى للجودة، وإلا اختر الأعلى
         if candidates_ranked:
@@ -629,26 +752,24 @@ class KhalilAnalyzer:
         }
         
         # البحث في الجذور
-        for root in self.roots:
-            if root['val'] and stem == root['val']:
-                analysis['possible_roots'].append({
-                    'root': root['val'],
-                    'vect': root['vect'],
-                    'type': 'exact_match'
-                })
+        for root in self._roots_by_val.get(stem, []):
+            analysis['possible_roots'].append({
+                'root': root['val'],
+                'vect': root['vect'],
+                'type': 'exact_match'
+            })
         
         # البحث عن أنماط مطابقة
-        for pattern in self.patterns:
-            if pattern['diac'] and stem == pattern['diac']:
-                analysis['possible_patterns'].append({
-                    'id': pattern['id'],
-                    'pattern': pattern['diac'],
-                    'type': pattern['type'],
-                    'aug': pattern['aug'],
-                    'cas': pattern['cas'],
-                    'ncg': pattern['ncg'],
-                    'trans': pattern['trans']
-                })
+        for pattern in self._patterns_by_diac.get(stem, []):
+            analysis['possible_patterns'].append({
+                'id': pattern['id'],
+                'pattern': pattern['diac'],
+                'type': pattern['type'],
+                'aug': pattern['aug'],
+                'cas': pattern['cas'],
+                'ncg': pattern['ncg'],
+                'trans': pattern['trans']
+            })
         
         return analysis
     
@@ -25,17 +25,28 @@ try:
 except ImportError:
     KhalilAnalyzer = None
 
+try:
+    from utils.jobs import Job, JobCancelled, format_eta
+except ImportError:
+    from jobs import Job, JobCancelled, format_eta
+
 
 class AnalysisWorker(QThread):
     """عامل التحليل في الخلفية"""
     finished = pyqtSignal(list)
     error = pyqtSignal(str)
+    cancelled = pyqtSignal()  # توقف التحليل بطلب المستخدم
     progress = pyqtSignal(str)
     
     def __init__(self, analyzer, text):
         super().__init__()
         self.analyzer = analyzer
         self.text = text
+        self.job = Job("التحليل الصرفي")
+    
+    def cancel(self):
+        """إلغاء التحليل (يتوقف قبل الكلمة التالية)"""
+        self.job.cancel()
     
     def run(self):
         try:
@@ -44,13 +55,18 @@ class AnalysisWorker(QThread):
             # تقسيم النص إلى كلمات
             words = self.text.strip().split()
             all_results = []
+            self.job.total_items = len(words)
             
             for word in words:
                 if not word:
                     continue
-                    
-                self.progress.emit(f"تحليل: {word}")
+                
+                self.job.raise_if_cancelled()
+                progress = self.job.progress()
+                self.progress.emit(f"تحليل: {word} ({progress.items_done + 1}/{len(words)}"
+                                   f" - المتبقي: {format_eta(progress.eta)})")
                 results = self.analyzer.analyze_word(word)
+                self.job.advance()
                 
                 if results:
                     # أخذ أفضل نتيجة لكل كلمة
@@ -66,8 +82,11 @@ class AnalysisWorker(QThread):
                         'result': None
                     })
             
+            self.job.finish()
             self.finished.emit(all_results)
             
+        except JobCancelled:
+            self.cancelled.emit()
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -358,6 +377,7 @@ class MorphologicalDialog(QDialog):
         self.worker = AnalysisWorker(self.analyzer, text)
         self.worker.finished.connect(self.on_analysis_finished)
         self.worker.error.connect(self.on_analysis_error)
+        self.worker.cancelled.connect(self.on_analysis_cancelled)
         self.worker.progress.connect(self.on_progress_update)
         self.worker.start()
     
@@ -385,6 +405,14 @@ class MorphologicalDialog(QDialog):
         self.analyze_btn.setEnabled(True)
         self.clear_btn.setEnabled(True)
     
+    def on_analysis_cancelled(self):
+        """توقف التحليل بطلب المستخدم"""
+        self.status_label.setText("تم إلغاء التحليل")
+        
+        # تفعيل الأزرار
+        self.analyze_btn.setEnabled(True)
+        self.clear_btn.setEnabled(True)
+    
     def display_results(self, results: list):
         """عرض النتائج في الجدول"""
         self.results_table.setRowCount(len(results))
@@ -454,6 +482,12 @@ class MorphologicalDialog(QDialog):
         # تعديل ارتفاع الصفوف
         self.results_table.resizeRowsToContents()
     
+    def reject(self):
+        """إلغاء التحليل الجاري عند إغلاق النافذة"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+        super().reject()
+    
     def clear_all(self):
         """مسح كل شيء"""
         self.input_text.clear()
@@ -11,6 +11,7 @@ from pathlib import Path
 from collections import Counter, defaultdict
 import math
 import re
+import bisect
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -65,17 +66,49 @@ class ArabicTextProcessor:
             import re
             text = re.sub(r'[^\u0600-\u06FF\s]', '', text)
             return text.split()
+    
+    def extract_spans(self, text):
+        """استخراج الكلمات العربية مع مواضعها في النص الأصلي"""
+        if self.arabic_processor:
+            return self.arabic_processor.extract_arabic_spans(text)
+        return None
+    
+    def profile(self, text):
+        """الملف الإحصائي للنص في مسح واحد"""
+        if self.arabic_processor:
+            return self.arabic_processor.profile(text)
+        return None
 
 
 class KWICAnalyzer:
     """محلل KWIC (الكلمة في السياق)"""
     
+    # المصطلحات العربية تبحث في الكلمات المستخرجة مسبقاً (spans)، ويزال تشكيلها
+    # كما أزيل من تلك الكلمات؛ غيرها (مثل الكلمات اللاتينية) تبحث في text.split()
+    ARABIC_TERM = re.compile(r'[\u0600-\u06FF]+')
+    TASHKEEL = re.compile(r'[\u064B-\u065F\u0670]')
+    
     def __init__(self):
         self.results = []
     
-    def search_kwic(self, text, search_term, context_size=5):
+    def search_kwic(self, text, search_term, context_size=5, spans=None, words=None, offsets=None):
         """البحث عن الكلمة في السياق"""
-        words = text.split()
+        results = self.find(text, search_term, context_size, spans, words, offsets)
+        self.results = results
+        return results
+    
+    def find(self, text, search_term, context_size=5, spans=None, words=None, offsets=None):
+        """
+        مواضع الكلمة وسياقاتها دون حفظها في self.results (يستخدمها KWIC والتوزيع)
+        
+        'position' في الحالتين رقم الكلمة في text.split() (words)، ويمكن تمرير
+        words وoffsets المحسوبة مرة واحدة عند تحميل النص بدلاً من إعادة مسحه.
+        """
+        if spans is not None and offsets is not None and self.ARABIC_TERM.fullmatch(search_term):
+            return self.search_kwic_spans(text, search_term, context_size, spans, offsets)
+        
+        if words is None:
+            words = text.split()
         results = []
         
         for i, word in enumerate(words):
@@ -93,7 +126,42 @@ class KWICAnalyzer:
                     'position': i
                 })
         
-        self.results = results
+        return results
+    
+    @staticmethod
+    def word_offsets(text):
+        """مواضع بداية كلمات text.split() في النص الأصلي"""
+        return [m.start() for m in re.finditer(r'\S+', text)]
+    
+    @staticmethod
+    def word_index(offsets, start):
+        """رقم كلمة text.split() التي تحتوي الموضع start"""
+        return max(0, bisect.bisect_right(offsets, start) - 1)
+    
+    def search_kwic_spans(self, text, search_term, context_size, spans, offsets):
+        """البحث في الكلمات المستخرجة مسبقاً مع أخذ السياق من النص الأصلي
+        
+        يبقى 'position' رقم الكلمة في text.split() (offsets من word_offsets)، أما
+        'span_index' فهو رقمها في spans، و'start'/'end' موضعها في النص.
+        """
+        term = self.TASHKEEL.sub('', search_term).lower()
+        results = []
+        
+        for i, word in enumerate(spans.tokens):
+            if term in word.lower():
+                left_context, right_context = spans.context(text, i, context_size)
+                start, end = spans.span(i)
+                
+                results.append({
+                    'left': left_context,
+                    'keyword': text[start:end],
+                    'right': right_context,
+                    'position': self.word_index(offsets, start),
+                    'span_index': i,
+                    'start': start,
+                    'end': end
+                })
+        
         return results
 
 
@@ -104,14 +172,11 @@ class PlotVisualizer:
         self.fig = None
         self.canvas = None
     
-    def create_word_distribution_plot(self, text, search_term):
-        """إنشاء مخطط توزيع الكلمات"""
-        words = text.split()
-        positions = []
-        
-        for i, word in enumerate(words):
-            if search_term.lower() in word.lower():
-                positions.append(i)
+    def create_word_distribution_plot(self, text, search_term, positions=None):
+        """إنشاء مخطط توزيع الكلمات (positions: مواضع محسوبة مسبقاً، مثل نتائج KWIC)"""
+        if positions is None:
+            positions = [i for i, word in enumerate(text.split())
+                         if search_term.lower() in word.lower()]
         
         if not positions:
             return None
@@ -250,6 +315,10 @@ class TextAnalyzer:
         self.words = []
         self.tokens = []
         self.sentences = []
+        self.spans = None
+        self.split_words = []
+        self.word_offsets = None
+        self.profile = None
         self.arabic_processor = ArabicTextProcessor()
         self.kwic_analyzer = KWICAnalyzer()
         self.plot_visualizer = PlotVisualizer()
@@ -261,6 +330,12 @@ class TextAnalyzer:
         self.text = text
         self.tokenize()
         self.segment_sentences()
+        # الكلمات العربية مع مواضعها، وكلمات text.split() مع مواضع بدايتها،
+        # لتستخدمها KWIC والتوزيع دون إعادة مسح النص
+        self.spans = self.arabic_processor.extract_spans(text)
+        self.split_words = text.split()
+        self.word_offsets = KWICAnalyzer.word_offsets(text)
+        self.profile = self.arabic_processor.profile(text)
         
     def tokenize(self):
         """تقسيم النص إلى كلمات"""
@@ -268,6 +343,12 @@ class TextAnalyzer:
         self.tokens = text_cleaned.split()
         self.words = [w.lower() for w in self.tokens if len(w) > 0]
         
+    def find_term(self, search_term, context_size=5, record=False):
+        """مواضع الكلمة وسياقاتها في النص المحمل من الجداول المحسوبة عند التحميل"""
+        search = self.kwic_analyzer.search_kwic if record else self.kwic_analyzer.find
+        return search(self.text, search_term, context_size, spans=self.spans,
+                      words=self.split_words, offsets=self.word_offsets)
+    
     def segment_sentences(self):
         """تقسيم النص إلى جمل"""
         self.sentences = [s.strip() for s in re.split(r'[.!?؟]+', self.text) if s.strip()]
@@ -284,7 +365,7 @@ class TextAnalyzer:
         unique_words = len(set(self.words))
         total_words = len(self.words)
         
-        return {
+        stats = {
             'عدد الأحرف': len(self.text),
             'عدد الأحرف (بدون مسافات)': len(self.text.replace(' ', '')),
             'عدد الكلمات الكلي': total_words,
@@ -294,6 +375,15 @@ class TextAnalyzer:
             'عدد الجمل': len(self.sentences),
             'متوسط الكلمات بالجملة': round(total_words / len(self.sentences), 2) if self.sentences else 0
         }
+        
+        # إحصائيات عربية من الملف المحسوب مرة واحدة عند تحميل النص
+        if self.profile:
+            stats['عدد الحروف العربية'] = self.profile['arabic_chars']
+            stats['عدد الكلمات العربية'] = self.profile['arabic_words']
+            stats['كثافة التشكيل'] = self.profile['diacritic_density']
+            stats['نسبة النص العربي'] = round(self.profile['script_mix']['arabic'] * 100, 2)
+        
+        return stats
     
     def get_collocations(self, window_size=5, min_freq=2):
         """تحليل التلازمات اللفظية"""
@@ -1180,7 +1270,7 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "تحذير", "يجب تحليل النص أولاً")
             return
         
-        results = self.analyzer.kwic_analyzer.search_kwic(self.analyzer.text, search_term, 5)
+        results = self.analyzer.find_term(search_term, 5, record=True)
         
         kwic_text = "==============================\n"
         kwic_text += f"الكلمة في السياق: {search_term}\n"
@@ -1207,12 +1297,9 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "تحذير", "يجب تحليل النص أولاً")
             return
         
-        words = self.analyzer.text.split()
-        positions = []
-        
-        for i, word in enumerate(words):
-            if search_term.lower() in word.lower():
-                positions.append(i)
+        # البحث نفسه الذي يعرضه KWIC، فتتطابق المواضع والسياقات
+        matches = self.analyzer.find_term(search_term, 3)
+        positions = [match['position'] for match in matches]
         
         if not positions:
             QMessageBox.warning(self, "تحذير", f"لم يتم العثور على كلمة '{search_term}' في النص")
@@ -1224,15 +1311,13 @@ class MainWindow(QMainWindow):
         
         plot_text += f"المواضع: {', '.join(map(str, positions))}\n"
         plot_text += f"عدد التكرارات: {len(positions)}\n"
-        plot_text += f"نسبة التكرار: {len(positions)/len(words)*100:.2f}%\n"
+        plot_text += f"نسبة التكرار: {len(positions)/len(self.analyzer.split_words)*100:.2f}%\n"
         
         plot_text += "\nالمواضع في النص:\n"
         plot_text += "------------------------------\n"
-        for pos in positions[:10]:  # أول 10 مواضع
-            context_start = max(0, pos - 3)
-            context_end = min(len(words), pos + 4)
-            context = ' '.join(words[context_start:context_end])
-            plot_text += f"الموضع {pos}: ...{context}...\n"
+        for match in matches[:10]:  # أول 10 مواضع
+            context = f"{match['left']} {match['keyword']} {match['right']}".strip()
+            plot_text += f"الموضع {match['position']}: ...{context}...\n"
         
         if len(positions) > 10:
             plot_text += f"... و {len(positions) - 10} موضع آخر\n"
@@ -1950,6 +2035,13 @@ def main():
     font = QFont("Segoe UI", 10)
     app.setFont(font)
     
+    # تطبيق الإعدادات المحفوظة (نمط المعالجة وما يتبعه) على المحرك
+    try:
+        from arabic_processor import apply_processing_mode
+        apply_processing_mode()
+    except ImportError:
+        pass
+    
     window = MainWindow()
     window.show()
     
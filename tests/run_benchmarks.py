@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+قياسات الأداء للمعالج اللغوي العربي
+Performance Benchmarks for Arabic Linguistic Processor
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# إضافة مسار المشروع
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+# عينة نصية متنوعة المفردات لاختبارات الأداء
+SAMPLE_TEXT = (
+    "اللُّغة العَرَبِيَّة جَمِيلَةٌ وَمُفِيدَةٌ والكتابة بها فنٌّ عريق "
+    "وقد كتب العلماء في النحو والصرف والبلاغة كتباً كثيرة "
+    "ومنها الكتاب لسيبويه والخصائص لابن جني ودلائل الإعجاز للجرجاني "
+    "والمدرسة البصرية والمدرسة الكوفية اختلفتا في مسائل عديدة"
+)
+
+
+def build_large_sample(repeat=2000):
+    """بناء عينة كبيرة بتكرار النص مع لواحق مختلفة لزيادة عدد الصيغ"""
+    suffixes = ['', 'ها', 'هم', 'نا', 'كم']
+    parts = []
+    for i in range(repeat):
+        suffix = suffixes[i % len(suffixes)]
+        parts.append(' '.join(w + suffix for w in SAMPLE_TEXT.split()))
+    return ' '.join(parts)
+
+
+def benchmark_stemming():
+    """قياس تسريع استخراج الجذوع لكل صيغة مميزة مقارنة بكل كلمة"""
+    print("="*60)
+    print("قياس استخراج الجذوع الخفيف")
+    print("="*60)
+
+    from arabic_processor import ArabicProcessor
+
+    processor = ArabicProcessor()
+    text = build_large_sample()
+    words = [processor.normalize_text(w) for w in processor.extract_arabic_words(text)]
+
+    # الطريقة السابقة: إعادة التطبيع والاستخراج لكل كلمة
+    start_time = time.time()
+    per_token = [processor.remove_suffixes(processor.remove_prefixes(processor.normalize_text(w)))
+                 for w in words]
+    per_token_time = time.time() - start_time
+
+    # الطريقة الحالية: جدول الجذوع لكل صيغة مميزة
+    start_time = time.time()
+    per_type = [processor._stem_normalized(w) for w in words]
+    per_type_time = time.time() - start_time
+
+    print(f"   عدد الكلمات: {len(words)} | الصيغ المميزة: {len(set(words))}")
+    print(f"   لكل كلمة: {per_token_time:.3f} ثانية")
+    print(f"   لكل صيغة: {per_type_time:.3f} ثانية")
+    print(f"   التسريع: {per_token_time / max(per_type_time, 1e-9):.1f}x")
+    print(f"   تطابق النتائج: {'نعم' if per_token == per_type else 'لا'}")
+
+    return per_token == per_type
+
+
+def benchmark_khalil():
+    """قياس سرعة استخراج الجذور بمحلل الخليل لكل صيغة مميزة"""
+    print("="*60)
+    print("قياس استخراج الجذور بمحلل الخليل")
+    print("="*60)
+
+    from arabic_processor import ArabicProcessor, get_khalil_analyzer
+
+    start_time = time.time()
+    analyzer = get_khalil_analyzer()
+    load_time = time.time() - start_time
+    if analyzer is None:
+        print("   ❌ تعذر تحميل محلل الخليل")
+        return False
+
+    processor = ArabicProcessor()
+    words = [processor.normalize_text(w) for w in processor.extract_arabic_words(build_large_sample())]
+    types = list(dict.fromkeys(words))
+
+    start_time = time.time()
+    roots = analyzer.extract_roots(types)
+    types_time = time.time() - start_time
+
+    # الاستدعاء الثاني يقرأ من جدول الجذور المشترك
+    start_time = time.time()
+    stems = processor._khalil_stem(words)
+    tokens_time = time.time() - start_time
+
+    print(f"   تحميل المحلل: {load_time:.3f} ثانية")
+    print(f"   الصيغ المميزة: {len(types)} في {types_time:.3f} ثانية "
+          f"({len(types) / max(types_time, 1e-9):.0f} صيغة/ثانية)")
+    print(f"   الكلمات: {len(words)} في {tokens_time:.3f} ثانية")
+    print(f"   صيغ لها جذر: {sum(1 for r in roots.values() if r)}/{len(types)}")
+
+    return len(stems) == len(words)
+
+
+def benchmark_cache_lru(entries=100000):
+    """قياس زمن set/get في التخزين المؤقت عند الامتلاء بـ 100 ألف عنصر"""
+    print("="*60)
+    print(f"قياس إزالة LRU في AdvancedCache ({entries} عنصر)")
+    print("="*60)
+
+    import tempfile
+    import shutil
+    from utils.performance_optimizer import AdvancedCache
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        cache = AdvancedCache(temp_dir, max_size=entries, ttl=3600)
+        # قياس الذاكرة فقط: تعطيل الكتابة على القرص
+        cache._save_to_disk = lambda *args: None
+
+        start_time = time.time()
+        for i in range(entries):
+            cache.set(f"key_{i}", i)
+        fill_time = time.time() - start_time
+
+        # كل إدخال جديد بعد الامتلاء يتطلب إزالة
+        start_time = time.time()
+        for i in range(entries, entries * 2):
+            cache.set(f"key_{i}", i)
+        evict_time = time.time() - start_time
+
+        start_time = time.time()
+        for i in range(entries, entries * 2):
+            cache.get(f"key_{i}")
+        get_time = time.time() - start_time
+
+        print(f"   ملء: {fill_time / entries * 1e6:.2f} ميكروثانية/عملية")
+        print(f"   إدخال مع إزالة: {evict_time / entries * 1e6:.2f} ميكروثانية/عملية")
+        print(f"   قراءة: {get_time / entries * 1e6:.2f} ميكروثانية/عملية")
+        print(f"   عمليات الإزالة: {cache.stats['evictions']}")
+
+        return cache.stats['evictions'] == entries
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def benchmark_cache_concurrency(total_ops=200000, keys=5000):
+    """قياس إنتاجية التخزين المؤقت من 1 و4 و16 خيطاً بجزء واحد و16 جزءاً"""
+    print("="*60)
+    print(f"قياس التزامن في AdvancedCache ({total_ops} عملية، 80% قراءة)")
+    print("="*60)
+
+    import tempfile
+    import shutil
+    from concurrent.futures import ThreadPoolExecutor
+    from utils.performance_optimizer import AdvancedCache
+
+    def worker(cache, thread_id, ops):
+        for i in range(ops):
+            key = f"key_{(thread_id * 7919 + i * 31) % keys}"
+            if i % 5 == 0:
+                cache.set(key, [key] * 10)
+            else:
+                cache.get(key)
+
+    ok = True
+    for shards in (1, 16):
+        for threads in (1, 4, 16):
+            temp_dir = tempfile.mkdtemp()
+            try:
+                # ربع المفاتيح فقط في الذاكرة: بقية القراءات من القرص خارج الأقفال
+                cache = AdvancedCache(temp_dir, max_size=keys // 4, ttl=3600, shards=shards)
+                ops = total_ops // threads
+
+                start_time = time.time()
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+                    for future in [pool.submit(worker, cache, t, ops) for t in range(threads)]:
+                        future.result()
+                elapsed = time.time() - start_time
+                cache.close()
+
+                stats = cache.stats
+                ok = ok and stats['hits'] + stats['misses'] == ops * threads * 4 // 5
+                print(f"   أجزاء: {shards:2d} | خيوط: {threads:2d} | "
+                      f"{ops * threads / elapsed:,.0f} عملية/ثانية")
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return ok
+
+
+def benchmark_batch_modes(texts=16, repeat=400):
+    """قياس تقسيم مجموعة نصوص تسلسلياً وفي الخيوط وفي العمليات"""
+    print("="*60)
+    print("قياس أنماط المعالجة المتوازية (tokenize_batch)")
+    print("="*60)
+
+    import os
+    import logging
+    from arabic_processor import ArabicProcessor
+
+    logging.disable(logging.INFO)
+    processor = ArabicProcessor()
+    base = build_large_sample(repeat)
+    batch = [f"{base} نص{i}" for i in range(texts)]
+
+    start_time = time.time()
+    serial = [processor._tokenize_words(text, True, True) for text in batch]
+    timings = {'serial': time.time() - start_time}
+
+    # التشغيل الأول للعمليات يتضمن إنشاء العمال وتهيئتهم
+    ok = True
+    for label, mode in [('threads', 'accurate'), ('processes (cold)', 'fast'), ('processes', 'fast')]:
+        start_time = time.time()
+        ok = ok and processor.tokenize_batch(batch, True, True, mode=mode) == serial
+        timings[label] = time.time() - start_time
+
+    print(f"   المعالجات: {os.cpu_count()} | النصوص: {texts}")
+    for label, seconds in timings.items():
+        print(f"   {label}: {seconds:.3f} ثانية ({timings['serial'] / max(seconds, 1e-9):.2f}x)")
+    print(f"   تطابق النتائج: {'نعم' if ok else 'لا'}")
+
+    return ok
+
+
+STARTUP_PROBE = """
+import os, sys, time, threading
+sys.path.insert(0, {root!r})
+fds = lambda: len(os.listdir('/proc/self/fd')) if os.path.isdir('/proc/self/fd') else -1
+start_fds = fds()
+start_time = time.perf_counter()
+from utils.performance_optimizer import performance_optimizer
+print(time.perf_counter() - start_time, fds() - start_fds, threading.active_count())
+performance_optimizer.batch_process(['x'], len)
+print(0, fds() - start_fds, threading.active_count())
+"""
+
+
+def benchmark_startup(runs=5):
+    """قياس زمن استيراد محسن الأداء والموارد المحجوزة قبل أول معالجة متوازية وبعدها"""
+    print("="*60)
+    print("قياس تكلفة استيراد محسن الأداء")
+    print("="*60)
+
+    import subprocess
+    import tempfile
+
+    probe = STARTUP_PROBE.format(root=str(project_root))
+    samples = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # مجلد عمل مؤقت حتى لا ينشئ main_cache ملفاته داخل المشروع
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, '-c', probe], cwd=temp_dir,
+                                    capture_output=True, text=True, check=True).stdout
+            samples.append([line.split() for line in output.splitlines()])
+
+    import_times = sorted(float(sample[0][0]) for sample in samples)
+    idle, used = samples[-1]
+    print(f"   زمن الاستيراد (الوسيط): {import_times[len(import_times) // 2] * 1000:.1f} مللي ثانية")
+    print(f"   بعد الاستيراد: {idle[1]} واصف ملف | {idle[2]} خيط")
+    print(f"   بعد أول معالجة متوازية: {used[1]} واصف ملف | {used[2]} خيط")
+
+    return int(used[2]) > int(idle[2])
+
+
+MODES_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {tests!r})
+from run_benchmarks import build_large_sample
+from arabic_processor import (
+    ArabicProcessor, apply_processing_mode, get_khalil_analyzer, get_setting, main_cache
+)
+
+apply_processing_mode({mode!r})
+analyzer = get_khalil_analyzer()
+processor = ArabicProcessor()
+base = build_large_sample({repeat})
+texts = [f"{{base}} نص{{i}}" for i in range({texts})]
+
+# جذور الخليل بدرجة تقليم النمط، قبل التقسيم وبجداول فارغة
+types = list(dict.fromkeys(processor._tokenize_words(base, True, False)))
+analyzer.set_max_candidates(get_setting('arabic_processing', 'khalil_max_candidates', 3))
+start_time = time.perf_counter()
+roots = analyzer.extract_roots(types)
+khalil_seconds = time.perf_counter() - start_time
+analyzer._root_cache.clear()
+analyzer._plausibility_cache.clear()
+
+start_time = time.perf_counter()
+stems = processor.tokenize_batch(texts, True, True)
+seconds = time.perf_counter() - start_time
+
+print("RESULT " + json.dumps({{
+    'seconds': seconds, 'stems': stems, 'khalil_seconds': khalil_seconds, 'roots': roots,
+    'stemming': get_setting('arabic_processing', 'stemming_algorithm'),
+    'cache': main_cache.strategy,
+}}, ensure_ascii=False))
+"""
+
+
+def benchmark_processing_modes(texts=8, repeat=300):
+    """
+    قياس الإنتاجية والجودة لكل نمط معالجة على المدونة نفسها
+    
+    كل نمط يشغل في عملية جديدة ومجلد عمل مؤقت (تخزين مؤقت بارد). الجودة نسبة
+    الكلمات التي تطابق نتيجة نمط accurate، ونسبة جذور الخليل المطابقة لها عند
+    درجة تقليم النمط.
+    """
+    print("="*60)
+    print("قياس أنماط المعالجة (fast / balanced / accurate)")
+    print("="*60)
+
+    import json
+    import subprocess
+    import tempfile
+
+    results = {}
+    for mode in ('fast', 'balanced', 'accurate'):
+        probe = MODES_PROBE.format(root=str(project_root), tests=str(Path(__file__).parent),
+                                   mode=mode, repeat=repeat, texts=texts)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = subprocess.run([sys.executable, '-c', probe], cwd=temp_dir,
+                                    capture_output=True, text=True, check=True).stdout
+        line = next(line for line in output.splitlines() if line.startswith("RESULT "))
+        results[mode] = json.loads(line[len("RESULT "):])
+
+    def agreement(values, reference):
+        return sum(a == b for a, b in zip(values, reference)) / max(len(reference), 1)
+
+    reference = results['accurate']
+    reference_stems = [word for words in reference['stems'] for word in words]
+    reference_roots = list(reference['roots'].values())
+
+    print(f"   {'النمط':<10} {'الجذوع':<7} {'التخزين':<12} {'كلمة/ثانية':>11} {'مطابقة':>7} "
+          f"{'صيغة/ثانية (الخليل)':>20} {'مطابقة الجذور':>13}")
+    for mode, result in results.items():
+        stems = [word for words in result['stems'] for word in words]
+        roots = list(result['roots'].values())
+        print(f"   {mode:<10} {result['stemming']:<7} {result['cache']:<12} "
+              f"{len(stems) / result['seconds']:>11.0f} "
+              f"{agreement(stems, reference_stems):>7.1%} "
+              f"{len(roots) / result['khalil_seconds']:>20.0f} "
+              f"{agreement(roots, reference_roots):>13.1%}")
+
+    return all(len(result['stems']) == texts for result in results.values())
+
+
+BENCHMARKS = {
+    'stemming': benchmark_stemming,
+    'khalil': benchmark_khalil,
+    'cache_lru': benchmark_cache_lru,
+    'cache_concurrency': benchmark_cache_concurrency,
+    'startup': benchmark_startup,
+    'batch_modes': benchmark_batch_modes,
+    'processing_modes': benchmark_processing_modes,
+}
+
+
+def main():
+    """الدالة الرئيسية لتشغيل القياسات"""
+    parser = argparse.ArgumentParser(description='قياسات الأداء للمعالج اللغوي العربي')
+    parser.add_argument('names', nargs='*',
+                        help=f"أسماء القياسات المطلوبة: {', '.join(BENCHMARKS)} (الافتراضي: الكل)")
+
+    args = parser.parse_args()
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"قياسات غير معروفة: {', '.join(unknown)}")
+
+    results = {name: BENCHMARKS[name]() for name in names}
+
+    print("\n" + "="*60)
+    for name, result in results.items():
+        status = "✅ نجح" if result else "❌ فشل"
+        print(f"   {name}: {status}")
+
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
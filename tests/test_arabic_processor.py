@@ -19,12 +19,27 @@ sys.path.insert(0, str(project_root))
 try:
     from arabic_processor import ArabicProcessor
     from utils.advanced_logger import AdvancedLogger, ErrorHandler
-    from utils.performance_optimizer import AdvancedCache, PerformanceOptimizer
+    from utils.performance_optimizer import (
+        AdvancedCache, PerformanceOptimizer, WorkerTask, ChunkSizer, MemoryMonitor, cached,
+        MISSING, current_rss, arabic_settings_fingerprint
+    )
+    from utils.cache_backends import PickleDirBackend, encode_entry, decode_entry
+    from utils.jobs import Job, JobCancelled, CancellationToken
 except ImportError as e:
     print(f"خطأ في استيراد الوحدات: {e}")
     sys.exit(1)
 
 
+def _write_in_child_process(cache, key, value):
+    """كتابة قيمة من عملية متفرعة دون استدعاء flush صراحة"""
+    cache.set(key, value)
+
+
+def _double_all(items):
+    """مضاعفة دفعة من الأعداد (دالة دفعات AsyncBatcher)"""
+    return [item * 2 for item in items]
+
+
 class TestArabicProcessor(unittest.TestCase):
     """اختبارات شاملة للمعالج العربي"""
     
@@ -146,6 +161,20 @@ class TestArabicProcessor(unittest.TestCase):
                 result = self.processor.extract_arabic_words(input_text)
                 self.assertEqual(result, expected)
     
+    def test_extract_arabic_spans(self):
+        """اختبار استخراج الكلمات مع مواضعها في النص الأصلي"""
+        text = "قال: اللُّغة العَرَبِيَّة 123 جميلة!"
+        spans = self.processor.extract_arabic_words(text, with_offsets=True)
+
+        self.assertEqual(spans.tokens, self.processor.extract_arabic_words(text))
+        self.assertEqual(spans.starts.typecode, 'I')
+        for token, start, end in spans:
+            self.assertEqual(self.processor.remove_tashkeel(text[start:end]), token)
+
+        left, right = spans.context(text, 2, 1)
+        self.assertEqual(left, "اللُّغة")
+        self.assertEqual(right, "123 جميلة")
+
     def test_remove_stop_words(self):
         """اختبار إزالة كلمات الوقف"""
         test_cases = [
@@ -196,6 +225,192 @@ class TestArabicProcessor(unittest.TestCase):
         result4 = self.processor.tokenize_advanced(text, remove_stop=True, stem=True)
         self.assertIsInstance(result4, list)
     
+    def test_tokenize_stemming_per_type(self):
+        """اختبار تطابق الجذوع المحفوظة مع الاستخراج لكل كلمة"""
+        text = " ".join(["الكتاب والمدرسة كتابهم"] * 50)
+        words = self.processor.tokenize_advanced(text, remove_stop=False, stem=True)
+
+        expected = [self.processor.light_stem(w) for w in self.processor.extract_arabic_words(text)]
+        self.assertEqual(words, expected)
+
+        # كل صيغة مميزة تستخرج مرة واحدة فقط
+        stats = self.processor.get_performance_stats()['stem_cache']
+        self.assertLessEqual(stats['size'], 3)
+        self.assertGreater(stats['hits'], 0)
+
+    def test_khalil_stemming(self):
+        """اختبار استخراج الجذور بمحلل الخليل"""
+        import arabic_processor
+        settings = arabic_processor.settings_manager
+        previous = settings.get_setting('arabic_processing', 'stemming_algorithm')
+        settings.set_setting('arabic_processing', 'stemming_algorithm', 'khalil')
+        try:
+            words = self.processor._tokenize_words("والكتاب يكتبون في المدرسة والكتاب", False, True)
+        finally:
+            settings.set_setting('arabic_processing', 'stemming_algorithm', previous)
+
+        self.assertEqual(words[0], 'كتب')
+        self.assertEqual(words[1], 'كتب')
+        self.assertEqual(words[3], 'درس')
+        self.assertEqual(words[4], words[0])
+
+    def test_processing_modes(self):
+        """اختبار تطبيق ملفات أنماط المعالجة على الإعدادات والمحرك"""
+        import logging
+        import arabic_processor
+        settings = arabic_processor.settings_manager
+        categories = ('arabic_processing', 'performance', 'logging')
+        previous = {category: dict(settings.get_category(category)) for category in categories}
+        try:
+            arabic_processor.apply_processing_mode('fast')
+            self.assertEqual(arabic_processor.main_cache.strategy, 'memory_only')
+            self.assertEqual(logging.getLogger("arabic_processor").level, logging.WARNING)
+            self.assertEqual(settings.get_setting('arabic_processing', 'khalil_max_candidates'), 1)
+
+            arabic_processor.apply_processing_mode('accurate')
+            self.assertEqual(arabic_processor.main_cache.strategy, 'hybrid')
+            self.assertFalse(self.processor._should_parallelize("كلمة " * 100000))
+            words = self.processor.tokenize_advanced("والكتاب يكتبون في المدرسة", False, True)
+            self.assertEqual(words[0], 'كتب')
+            analyzer = arabic_processor.get_khalil_analyzer()
+            self.assertEqual(analyzer.max_candidates, 0)
+
+            with self.assertRaises(ValueError):
+                arabic_processor.apply_processing_mode('unknown')
+
+            # إعدادات محفوظة من النافذة: تدمج في فئاتها وتطبق دون إعادة كتابة ملف النمط
+            shards = settings.get_setting('performance', 'cache_shards')
+            profile = arabic_processor.apply_processing_mode(settings={
+                'performance': {'cache_strategy': 'memory_only'},
+                'arabic_processing': {'khalil_max_candidates': 2},
+            })
+            self.assertEqual(profile, {})
+            self.assertEqual(arabic_processor.main_cache.strategy, 'memory_only')
+            self.assertEqual(settings.get_setting('performance', 'cache_shards'), shards)
+            self.assertEqual(settings.get_setting('arabic_processing', 'stemming_algorithm'), 'khalil')
+            self.assertEqual(analyzer.max_candidates, 2)
+        finally:
+            for category, values in previous.items():
+                settings.set_category(category, values)
+            arabic_processor.apply_processing_mode()
+
+    def test_cache_follows_settings(self):
+        """اختبار أن نتائج التطبيع المخزنة تتبع تغيير الإعدادات"""
+        import arabic_processor
+        settings = arabic_processor.settings_manager
+        previous = settings.get_setting('arabic_processing', 'normalize_taa')
+        try:
+            settings.set_setting('arabic_processing', 'normalize_taa', False)
+            fingerprint = arabic_settings_fingerprint()
+            self.assertEqual(arabic_settings_fingerprint(), fingerprint)
+            self.assertEqual(self.processor.normalize_text("مدرسة"), "مدرسة")
+            settings.set_setting('arabic_processing', 'normalize_taa', True)
+            self.assertNotEqual(arabic_settings_fingerprint(), fingerprint)
+            self.assertEqual(self.processor.normalize_text("مدرسة"), "مدرسه")
+        finally:
+            settings.set_setting('arabic_processing', 'normalize_taa', previous)
+
+    def test_cache_warmup(self):
+        """اختبار تهيئة التخزين الدائم من مدونة وتقرير التغطية"""
+        from utils.cache_warmup import warm_up_cache
+        
+        corpus = os.path.join(tempfile.mkdtemp(), "corpus.txt")
+        with open(corpus, 'w', encoding='utf-8') as f:
+            f.write("الكتاب الكتاب الكتاب المدرسة\nالمدرسة قلمٌ وَرقة\n")
+        
+        report = warm_up_cache([corpus], top_n=2, processor=self.processor)
+        
+        self.assertEqual(report['corpus_tokens'], 7)
+        self.assertEqual(report['warmed_types'], 2)
+        self.assertAlmostEqual(report['token_coverage'], 5 / 7)
+        self.assertEqual(report['entries_written'] + report['already_cached'], 2)
+        
+        normalize = type(self.processor).normalize_text
+        self.assertTrue(normalize.cache.contains(normalize.cache_key(self.processor, "الكتاب")))
+        
+        report = warm_up_cache([corpus], top_n=2, processor=self.processor)
+        self.assertEqual(report['entries_written'], 0)
+        self.assertEqual(report['already_cached'], 2)
+
+    def test_parallel_tokenize_matches_serial(self):
+        """اختبار تطابق التقسيم المتوازي مع التسلسلي"""
+        text = "اللُّغة العَرَبِيَّة جَمِيلَةٌ\nوالكتابة بها فنٌّ،  عريق. " * 200
+
+        for remove_stop, stem in [(True, True), (False, False), (True, False)]:
+            with self.subTest(remove_stop=remove_stop, stem=stem):
+                serial = self.processor._tokenize_words(text, remove_stop, stem)
+                parallel = self.processor._tokenize_parallel(text, remove_stop, stem)
+                self.assertEqual(parallel, serial)
+
+    def test_tokenize_batch_modes(self):
+        """اختبار تطابق تقسيم مجموعة نصوص في الخيوط والعمليات مع المسار التسلسلي"""
+        texts = ["اللُّغة العَرَبِيَّة جَمِيلَةٌ", "والكتابة بها فنٌّ عريق", "كتب العلماء في النحو"] * 4
+        serial = [self.processor._tokenize_words(text, True, True) for text in texts]
+
+        for mode in ('fast', 'balanced', 'accurate'):
+            with self.subTest(mode=mode):
+                self.assertEqual(self.processor.tokenize_batch(texts, True, True, mode=mode), serial)
+
+        streamed = self.processor.tokenize_stream(iter(texts), True, True, mode='fast', ordered=False)
+        results = sorted((index, words) for index, words, error in streamed)
+        self.assertEqual([words for _, words in results], serial)
+
+    def test_atokenize(self):
+        """اختبار دمج طلبات التقسيم غير المتزامنة في دفعات بنتائج المسار التسلسلي"""
+        import asyncio
+        import uuid
+        import arabic_processor
+
+        # نصوص جديدة في كل تشغيل حتى لا تأتي نتائجها من التخزين الدائم لتشغيل سابق
+        run = uuid.uuid4().hex
+        texts = [f"كتب الطالب الدرس رقم {i} {run}" for i in range(20)]
+
+        async def tokenize_all():
+            return await asyncio.gather(*(self.processor.atokenize(text, True, True) for text in texts))
+
+        results = asyncio.run(tokenize_all())
+        self.assertEqual(results, [self.processor._tokenize_words(text, True, True) for text in texts])
+
+        batcher = arabic_processor._tokenize_batcher(True, True)
+        self.assertLess(batcher.stats['batches'], batcher.stats['requests'])
+
+        # النتائج في تخزين tokenize_advanced، فلا تعاد معالجتها
+        requests = batcher.stats['requests']
+        self.assertEqual(asyncio.run(tokenize_all()), results)
+        self.assertEqual(batcher.stats['requests'], requests)
+        self.assertEqual(self.processor.tokenize_advanced(texts[0], True, True), results[0])
+
+        # المعاملات الضمنية (None) تعطي مفتاح الإعدادات نفسه
+        tokenize = ArabicProcessor.tokenize_advanced
+        remove_stop = arabic_processor.get_setting('arabic_processing', 'remove_stop_words', True)
+        stem = arabic_processor.get_setting('arabic_processing', 'enable_stemming', True)
+        self.assertEqual(tokenize.cache_key(self.processor, texts[0]),
+                         tokenize.cache_key(self.processor, texts[0], remove_stop, stem))
+
+    def test_async_batcher_aclose(self):
+        """اختبار إيقاف موزع الدفعات وانتظار الدفعات الجارية"""
+        import asyncio
+        from utils.async_api import AsyncBatcher
+
+        batcher = AsyncBatcher(WorkerTask(_double_all), mode='accurate', optimizer=PerformanceOptimizer())
+
+        async def run():
+            self.assertEqual(await asyncio.gather(*(batcher.submit(i) for i in range(5))),
+                             [0, 2, 4, 6, 8])
+            dispatcher = batcher._state.dispatcher
+            await batcher.aclose()
+            self.assertTrue(dispatcher.cancelled())
+            self.assertIsNone(batcher._state)
+            # الطلب التالي يعيد تشغيل الموزع
+            self.assertEqual(await batcher.submit(4), 8)
+            await batcher.aclose()
+
+        asyncio.run(run())
+
+    def test_parallel_threshold(self):
+        """اختبار بقاء النصوص القصيرة على المسار التسلسلي"""
+        self.assertFalse(self.processor._should_parallelize("اللغة العربية جميلة"))
+
     def test_is_arabic(self):
         """اختبار التحقق من النص العربي"""
         test_cases = [
@@ -227,6 +442,25 @@ class TestArabicProcessor(unittest.TestCase):
                 result = self.processor.count_arabic_chars(input_text)
                 self.assertEqual(result, expected)
     
+    def test_profile(self):
+        """اختبار الملف الإحصائي للنص في مسح واحد"""
+        text = "اللُّغة العَرَبِيَّة جميلة. Arabic is 100% beautiful! أليس كذلك؟ نعم"
+        profile = self.processor.profile(text)
+
+        self.assertEqual(profile['arabic_chars'], self.processor.count_arabic_chars(text))
+        self.assertEqual(profile['is_arabic'], self.processor.is_arabic(text))
+        self.assertEqual(profile['arabic_words'], 6)
+        self.assertEqual(profile['diacritics'], 7)
+        self.assertEqual(profile['latin_words'], 3)
+        self.assertEqual(profile['numbers'], 1)
+        self.assertEqual(profile['sentences'], 4)
+        self.assertEqual(sum(profile['word_length_histogram'].values()), profile['arabic_words'])
+        self.assertAlmostEqual(sum(profile['script_mix'].values()), 1.0, places=2)
+
+        empty = self.processor.profile("")
+        self.assertEqual(empty['arabic_words'], 0)
+        self.assertFalse(empty['is_arabic'])
+
     def test_get_word_info(self):
         """اختبار معلومات الكلمة"""
         word = "الكتاب"
@@ -369,6 +603,7 @@ class TestAdvancedCache(unittest.TestCase):
     def tearDown(self):
         """تنظيف البيئة"""
         import shutil
+        self.cache.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
     def test_cache_initialization(self):
@@ -413,6 +648,20 @@ class TestAdvancedCache(unittest.TestCase):
         # التحقق من أن بعض العناصر تم إزالتها
         self.assertLessEqual(len(self.cache.memory_cache), 10)
     
+    def test_cache_lru_order(self):
+        """اختبار إزالة العنصر الأقل استخداماً مؤخراً"""
+        for i in range(10):
+            self.cache.set(f"key_{i}", f"data_{i}")
+        
+        # استخدام أقدم عنصر يجعله الأحدث
+        self.cache.get("key_0")
+        self.cache.set("key_10", "data_10")
+        
+        self.assertIn("key_0", self.cache.memory_cache)
+        self.assertNotIn("key_1", self.cache.memory_cache)
+        self.assertEqual(len(self.cache.memory_cache), 10)
+        self.assertEqual(self.cache.stats['evictions'], 1)
+    
     def test_cache_stats(self):
         """اختبار إحصائيات التخزين المؤقت"""
         # إجراء بعض العمليات
@@ -430,6 +679,304 @@ class TestAdvancedCache(unittest.TestCase):
         self.assertEqual(stats['hits'], 1)
         self.assertEqual(stats['misses'], 1)
     
+    def test_cache_persistence(self):
+        """اختبار استعادة البيانات من ملف القرص في جلسة جديدة"""
+        self.cache.set("key1", ["data", 1])
+        self.cache.flush()
+        
+        reopened = AdvancedCache(self.temp_dir, max_size=10, ttl=60)
+        self.assertEqual(reopened.get("key1"), ["data", 1])
+        
+        stats = reopened.get_stats()
+        self.assertEqual(stats['disk_files'], 1)
+        self.assertGreater(stats['disk_bytes'], 0)
+        self.assertEqual(stats['disk_reads'], 1)
+    
+    def test_pickle_dir_backend(self):
+        """اختبار طبقة الملفات المستقلة لكل مفتاح"""
+        backend_dir = os.path.join(self.temp_dir, "files")
+        cache = AdvancedCache(self.temp_dir, max_size=10, ttl=60, backend=PickleDirBackend(backend_dir))
+        cache.set("key1", "data1")
+        cache.flush()
+        
+        self.assertEqual(cache.get_stats()['disk_files'], 1)
+        cache.clear_memory()
+        self.assertEqual(cache.get("key1"), "data1")
+    
+    def test_write_behind(self):
+        """اختبار الكتابة المؤجلة: دمج الكتابات المتكررة وقراءة القيم قبل كتابتها"""
+        cache = AdvancedCache(self.temp_dir, max_size=1, ttl=60, flush_interval=60)
+        cache.set("key1", "old")
+        cache.set("key1", "new")
+        cache.set("key2", "data2")  # يزيل key1 من الذاكرة قبل كتابته
+        
+        self.assertEqual(cache.stats['disk_writes'], 0)
+        self.assertEqual(cache.stats['coalesced_writes'], 1)
+        self.assertEqual(cache.get("key1"), "new")
+        
+        cache.close()
+        self.assertEqual(cache.stats['disk_writes'], 2)
+        reopened = AdvancedCache(self.temp_dir, max_size=10, ttl=60)
+        self.assertEqual(reopened.get("key1"), "new")
+        reopened.close()
+    
+    def test_cached_stable_keys(self):
+        """اختبار ثبات المفاتيح بين الكائنات وتغيرها مع بصمة الإعدادات"""
+        class Worker:
+            calls = 0
+            
+            def upper(self, text):
+                Worker.calls += 1
+                return text.upper()
+        
+        state = {'fingerprint': 'a'}
+        Worker.upper = cached(self.cache, fingerprint=lambda: state['fingerprint'])(Worker.upper)
+        
+        self.assertEqual(Worker().upper("abc"), "ABC")
+        self.assertEqual(Worker().upper("abc"), "ABC")
+        self.assertEqual(Worker.calls, 1)
+        
+        state['fingerprint'] = 'b'
+        Worker().upper("abc")
+        self.assertEqual(Worker.calls, 2)
+    
+    def test_byte_budget(self):
+        """اختبار الإزالة حسب ميزانية البايتات والحصص لكل مجموعة"""
+        cache = AdvancedCache(self.temp_dir, max_size=100, ttl=60, max_bytes=4000)
+        cache.set_group_budget("big", 0.5)
+        
+        for i in range(5):
+            cache.set(f"big_{i}", "ك" * 300, group="big")  # نحو 600 بايت لكل عنصر
+        cache.set("small", "نص", group="small")
+        
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['groups']['big']['bytes'], 2000)
+        self.assertEqual(stats['groups']['big']['budget'], 2000)
+        self.assertNotIn("big_0", cache.memory_cache)
+        self.assertIn("big_4", cache.memory_cache)
+        self.assertIn("small", cache.memory_cache)
+        self.assertEqual(stats['memory_bytes'],
+                         stats['groups']['big']['bytes'] + stats['groups']['small']['bytes'])
+        
+        # عنصر أكبر من الميزانية يحفظ على القرص فقط
+        cache.set("huge", "ك" * 5000)
+        self.assertNotIn("huge", cache.memory_cache)
+        self.assertLessEqual(cache.get_stats()['memory_bytes'], 4000)
+        cache.close()
+    
+    def test_byte_budget_across_shards(self):
+        """اختبار فرض ميزانية البايتات على الأجزاء كلها لا على كل جزء"""
+        cache = AdvancedCache(self.temp_dir, max_size=100, ttl=60, max_bytes=4000, shards=8)
+        
+        # أكبر من ثمن الميزانية لكنه يتسع فيها كلها
+        cache.set("large", "ك" * 1000)
+        self.assertIn("large", cache.memory_cache)
+        
+        for i in range(20):
+            cache.set(f"item_{i}", "ك" * 300)
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['memory_bytes'], 4000)
+        self.assertEqual(stats['memory_bytes'], cache.budget.total)
+        self.assertNotIn("large", cache.memory_cache)
+        self.assertIn("item_19", cache.memory_cache)
+        
+        cache.clear_memory()
+        self.assertEqual(cache.budget.total, 0)
+        cache.close()
+    
+    def test_cache_none_values(self):
+        """اختبار تخزين القيمة None وتمييزها عن الغياب بالقيمة MISSING"""
+        self.cache.set("none", None)
+        self.assertIsNone(self.cache.get("none", MISSING))
+        self.assertIs(self.cache.get("absent", MISSING), MISSING)
+        self.assertEqual(self.cache.get("absent", "default"), "default")
+    
+    def test_negative_caching(self):
+        """اختبار تخزين النتائج السلبية لمدة مستقلة"""
+        calls = []
+        
+        def analyze(word):
+            calls.append(word)
+            return None
+        
+        uncached = cached(self.cache)(analyze)
+        uncached("كلمة")
+        uncached("كلمة")
+        self.assertEqual(len(calls), 2)
+        
+        calls.clear()
+        negative = cached(self.cache, ttl=60, negative_ttl=0.2)(analyze)
+        self.assertIsNone(negative("كلمة"))
+        self.assertIsNone(negative("كلمة"))
+        self.assertEqual(len(calls), 1)
+        
+        # انتهاء مدة النتيجة السلبية في الذاكرة وعلى القرص
+        time.sleep(0.3)
+        negative("كلمة")
+        self.assertEqual(len(calls), 2)
+    
+    def test_compressed_entries(self):
+        """اختبار ضغط القيم الكبيرة على القرص حسب حجمها وقراءة القيم القديمة"""
+        import pickle
+        cache = AdvancedCache(self.temp_dir, max_size=10, ttl=60, write_behind=False,
+                              compression=((100000, 'lzma'), (1024, 'zlib')))
+        tokens = ["كلمة", "عربية", "مكررة"] * 2000
+        cache.set("small", "نص")
+        cache.set("tokens", tokens)
+        cache.set("huge", tokens * 10)
+        
+        cache.clear_memory()
+        self.assertEqual(cache.get("tokens"), tokens)
+        self.assertEqual(cache.get("huge"), tokens * 10)
+        self.assertEqual(cache.get("small"), "نص")
+        
+        self.assertEqual(cache.backend.load("small")[0], 0)
+        self.assertEqual(cache.backend.load("tokens")[0], 1)
+        self.assertEqual(cache.backend.load("huge")[0], 2)
+        
+        stats = cache.get_stats()
+        self.assertGreater(stats['compression_ratio'], 10)
+        self.assertGreater(stats['read_mb_per_second'], 0)
+        
+        # قيمة pickle قديمة دون ترويسة
+        legacy = pickle.dumps(tokens, protocol=pickle.HIGHEST_PROTOCOL)
+        self.assertEqual(decode_entry(legacy), legacy)
+        self.assertEqual(decode_entry(encode_entry(legacy, 'zlib')), legacy)
+        cache.close()
+    
+    def test_disk_maintenance(self):
+        """اختبار حذف القيم المنتهية وتطبيق حصة القرص حسب آخر قراءة وضغط الملف"""
+        cache = AdvancedCache(self.temp_dir, max_size=10, ttl=60, write_behind=False,
+                              compression=())
+        for i in range(50):
+            cache.set(f"expired_{i}", "x" * 1000, ttl=0.01)
+        for i in range(10):
+            cache.set(f"key_{i}", "x" * 1000)
+        time.sleep(0.02)
+
+        # القيمة الأولى مقروءة حديثاً فلا تزال قبل غيرها
+        cache.clear_memory()
+        cache.get("key_0")
+        cache.disk_quota_bytes = 5 * 1100
+
+        result = cache.maintain(idle=0)
+        self.assertEqual(result['swept'], 50)
+        self.assertEqual(result['evicted'], 5)
+        self.assertEqual(result['compacted'], 1)
+        self.assertLessEqual(cache.backend.size_bytes(), cache.disk_quota_bytes)
+        self.assertEqual(cache.get("key_0"), "x" * 1000)
+        self.assertIsNone(cache.get("key_1"))
+        self.assertEqual(cache.get("key_9"), "x" * 1000)
+        self.assertEqual(cache.get_stats()['swept_entries'], 50)
+
+        # لا شيء للحذف في الدورة الثانية
+        self.assertEqual(cache.maintain(idle=0), {'swept': 0, 'evicted': 0, 'compacted': 0})
+        cache.close()
+
+    def test_lazy_maintenance(self):
+        """اختبار تأخير خيط الصيانة والاتصال بالقرص حتى أول كتابة، وحذف ملفات الطبقة القديمة"""
+        legacy = Path(self.temp_dir) / "0123456789abcdef.pkl"
+        legacy.write_bytes(b"old")
+        
+        cache = AdvancedCache(self.temp_dir, max_size=10, ttl=60, write_behind=False,
+                              sweep_interval=3600)
+        self.assertIsNone(cache._maintenance)
+        self.assertIsNone(cache.backend.conn)
+        
+        cache.set("key", "value")
+        self.assertTrue(cache._maintenance.is_alive())
+        
+        self.assertEqual(cache.maintain(idle=0)['swept'], 1)
+        self.assertFalse(legacy.exists())
+        cache.close()
+        self.assertFalse(cache._maintenance.is_alive())
+
+    def test_sharded_cache_threads(self):
+        """اختبار الأجزاء المستقلة الأقفال مع عدة خيوط"""
+        cache = AdvancedCache(self.temp_dir, max_size=400, ttl=60, shards=8)
+        
+        def worker(thread_id):
+            for i in range(200):
+                key = f"key_{thread_id}_{i}"
+                cache.set(key, i)
+                self.assertEqual(cache.get(key), i)
+        
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = cache.get_stats()
+        self.assertEqual(stats['shards'], 8)
+        self.assertEqual(stats['hits'], 1600)
+        self.assertLessEqual(stats['memory_items'], 400)
+        # عنصر أزيل قبل قراءته يعاد تحميله من الكتابات المعلقة فيحسب مرتين
+        self.assertGreaterEqual(stats['memory_items'] + stats['evictions'], 1600)
+        
+        # القيم المزالة من الذاكرة تقرأ من القرص
+        self.assertEqual(cache.get("key_0_0"), 0)
+        cache.close()
+    
+    def test_single_flight(self):
+        """اختبار دمج الاستدعاءات المتزامنة للمفتاح نفسه ونقل الخطأ إلى جميعها"""
+        calls = []
+        release = threading.Event()
+        
+        def tokenize(text):
+            calls.append(text)
+            release.wait(5)
+            if text == "خطأ":
+                raise ValueError(text)
+            return text.split()
+        
+        tokenize = cached(self.cache)(tokenize)
+        
+        for text, expected in [("نص عربي", ["نص", "عربي"]), ("خطأ", ValueError)]:
+            calls.clear()
+            release.clear()
+            results = []
+            
+            def worker():
+                try:
+                    results.append(tokenize(text))
+                except ValueError as e:
+                    results.append(type(e))
+            
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            # انتظار بدء الحساب الأول ووصول بقية الخيوط
+            while not calls:
+                time.sleep(0.01)
+            time.sleep(0.1)
+            release.set()
+            for thread in threads:
+                thread.join()
+            
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(results, [expected] * 4)
+        
+        self.assertEqual(self.cache.stats['coalesced'], 6)
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), "يتطلب fork")
+    def test_shared_across_processes(self):
+        """اختبار وصول القيم المحسوبة في عمليات عاملة إلى العملية الرئيسية"""
+        import multiprocessing
+        context = multiprocessing.get_context('fork')
+        
+        workers = [context.Process(target=_write_in_child_process,
+                                   args=(self.cache, f"worker_{i}", [i] * 3)) for i in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+        
+        for i in range(3):
+            self.assertEqual(self.cache.get(f"worker_{i}"), [i] * 3)
+        self.assertEqual(self.cache.stats['disk_reads'], 3)
+    
     def test_cache_clear(self):
         """اختبار مسح التخزين المؤقت"""
         # إضافة بعض البيانات
@@ -469,6 +1016,16 @@ class TestPerformanceOptimizer(unittest.TestCase):
         total_words = sum(len(chunk.split()) for chunk in chunks)
         self.assertEqual(total_words, 10)
     
+    def test_split_text_at_token_boundaries(self):
+        """اختبار التقسيم عند حدود الكلمات دون تعديل النص"""
+        text = "كلمة  أولى\nثانية\tثالثة رابعة خامسة سادسة "
+        chunks = self.optimizer.split_text_at_token_boundaries(text, chunk_size=2)
+
+        self.assertEqual(''.join(chunks), text)
+        self.assertEqual(len(chunks), 4)
+        for chunk in chunks[:-1]:
+            self.assertTrue(chunk[-1].isspace())
+
     def test_process_text_parallel(self):
         """اختبار المعالجة المتوازية للنص"""
         def simple_processor(text):
@@ -502,12 +1059,267 @@ class TestPerformanceOptimizer(unittest.TestCase):
         self.assertIn('total_time_saved', stats)
         self.assertIn('max_workers', stats)
     
+    def test_lazy_pools(self):
+        """اختبار إنشاء المجمعات عند أول استخدام وإعادة تهيئتها عند تغيير عدد العمال"""
+        stats = self.optimizer.get_stats()
+        self.assertFalse(stats['thread_pool_active'])
+        self.assertFalse(stats['process_pool_active'])
+        
+        self.optimizer.batch_process(["كلمة"], len)
+        self.assertTrue(self.optimizer.get_stats()['thread_pool_active'])
+        self.assertIs(self.optimizer.thread_pool, self.optimizer.thread_pool)
+        
+        self.optimizer.resize(3)
+        self.assertEqual(self.optimizer.batch_process(["كلمة", "كلمتان"], len), [4, 6])
+        self.assertEqual(self.optimizer.max_workers, 3)
+        self.assertEqual(self.optimizer.get_stats()['pools_created'], 2)
+        self.assertFalse(self.optimizer.get_stats()['process_pool_active'])
+        
+        self.optimizer.cleanup()
+        self.assertFalse(self.optimizer.get_stats()['thread_pool_active'])
+    
+    def test_executor_selection(self):
+        """اختبار اختيار مجمع العمليات أو الخيوط حسب نمط المعالجة"""
+        task = WorkerTask(str.split, (None, 1))
+        self.assertEqual(task("كلمة أولى ثانية"), ["كلمة", "أولى ثانية"])
+        
+        self.assertEqual(self.optimizer.choose_executor(task, 1, 'fast'), 'process')
+        self.assertEqual(self.optimizer.choose_executor(task, 10, 'accurate'), 'thread')
+        self.assertEqual(self.optimizer.choose_executor(task, 1, 'balanced'), 'thread')
+        self.assertEqual(self.optimizer.choose_executor(task, 2, 'balanced'), 'process')
+        # الدوال المحلية لا تصل إلى العمليات
+        self.assertEqual(self.optimizer.choose_executor(lambda text: text, 10, 'fast'), 'thread')
+        
+        results = self.optimizer.batch_process(["ا ب ج", "د ه"], WorkerTask(str.split), mode='fast')
+        self.assertEqual(results, [["ا", "ب", "ج"], ["د", "ه"]])
+        self.assertEqual(self.optimizer.get_stats()['process_operations'], 1)
+        
+        # مجمع لكل دالة تهيئة، فلا يعيد التناوب بينها إنشاء العمليات
+        default_pool = self.optimizer.process_pool
+        initialized_pool = self.optimizer.get_process_pool(int, ("1",))
+        self.assertIsNot(initialized_pool, default_pool)
+        self.assertIs(self.optimizer.process_pool, default_pool)
+        self.assertIs(self.optimizer.get_process_pool(int, ("1",)), initialized_pool)
+        self.assertEqual(self.optimizer.get_stats()['process_pools'], 2)
+        
+        # الأجزاء تتبع نمط المعالجة المعطى
+        results = self.optimizer.process_chunks_in_processes(["ا ب", "ج"], WorkerTask(str.split),
+                                                             mode='accurate')
+        self.assertEqual(results, [["ا", "ب"], ["ج"]])
+        self.assertEqual(self.optimizer.get_stats()['process_operations'], 1)
+        self.optimizer.cleanup()
+        self.assertFalse(self.optimizer.get_stats()['process_pool_active'])
+    
+    def test_adaptive_chunk_size(self):
+        """اختبار ضبط حجم الأجزاء من السرعة المقاسة مع إبقاء جميع العمال مشغولين"""
+        sizer = ChunkSizer(min_size=10)
+        self.assertEqual(sizer.size_for(100000, 2, 0.05, initial=500), 500)
+        
+        # 10000 كلمة/ثانية: جزء 50 مللي ثانية = 500 كلمة، ثم 2000 بعد تسارع المعالجة
+        sizer.record(1000, 0.1)
+        self.assertEqual(sizer.size_for(100000, 2, 0.05, initial=500), 500)
+        sizer.smoothing = 1.0
+        sizer.record(4000, 0.1)
+        self.assertEqual(sizer.size_for(100000, 2, 0.05, initial=500), 2000)
+        # نص قصير: أربعة أجزاء لكل عامل على الأقل
+        self.assertEqual(sizer.size_for(800, 2, 0.05, initial=500), 100)
+        self.assertEqual(sizer.get_stats()['recent_sizes'], [500, 500, 2000, 100])
+        
+        text = " ".join(["كلمة"] * 2000)
+        result = self.optimizer.process_text_parallel(text, str.split, mode='accurate')
+        self.assertEqual(len(result), 2000)
+        [chunk_stats] = self.optimizer.get_stats()['chunk_sizes'].values()
+        self.assertIsNotNone(chunk_stats['words_per_second'])
+        self.assertLessEqual(chunk_stats['last_size'], 250)
+    
+    def test_imap(self):
+        """اختبار الإرجاع التدريجي المحدود مع الترتيب والتقاط الأخطاء والإلغاء"""
+        def square(x):
+            time.sleep(0.01 * (x % 3))
+            if x == 5:
+                raise ValueError("عنصر غير صالح")
+            return x * x
+        
+        results = list(self.optimizer.imap(square, range(10), mode='accurate', capture_errors=True))
+        self.assertEqual([r.index for r in results], list(range(10)))
+        self.assertEqual(results[4].value, 16)
+        self.assertIsInstance(results[5].error, ValueError)
+        self.assertFalse(results[5].ok)
+        
+        unordered = self.optimizer.imap(square, range(10), mode='accurate', ordered=False,
+                                        capture_errors=True)
+        self.assertEqual(sorted(r.index for r in unordered), list(range(10)))
+        
+        with self.assertRaises(ValueError):
+            list(self.optimizer.imap(square, range(10), mode='accurate'))
+        
+        # مصدر غير محدود: لا يقرأ أكثر من المهام المسموح بها
+        consumed = []
+        def source():
+            for i in range(10 ** 9):
+                consumed.append(i)
+                yield i
+        stream = self.optimizer.imap(abs, source(), mode='accurate', max_in_flight=4)
+        self.assertEqual([next(stream).value for _ in range(5)], [0, 1, 2, 3, 4])
+        self.assertLessEqual(len(consumed), 9)
+        stream.close()
+        
+        cancel = threading.Event()
+        received = 0
+        for _ in self.optimizer.imap(time.sleep, [0.02] * 100, mode='accurate', cancel=cancel):
+            received += 1
+            if received == 3:
+                cancel.set()
+        self.assertEqual(received, 3)
+        self.optimizer.cleanup()
+    
+    def test_memory_pressure(self):
+        """اختبار جمع المهملات الدوري وتحرير الذاكرة وتقليل المهام الجارية عند الضغط"""
+        if current_rss() is None:
+            self.skipTest("قياس الذاكرة غير متاح على هذا النظام")
+        
+        monitor = MemoryMonitor(limit_bytes=10 ** 12, gc_threshold=5)
+        for _ in range(4):
+            monitor.tick(3)
+        self.assertEqual(monitor.get_stats()['gc_runs'], 2)
+        self.assertFalse(monitor.check(force=True))
+        self.assertGreater(monitor.get_stats()['peak_rss'], 0)
+        
+        # حد أصغر من ذاكرة العملية: ضغط دائم
+        released = []
+        monitor = MemoryMonitor(limit_bytes=1, gc_threshold=0)
+        monitor.on_pressure(lambda: released.append(1) or 7)
+        self.optimizer.memory = monitor
+        
+        results = list(self.optimizer.imap(abs, range(-20, 0), mode='accurate', max_in_flight=8))
+        self.assertEqual([r.value for r in results], list(range(20, 0, -1)))
+        stats = self.optimizer.get_stats()['memory']
+        self.assertTrue(stats['under_pressure'])
+        self.assertEqual(stats['pressure_events'], 1)
+        self.assertGreaterEqual(stats['released_items'], 7)
+        self.assertGreater(stats['throttled'], 0)
+        self.assertTrue(released)
+        self.optimizer.cleanup()
+        
+        # ذاكرة ثابتة فوق الحد: تحرير واحد فقط حتى تمر RELEASE_INTERVAL
+        released = []
+        monitor = MemoryMonitor(limit_bytes=1, gc_threshold=0)
+        monitor.on_pressure(lambda: released.append(1) or 1)
+        for _ in range(10):
+            self.assertTrue(monitor.check(force=True))
+        self.assertEqual(len(released), 1)
+        self.assertEqual(monitor.get_stats()['releases'], 1)
+        monitor.RELEASE_INTERVAL = 0
+        monitor.check(force=True)
+        self.assertEqual(len(released), 2)
+        
+        # تقليص التخزين المؤقت يبقي القيم على القرص
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = AdvancedCache(temp_dir, max_size=100)
+            for i in range(10):
+                cache.set(f"key_{i}", i)
+            self.assertEqual(cache.shrink(0.5), 5)
+            self.assertEqual(len(cache.memory_cache), 5)
+            self.assertEqual(cache.get("key_0"), 0)
+            cache.close()
+    
     def test_cleanup(self):
         """اختبار تنظيف الموارد"""
         # يجب ألا يسبب خطأ
         self.optimizer.cleanup()
 
 
+class TestJob(unittest.TestCase):
+    """اختبارات المهام الطويلة: التقدم والإلغاء"""
+    
+    def setUp(self):
+        """إعداد البيئة"""
+        self.optimizer = PerformanceOptimizer(max_workers=2)
+    
+    def tearDown(self):
+        """تنظيف البيئة"""
+        self.optimizer.cleanup()
+    
+    def test_cancellation_token(self):
+        """اختبار الإلغاء التعاوني وتنفيذ دوال الإلغاء مرة واحدة"""
+        token = CancellationToken()
+        calls = []
+        token.on_cancel(lambda: calls.append(1))
+        token.raise_if_cancelled()
+        
+        token.cancel()
+        token.cancel()
+        self.assertTrue(token.is_set())
+        self.assertEqual(calls, [1])
+        with self.assertRaises(JobCancelled):
+            token.raise_if_cancelled()
+        token.on_cancel(lambda: calls.append(2))
+        self.assertEqual(calls, [1, 2])
+    
+    def test_job_progress(self):
+        """اختبار تقرير التقدم بالعناصر والبايتات والوقت المتبقي"""
+        reports = []
+        texts = ["كلمة " * n for n in range(1, 21)]
+        job = Job("اختبار", total_items=len(texts), total_bytes=sum(len(t.encode()) for t in texts),
+                  on_progress=reports.append, min_interval=0)
+        
+        results = list(job.map(str.split, texts, size=lambda t: len(t.encode()),
+                               optimizer=self.optimizer, mode='accurate'))
+        self.assertEqual([len(r.value) for r in results], list(range(1, 21)))
+        
+        progress = job.progress()
+        self.assertEqual(progress.items_done, 20)
+        self.assertEqual(progress.bytes_done, progress.bytes_total)
+        self.assertEqual(progress.fraction, 1.0)
+        self.assertEqual(progress.eta, 0.0)
+        self.assertTrue(reports[-1].finished)
+        self.assertEqual([r.items_done for r in reports[:-1]], list(range(1, 21)))
+    
+    def test_job_cancel(self):
+        """اختبار إلغاء المهمة أثناء المعالجة وإلغاء المهام المعلقة"""
+        job = Job("إلغاء", min_interval=0)
+        received = 0
+        for _ in job.map(time.sleep, [0.02] * 50, optimizer=self.optimizer, mode='accurate'):
+            received += 1
+            if received == 2:
+                job.cancel()
+        self.assertEqual(received, 2)
+        self.assertTrue(job.progress().cancelled)
+        self.assertFalse(job.progress().finished)
+        
+        # مهام مرسلة مباشرة إلى مجمع تلغى مع المهمة إذا لم تبدأ
+        job = Job()
+        pool = self.optimizer.thread_pool
+        blockers = [pool.submit(time.sleep, 0.1) for _ in range(2)]
+        queued = job.track(pool.submit(time.sleep, 0))
+        job.cancel()
+        self.assertTrue(queued.cancelled())
+        for future in blockers:
+            future.result()
+    
+    def test_job_iterate(self):
+        """اختبار التقدم والإلغاء داخل حلقة طويلة"""
+        job = Job(total_items=1000, min_interval=0)
+        self.assertEqual(sum(job.iterate(range(1000), every=100)), sum(range(1000)))
+        self.assertEqual(job.progress().items_done, 1000)
+        
+        # الإلغاء أثناء الحلقة يوقفها عند التحقق التالي
+        job = Job(min_interval=0)
+        seen = []
+        with self.assertRaises(JobCancelled):
+            for i in job.iterate(range(1000), every=10):
+                seen.append(i)
+                if i == 25:
+                    job.cancel()
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(job.progress().items_done, 20)
+        
+        # العد بلا تسجيل تقدم
+        job = Job()
+        list(job.iterate(range(50), advance=False))
+        self.assertEqual(job.progress().items_done, 0)
+
+
 class TestIntegration(unittest.TestCase):
     """اختبارات التكامل الشاملة"""
     
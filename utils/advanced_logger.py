@@ -14,6 +14,30 @@ import traceback
 import functools
 
 
+# مستوى جميع مسجلات AdvancedLogger (يغيره set_log_level)
+_log_level = logging.DEBUG
+_logger_names = set()
+
+
+def set_log_level(level: Any):
+    """
+    تغيير مستوى جميع مسجلات AdvancedLogger الحالية واللاحقة
+    
+    Args:
+        level: اسم المستوى ("INFO")، أو LogLevel، أو رقمه في logging
+    """
+    global _log_level
+    level = getattr(level, 'value', level)
+    if isinstance(level, str):
+        name = level.upper()
+        level = logging.getLevelName(name)
+        if not isinstance(level, int):
+            raise ValueError(f"مستوى تسجيل غير معروف: {name}")
+    _log_level = level
+    for name in _logger_names:
+        logging.getLogger(name).setLevel(level)
+
+
 class AdvancedLogger:
     """نظام تسجيل متقدم مع دعم متعدد المستويات"""
     
@@ -24,7 +48,8 @@ class AdvancedLogger:
         
         # إعداد المسجلات
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(_log_level)
+        _logger_names.add(name)
         
         # منع تكرار المسجلات
         if self.logger.handlers:
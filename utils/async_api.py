@@ -0,0 +1,190 @@
+"""
+واجهة asyncio للمعالجة
+asyncio Front-end for Processing
+
+تنفذ المعالجة في مجمعات محسن الأداء دون حجب حلقة الأحداث، مع دمج الطلبات الصغيرة
+المتزامنة في دفعات، وحد لعدد الدفعات الجارية، وانتظار المرسل عند امتلاء الطابور.
+"""
+
+import asyncio
+from typing import Any, Callable, Optional, Union
+
+
+def _default_optimizer():
+    """المحسن العام (نسخة الوحدة نفسها التي يستخدمها arabic_processor)"""
+    try:
+        from performance_optimizer import performance_optimizer
+    except ImportError:
+        from utils.performance_optimizer import performance_optimizer
+    return performance_optimizer
+
+
+def _default_cache():
+    """التخزين المؤقت العام الذي تقرؤه العمليات العاملة"""
+    try:
+        from performance_optimizer import main_cache
+    except ImportError:
+        from utils.performance_optimizer import main_cache
+    return main_cache
+
+
+class _LoopState:
+    """طابور الطلبات ومهمة التوزيع الخاصان بحلقة أحداث واحدة"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_pending: int, max_concurrency: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.batches: set = set()  # الدفعات الجارية
+
+
+class AsyncBatcher:
+    """
+    دمج الطلبات المتزامنة في دفعات تنفذ في مجمعات محسن الأداء
+
+    كل طلب (submit) ينتظر في طابور محدود؛ يجمع الموزع ما يصل خلال max_delay
+    ثانية (حتى max_batch طلب) ويرسله دفعة واحدة إلى batch_func التي تستقبل
+    قائمة العناصر وتعيد قائمة النتائج بالترتيب نفسه.
+    """
+
+    def __init__(self, batch_func: Callable[[list], list], max_batch: int = 64,
+                 max_delay: float = 0.002, max_pending: int = 1024,
+                 max_concurrency: Optional[int] = None, mode: Any = None,
+                 initializer: Optional[Callable] = None,
+                 initargs: Union[tuple, Callable[[], tuple]] = (), optimizer: Any = None):
+        """
+        Args:
+            batch_func: دالة تعالج قائمة عناصر (WorkerTask أو دالة على مستوى الوحدة
+                لتنفيذها في عمليات منفصلة)
+            max_batch: الحد الأقصى لعدد الطلبات في دفعة
+            max_delay: أطول مدة بالثواني ينتظرها الطلب الأول لتكتمل دفعته
+            max_pending: سعة الطابور؛ عند امتلائه ينتظر المرسل (ضغط عكسي)
+            max_concurrency: الحد الأقصى للدفعات الجارية (الافتراضي: عدد العمال)
+            mode: نمط المعالجة الذي يحدد نوع المجمع (الافتراضي: الإعداد processing_mode)
+            initializer: دالة تهيئة العمليات العاملة
+            initargs: معاملات دالة التهيئة، أو دالة تعيدها عند كل دفعة (مثل لقطة
+                من الإعدادات الحالية)
+            optimizer: محسن الأداء (الافتراضي: المحسن العام)
+        """
+        self.batch_func = batch_func
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.max_concurrency = max_concurrency
+        self.mode = mode
+        self.initializer = initializer
+        self.initargs = initargs
+        self.optimizer = optimizer
+        self._state: Optional[_LoopState] = None
+        self.stats = {'requests': 0, 'batches': 0, 'largest_batch': 0}
+
+    def _loop_state(self) -> _LoopState:
+        """حالة الحلقة الحالية (تنشأ من جديد إذا تغيرت الحلقة)"""
+        loop = asyncio.get_running_loop()
+        state = self._state
+        if state is None or state.loop is not loop:
+            optimizer = self.optimizer or _default_optimizer()
+            state = _LoopState(loop, self.max_pending, self.max_concurrency or optimizer.max_workers)
+            self._state = state
+        if state.dispatcher is None or state.dispatcher.done():
+            state.dispatcher = loop.create_task(self._dispatch(state))
+        return state
+
+    async def submit(self, item: Any) -> Any:
+        """إرسال عنصر وانتظار نتيجته"""
+        state = self._loop_state()
+        future = state.loop.create_future()
+        await state.queue.put((item, future))
+        self.stats['requests'] += 1
+        return await future
+
+    async def _dispatch(self, state: _LoopState):
+        """جمع الطلبات في دفعات وإرسالها مع احترام حد الدفعات الجارية"""
+        batch = []
+        try:
+            while True:
+                batch = [await state.queue.get()]
+                deadline = state.loop.time() + self.max_delay
+                while len(batch) < self.max_batch:
+                    if not state.queue.empty():
+                        batch.append(state.queue.get_nowait())
+                        continue
+                    timeout = deadline - state.loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(state.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await state.semaphore.acquire()
+                task = state.loop.create_task(self._run_batch(batch))
+                batch = []
+                state.batches.add(task)
+                task.add_done_callback(state.batches.discard)
+                task.add_done_callback(lambda _: state.semaphore.release())
+        except asyncio.CancelledError:
+            # الطلبات التي جمعت ولم ترسل لن تعالج
+            for _, future in batch:
+                future.cancel()
+            raise
+
+    async def aclose(self):
+        """
+        إيقاف مهمة التوزيع وانتظار الدفعات الجارية
+
+        تلغى الطلبات التي لم ترسل بعد، ويعيد الطلب التالي (submit) تشغيل الموزع.
+        """
+        state, self._state = self._state, None
+        if state is None or state.loop is not asyncio.get_running_loop():
+            # حالة حلقة أخرى (منتهية غالباً) لا يمكن انتظار مهامها هنا
+            return
+        if state.dispatcher is not None:
+            state.dispatcher.cancel()
+            try:
+                await state.dispatcher
+            except asyncio.CancelledError:
+                pass
+        while not state.queue.empty():
+            _, future = state.queue.get_nowait()
+            future.cancel()
+        if state.batches:
+            await asyncio.gather(*state.batches, return_exceptions=True)
+
+    async def _run_batch(self, batch: list):
+        """تنفيذ دفعة في المجمع المختار وتوزيع نتائجها"""
+        # الطلبات الملغاة (مثل انتهاء مهلة المرسل) لا تعالج
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+        self.stats['batches'] += 1
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+        items = [item for item, _ in batch]
+        optimizer = self.optimizer or _default_optimizer()
+        try:
+            if optimizer.choose_executor(self.batch_func, len(items), self.mode) == 'thread':
+                pool = optimizer.thread_pool
+            else:
+                # العمال يقرؤون ملف التخزين المشترك، فتكتب القيم المعلقة قبل الإرسال
+                await asyncio.to_thread(_default_cache().flush)
+                initargs = self.initargs() if callable(self.initargs) else self.initargs
+                pool = optimizer.get_process_pool(self.initializer, initargs)
+            results = await asyncio.get_running_loop().run_in_executor(pool, self.batch_func, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+async def run_in_pool(func: Callable, *args, optimizer: Any = None) -> Any:
+    """تنفيذ استدعاء واحد في مجمع خيوط محسن الأداء دون حجب حلقة الأحداث"""
+    optimizer = optimizer or _default_optimizer()
+    return await asyncio.get_running_loop().run_in_executor(optimizer.thread_pool, func, *args)
+
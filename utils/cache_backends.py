@@ -0,0 +1,401 @@
+"""
+طبقات التخزين على القرص لنظام التخزين المؤقت
+Disk Backends for the Caching System
+"""
+
+import lzma
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+# برامج الضغط: المعرّف (بايت الترويسة) -> (الاسم، دالة الضغط، دالة فك الضغط)
+CODECS: Dict[int, Tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    0: ('raw', bytes, bytes),
+    1: ('zlib', lambda data: zlib.compress(data, 6), zlib.decompress),
+    2: ('lzma', lzma.compress, lzma.decompress),
+}
+CODEC_IDS = {name: codec_id for codec_id, (name, _, _) in CODECS.items()}
+
+# القيم القديمة (pickle دون ترويسة) تبدأ بعلامة البروتوكول 0x80
+PICKLE_PROTO = 0x80
+
+
+def register_codec(codec_id: int, name: str,
+                   compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]):
+    """تسجيل برنامج ضغط إضافي (المعرّف بايت واحد غير مستخدم، أقل من 0x80)"""
+    if not 0 <= codec_id < PICKLE_PROTO or codec_id in CODECS:
+        raise ValueError(f"معرّف برنامج الضغط غير صالح: {codec_id}")
+    CODECS[codec_id] = (name, compress, decompress)
+    CODEC_IDS[name] = codec_id
+
+
+def encode_entry(payload: bytes, codec: str = 'raw') -> bytes:
+    """
+    ضغط قيمة وإضافة ترويسة من بايت واحد تحدد برنامج الضغط
+
+    إذا لم يقلل الضغط الحجم تخزن القيمة دون ضغط.
+    """
+    codec_id = CODEC_IDS[codec]
+    if codec_id:
+        compressed = CODECS[codec_id][1](payload)
+        if len(compressed) < len(payload):
+            return bytes((codec_id,)) + compressed
+    return b'\x00' + payload
+
+
+def decode_entry(value: bytes) -> bytes:
+    """فك ضغط قيمة حسب ترويستها (القيم القديمة دون ترويسة تعاد كما هي)"""
+    if value[0] == PICKLE_PROTO:
+        return value
+    return CODECS[value[0]][2](value[1:])
+
+
+class DiskBackend(ABC):
+    """
+    الواجهة المشتركة لطبقات التخزين على القرص
+
+    تخزن كل طبقة قيماً ثنائية (bytes) مع وقت الإنشاء ووقت انتهاء الصلاحية،
+    ويتولى AdvancedCache تحويل البيانات إلى bytes وإعادتها.
+    """
+
+    def load(self, key: str) -> Optional[bytes]:
+        """تحميل قيمة غير منتهية الصلاحية، أو None"""
+        entry = self.load_entry(key)
+        return entry[0] if entry is not None else None
+
+    @abstractmethod
+    def load_entry(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """تحميل قيمة غير منتهية الصلاحية مع وقت انتهاء صلاحيتها، أو None"""
+
+    def save(self, key: str, value: bytes, expires_at: float):
+        """حفظ قيمة مع وقت انتهاء صلاحيتها"""
+        self.save_many([(key, value, expires_at)])
+
+    @abstractmethod
+    def save_many(self, items: Iterable[Tuple[str, bytes, float]]):
+        """حفظ مجموعة قيم دفعة واحدة"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """حذف قيمة"""
+
+    @abstractmethod
+    def clear(self):
+        """حذف جميع القيم"""
+
+    def flush(self):
+        """كتابة أي قيم معلقة على القرص"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """عدد القيم المخزنة"""
+
+    @abstractmethod
+    def size_bytes(self) -> int:
+        """الحجم الإجمالي للقيم المخزنة بالبايت"""
+
+    def sweep_expired(self, limit: int) -> int:
+        """حذف دفعة من القيم المنتهية الصلاحية (حتى limit) وإرجاع عددها"""
+        return 0
+
+    def evict_to_quota(self, max_bytes: int, limit: int) -> int:
+        """حذف دفعة من الأقدم استخداماً حتى يقل الحجم عن max_bytes، وإرجاع عددها"""
+        return 0
+
+    def compact(self) -> bool:
+        """استرداد المساحة الفارغة في ملفات التخزين؛ يعيد True إذا تم الضغط"""
+        return False
+
+    def close(self):
+        """إغلاق الطبقة بعد كتابة القيم المعلقة"""
+        self.flush()
+
+
+class PickleDirBackend(DiskBackend):
+    """طبقة تقليدية: ملف pickle مستقل لكل مفتاح داخل مجلد"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def load_entry(self, key: str) -> Optional[Tuple[bytes, float]]:
+        cache_file = self._path(key)
+        if not cache_file.exists():
+            return None
+
+        with open(cache_file, 'rb') as f:
+            record = pickle.load(f)
+
+        # التحقق من انتهاء الصلاحية
+        if record['expires_at'] < time.time():
+            cache_file.unlink(missing_ok=True)  # حذف الملف المنتهي الصلاحية
+            return None
+
+        return record['value'], record['expires_at']
+
+    def save_many(self, items: Iterable[Tuple[str, bytes, float]]):
+        for key, value, expires_at in items:
+            with open(self._path(key), 'wb') as f:
+                pickle.dump({'value': value, 'expires_at': expires_at}, f)
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        for cache_file in self.cache_dir.glob("*.pkl"):
+            try:
+                cache_file.unlink()
+            except Exception as e:
+                print(f"خطأ في حذف ملف التخزين المؤقت: {e}")
+
+    def count(self) -> int:
+        return len(list(self.cache_dir.glob("*.pkl")))
+
+    def sweep_expired(self, limit: int) -> int:
+        removed = 0
+        now = time.time()
+        for cache_file in self.cache_dir.glob("*.pkl"):
+            if removed >= limit:
+                break
+            try:
+                with open(cache_file, 'rb') as f:
+                    expired = pickle.load(f)['expires_at'] < now
+                if expired:
+                    cache_file.unlink()
+                    removed += 1
+            except Exception as e:
+                print(f"خطأ في حذف ملف التخزين المؤقت: {e}")
+        return removed
+
+    def evict_to_quota(self, max_bytes: int, limit: int) -> int:
+        # وقت القراءة الأخير غير موثوق في كثير من أنظمة الملفات، فيستخدم وقت التعديل
+        files = [(f.stat(), f) for f in self.cache_dir.glob("*.pkl")]
+        excess = sum(st.st_size for st, _ in files) - max_bytes
+        removed = 0
+        for st, cache_file in sorted(files, key=lambda item: item[0].st_mtime):
+            if excess <= 0 or removed >= limit:
+                break
+            cache_file.unlink(missing_ok=True)
+            excess -= st.st_size
+            removed += 1
+        return removed
+
+    def size_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self.cache_dir.glob("*.pkl"))
+
+
+class SQLiteBackend(DiskBackend):
+    """
+    طبقة تخزين في ملف SQLite واحد (وضع WAL)
+
+    - مشتركة بين العمليات: كل عملية تفتح اتصالها الخاص، وتنتظر الكتابة حتى
+      busy_timeout ثانية إذا كانت عملية أخرى تكتب
+    - كتابة مجمعة: تتراكم القيم في الذاكرة وتكتب في معاملة واحدة
+    - فهرس على وقت انتهاء الصلاحية لحذف القيم المنتهية بسرعة
+    - وقت آخر قراءة لكل قيمة (يحدّث دفعات) لتطبيق حصة القرص حسب LRU
+    - حساب الحجم من جدول القيم دون مسح أي مجلد
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_expires_at ON entries(expires_at);
+    """
+
+    # نسبة الصفحات الفارغة التي تستدعي إعادة بناء الملف (VACUUM)
+    COMPACT_FREE_RATIO = 0.25
+
+    def __init__(self, db_path: str, batch_size: int = 64, busy_timeout: float = 30.0):
+        """
+        Args:
+            db_path: مسار ملف قاعدة البيانات
+            batch_size: عدد القيم المعلقة قبل كتابتها دفعة واحدة
+            busy_timeout: أقصى مدة انتظار بالثواني لقفل الكتابة الذي تحمله عملية أخرى
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.busy_timeout = busy_timeout
+
+        # الاتصال يفتح عند أول استخدام (لا عند استيراد الوحدة التي تنشئ الطبقة)
+        self.pid = None
+        self.conn: Optional[sqlite3.Connection] = None
+        self._open_lock = threading.Lock()
+
+    def _open(self):
+        """فتح اتصال جديد خاص بالعملية الحالية"""
+        self.lock = threading.RLock()
+        self.pending: Dict[str, Tuple[bytes, float, float]] = {}
+        self.touched: Dict[str, float] = {}
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False,
+                                    timeout=self.busy_timeout)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+        # ملفات أنشئت قبل إضافة عمود وقت آخر قراءة
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}
+        if 'last_access' not in columns:
+            with self.conn:
+                self.conn.execute("ALTER TABLE entries ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access)")
+        # يعين أخيراً حتى لا تستخدم الخيوط الأخرى الاتصال قبل اكتمال فتحه
+        self.pid = os.getpid()
+
+    def _check_process(self):
+        """فتح الاتصال عند أول استخدام، وإعادة فتحه في العمليات المتفرعة (لا يجوز مشاركة اتصال SQLite بعد fork)"""
+        if self.pid != os.getpid():
+            with self._open_lock:
+                if self.pid != os.getpid():
+                    self._open()
+
+    def load_entry(self, key: str) -> Optional[Tuple[bytes, float]]:
+        now = time.time()
+        self._check_process()
+        with self.lock:
+            if key in self.pending:
+                value, _, expires_at = self.pending[key]
+                return (value, expires_at) if expires_at >= now else None
+
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at < now:
+                with self.conn:
+                    self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+
+            self.touched[key] = now
+            return value, expires_at
+
+    def save_many(self, items: Iterable[Tuple[str, bytes, float]]):
+        now = time.time()
+        self._check_process()
+        with self.lock:
+            for key, value, expires_at in items:
+                self.pending[key] = (value, now, expires_at)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        self._check_process()
+        with self.lock:
+            if not self.pending and not self.touched:
+                return
+            rows = [
+                (key, value, len(value), created_at, expires_at, created_at)
+                for key, (value, created_at, expires_at) in self.pending.items()
+            ]
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO entries "
+                    "(key, value, size, created_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self.conn.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    [(accessed, key) for key, accessed in self.touched.items()]
+                )
+            self.pending.clear()
+            self.touched.clear()
+
+    def delete(self, key: str):
+        self._check_process()
+        with self.lock:
+            self.pending.pop(key, None)
+            with self.conn:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        self._check_process()
+        with self.lock:
+            self.pending.clear()
+            self.touched.clear()
+            with self.conn:
+                self.conn.execute("DELETE FROM entries")
+
+    def count(self) -> int:
+        self._check_process()
+        with self.lock:
+            self.flush()
+            return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def size_bytes(self) -> int:
+        self._check_process()
+        with self.lock:
+            self.flush()
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def sweep_expired(self, limit: int) -> int:
+        self._check_process()
+        with self.lock:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "DELETE FROM entries WHERE rowid IN "
+                    "(SELECT rowid FROM entries WHERE expires_at < ? LIMIT ?)",
+                    (time.time(), limit)
+                )
+            return cursor.rowcount
+
+    def evict_to_quota(self, max_bytes: int, limit: int) -> int:
+        self._check_process()
+        with self.lock:
+            excess = self.size_bytes() - max_bytes
+            if excess <= 0:
+                return 0
+
+            keys = []
+            for key, size in self.conn.execute(
+                    "SELECT key, size FROM entries ORDER BY last_access LIMIT ?", (limit,)):
+                if excess <= 0:
+                    break
+                keys.append((key,))
+                excess -= size
+
+            with self.conn:
+                self.conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+            return len(keys)
+
+    def compact(self) -> bool:
+        self._check_process()
+        with self.lock:
+            self.flush()
+            page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+            vacuumed = bool(page_count) and free_pages / page_count >= self.COMPACT_FREE_RATIO
+            if vacuumed:
+                self.conn.execute("VACUUM")
+            # نقل سجل WAL إلى الملف الرئيسي وتفريغه
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return vacuumed
+
+    def close(self):
+        if self.conn is None:
+            return
+        self._check_process()
+        with self.lock:
+            self.flush()
+            self.conn.close()
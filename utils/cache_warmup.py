@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+تهيئة التخزين المؤقت من مدونة مرجعية
+Cache Warm-up from a Reference Corpus
+
+يمر على ملفات المدونة سطراً سطراً، ويحسب الصيغ المطبعة (وجذور الخليل عند
+الطلب) لأكثر الصيغ تكراراً، ثم يكتبها دفعات في ملف التخزين الدائم. يجب تشغيله
+من مجلد التطبيق نفسه حتى تطابق الإعدادات (ومن ثم المفاتيح) إعدادات التطبيق.
+
+الاستخدام:
+    python utils/cache_warmup.py corpus1.txt corpus2.txt --top 20000 --khalil
+"""
+
+import sys
+import time
+import logging
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# إضافة مسار المشروع
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from arabic_processor import ArabicProcessor, get_khalil_analyzer
+from utils.jobs import Job, JobCancelled, JobProgress, format_eta
+
+
+def iter_corpus_lines(paths: Iterable[str]) -> Iterator[str]:
+    """قراءة ملفات المدونة سطراً سطراً دون تحميلها كاملة في الذاكرة"""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            yield from f
+
+
+def count_types(lines: Iterable[str], processor: ArabicProcessor) -> Counter:
+    """عد الصيغ كما يستخرجها التقسيم (بعد إزالة التشكيل وقبل التطبيع)"""
+    counts = Counter()
+    for line in lines:
+        counts.update(processor.ARABIC_WORD.findall(processor.TASHKEEL.sub('', line)))
+    return counts
+
+
+def warm_up_cache(paths: List[str], top_n: int = 20000, khalil: bool = False,
+                  processor: ArabicProcessor = None, job: Optional[Job] = None) -> Dict[str, Any]:
+    """
+    تهيئة التخزين الدائم بنتائج أكثر الصيغ تكراراً في المدونة
+
+    Args:
+        paths: ملفات المدونة المرجعية
+        top_n: عدد الصيغ الأكثر تكراراً المطلوب تهيئتها
+        khalil: حساب جذور الخليل أيضاً
+        processor: المعالج المستخدم (الافتراضي: معالج جديد)
+        job: مهمة لتقرير التقدم بعدد الصيغ وإلغاء التهيئة (تثير JobCancelled
+            وتبقى الدفعات المكتوبة قبل الإلغاء)
+
+    Returns:
+        تقرير يتضمن التغطية المتوقعة وعدد القيم المكتوبة
+    """
+    processor = processor or ArabicProcessor()
+    normalize = type(processor).normalize_text
+    khalil_root = type(processor).khalil_root
+    cache = getattr(normalize, 'cache', None)
+    if cache is None:
+        raise RuntimeError("التخزين المؤقت غير متاح")
+
+    if khalil and get_khalil_analyzer() is None:
+        raise RuntimeError("تعذر تحميل محلل الخليل")
+
+    start_time = time.time()
+    counts = count_types(iter_corpus_lines(paths), processor)
+    top_types = counts.most_common(top_n)
+    if job is not None:
+        job.total_items = len(top_types)
+    total_tokens = sum(counts.values())
+    covered_tokens = sum(count for _, count in top_types)
+
+    report = {
+        'corpus_tokens': total_tokens,
+        'corpus_types': len(counts),
+        'warmed_types': len(top_types),
+        'token_coverage': covered_tokens / total_tokens if total_tokens else 0.0,
+        'type_coverage': len(top_types) / len(counts) if counts else 0.0,
+        'already_cached': 0,
+        'roots_found': 0,
+    }
+
+    def entries():
+        """القيم الناقصة من التخزين الدائم: (المفتاح، القيمة، ttl)"""
+        calls = [(normalize, word) for word, _ in top_types]
+        for func, word in calls:
+            if job is not None:
+                job.raise_if_cancelled()
+                if func is normalize:
+                    job.advance(1, len(word.encode('utf-8')))
+            key = func.cache_key(processor, word)
+            if cache.contains(key):
+                report['already_cached'] += 1
+                value = cache.get(key, None, func.cache_group)
+            else:
+                value = func.uncached(processor, word)
+                ttl = func.store_ttl(value)
+                if ttl is not None:
+                    yield key, value, ttl
+
+            # جذر الخليل يحسب للصيغة المطبعة كما في مسار التقسيم
+            if khalil and func is normalize:
+                calls.append((khalil_root, value))
+            elif func is khalil_root and value:
+                report['roots_found'] += 1
+
+    report['entries_written'] = cache.preload(entries())
+    report['seconds'] = time.time() - start_time
+    if job is not None:
+        job.finish()
+    return report
+
+
+def print_progress(progress: JobProgress):
+    """سطر تقدم واحد يعاد رسمه في stderr"""
+    end = "\n" if progress.finished or progress.cancelled else ""
+    print(f"\r   {progress.items_done}/{progress.items_total or '?'} صيغة | "
+          f"المتبقي: {format_eta(progress.eta)}", end=end, file=sys.stderr, flush=True)
+
+
+def main():
+    """الدالة الرئيسية لأمر التهيئة"""
+    parser = argparse.ArgumentParser(description='تهيئة التخزين المؤقت من مدونة مرجعية')
+    parser.add_argument('paths', nargs='+', help='ملفات المدونة (نص UTF-8)')
+    parser.add_argument('--top', type=int, default=20000,
+                        help='عدد الصيغ الأكثر تكراراً المطلوب تهيئتها (الافتراضي: 20000)')
+    parser.add_argument('--khalil', action='store_true', help='حساب جذور الخليل أيضاً')
+    args = parser.parse_args()
+
+    # تسجيل كل عملية تطبيع يبطئ التهيئة دون فائدة
+    logging.disable(logging.INFO)
+    job = Job("تهيئة التخزين المؤقت", on_progress=print_progress, min_interval=0.5)
+    try:
+        report = warm_up_cache(args.paths, args.top, args.khalil, job=job)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+    except (KeyboardInterrupt, JobCancelled):
+        job.cancel()
+        print("⏹ تم إيقاف التهيئة (تبقى الدفعات المكتوبة)")
+        return 130
+
+    print("="*60)
+    print("تقرير تهيئة التخزين المؤقت")
+    print("="*60)
+    print(f"   كلمات المدونة: {report['corpus_tokens']} | الصيغ: {report['corpus_types']}")
+    print(f"   الصيغ المهيأة: {report['warmed_types']} "
+          f"({report['type_coverage']:.1%} من الصيغ)")
+    print(f"   التغطية المتوقعة: {report['token_coverage']:.1%} من الكلمات")
+    print(f"   قيم مكتوبة: {report['entries_written']} | موجودة مسبقاً: {report['already_cached']}")
+    if args.khalil:
+        print(f"   صيغ لها جذر: {report['roots_found']}")
+    print(f"   الزمن: {report['seconds']:.2f} ثانية")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
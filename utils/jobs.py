@@ -0,0 +1,276 @@
+"""
+المهام الطويلة: التقدم والإلغاء
+Long-running Jobs: Progress and Cancellation
+
+تشترك فيها خيوط الواجهة (QThread) وأدوات سطر الأوامر: تقرير التقدم (العناصر
+والبايتات المنجزة والوقت المتبقي)، وإلغاء تعاوني تتحقق منه دوال المعالجة، وإلغاء
+المهام المرسلة إلى المجمعات التي لم تبدأ بعد.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+
+class JobCancelled(Exception):
+    """تثار عند التحقق من رمز إلغاء مفعّل"""
+    pass
+
+
+class CancellationToken:
+    """
+    رمز إلغاء تعاوني
+
+    يمرر إلى دوال المعالجة التي تستدعي raise_if_cancelled() بين خطواتها. له
+    is_set() فيقبل حيث يقبل threading.Event (مثل معامل cancel في imap).
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    def cancel(self):
+        """طلب الإلغاء وتنفيذ الدوال المسجلة مرة واحدة"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """إثارة JobCancelled إذا طلب الإلغاء"""
+        if self._event.is_set():
+            raise JobCancelled()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """تسجيل دالة تنفذ عند الإلغاء (فوراً إذا كان الرمز ملغى)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """الانتظار حتى الإلغاء أو انتهاء المهلة"""
+        return self._event.wait(timeout)
+
+
+class JobProgress(NamedTuple):
+    """لقطة من تقدم مهمة"""
+    name: str
+    items_done: int
+    items_total: Optional[int]
+    bytes_done: int
+    bytes_total: Optional[int]
+    elapsed: float
+    eta: Optional[float]
+    cancelled: bool
+    finished: bool
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """نسبة الإنجاز (بالبايتات إذا عرف حجمها الكلي، وإلا بالعناصر)"""
+        if self.bytes_total:
+            return min(1.0, self.bytes_done / self.bytes_total)
+        if self.items_total:
+            return min(1.0, self.items_done / self.items_total)
+        return None
+
+
+class Job:
+    """
+    مهمة طويلة مع تقدم وإلغاء
+
+    الاستخدام:
+        job = Job("تحليل", total_items=len(texts), on_progress=print)
+        for result in job.map(func, texts):
+            ...
+
+    تستدعى on_progress بلقطة JobProgress كل min_interval ثانية على الأكثر (وعند
+    الانتهاء أو الإلغاء) من الخيط الذي سجل التقدم.
+    """
+
+    def __init__(self, name: str = "", total_items: Optional[int] = None,
+                 total_bytes: Optional[int] = None,
+                 on_progress: Optional[Callable[[JobProgress], None]] = None,
+                 min_interval: float = 0.1, token: Optional[CancellationToken] = None):
+        """
+        Args:
+            name: اسم المهمة في تقارير التقدم
+            total_items: عدد العناصر الكلي إذا كان معروفاً
+            total_bytes: الحجم الكلي بالبايت إذا كان معروفاً
+            on_progress: دالة تستقبل JobProgress
+            min_interval: أقل مدة بالثواني بين استدعاءين لـ on_progress
+            token: رمز الإلغاء (الافتراضي: رمز جديد)
+        """
+        self.name = name
+        self.total_items = total_items
+        self.total_bytes = total_bytes
+        self.on_progress = on_progress
+        self.min_interval = min_interval
+        self.token = token or CancellationToken()
+
+        self.items_done = 0
+        self.bytes_done = 0
+        self.finished = False
+        self._start_time = time.monotonic()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+        # المهام المرسلة إلى المجمعات وتلغى مع المهمة
+        self._futures = set()
+        self.token.on_cancel(self._cancel_futures)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    def cancel(self):
+        """إلغاء المهمة والمهام المرسلة التي لم تبدأ"""
+        self.token.cancel()
+        self._report(force=True)
+
+    def raise_if_cancelled(self):
+        self.token.raise_if_cancelled()
+
+    def progress(self) -> JobProgress:
+        """لقطة التقدم الحالية مع الوقت المتبقي المقدر"""
+        with self._lock:
+            elapsed = time.monotonic() - self._start_time
+            eta = None
+            if self.total_bytes and self.bytes_done:
+                eta = elapsed * (self.total_bytes - self.bytes_done) / self.bytes_done
+            elif self.total_items and self.items_done:
+                eta = elapsed * (self.total_items - self.items_done) / self.items_done
+            if eta is not None:
+                eta = max(0.0, eta)
+            return JobProgress(self.name, self.items_done, self.total_items,
+                               self.bytes_done, self.total_bytes, elapsed, eta,
+                               self.token.cancelled, self.finished)
+
+    def advance(self, items: int = 1, nbytes: int = 0):
+        """تسجيل عناصر وبايتات منجزة (آمن من عدة خيوط)"""
+        with self._lock:
+            self.items_done += items
+            self.bytes_done += nbytes
+        self._report()
+
+    def iterate(self, items: Iterable, advance: bool = True, every: int = 256) -> Iterator:
+        """
+        المرور على عناصر حلقة طويلة مع التحقق من الإلغاء وتسجيل التقدم
+
+        يتحقق من الإلغاء قبل أول عنصر ثم كل every عنصراً، ويسجل العناصر المنجزة
+        دفعة واحدة عند كل تحقق (وعند النهاية) إذا كان advance.
+        """
+        self.raise_if_cancelled()
+        pending = 0
+        for item in items:
+            if pending >= every:
+                self.raise_if_cancelled()
+                if advance:
+                    self.advance(pending)
+                pending = 0
+            yield item
+            pending += 1
+        if advance and pending:
+            self.advance(pending)
+
+    def finish(self):
+        """تسجيل انتهاء المهمة وإرسال التقرير الأخير"""
+        self.finished = True
+        self._report(force=True)
+
+    def _report(self, force: bool = False):
+        """استدعاء on_progress إذا مرت min_interval منذ التقرير السابق"""
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_report < self.min_interval:
+                return
+            self._last_report = now
+        self.on_progress(self.progress())
+
+    def track(self, future):
+        """تسجيل مهمة مرسلة إلى مجمع لتلغى مع المهمة إذا لم تبدأ"""
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._untrack)
+        if self.token.cancelled:
+            future.cancel()
+        return future
+
+    def _untrack(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _cancel_futures(self):
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+    def map(self, func: Callable, items: Iterable, size: Optional[Callable[[Any], int]] = None,
+            optimizer: Any = None, **imap_kwargs) -> Iterator:
+        """
+        تطبيق func على العناصر عبر PerformanceOptimizer.imap مع تسجيل التقدم والإلغاء
+
+        Args:
+            func: الدالة المطبقة على كل عنصر
+            items: العناصر
+            size: دالة تعطي حجم العنصر بالبايت لتقرير bytes_done
+            optimizer: محسن الأداء (الافتراضي: المحسن العام)
+            **imap_kwargs: معاملات imap الأخرى (mode، ordered، capture_errors...)
+
+        Yields:
+            MapResult لكل عنصر مكتمل
+        """
+        if optimizer is None:
+            optimizer = _default_optimizer()
+
+        # أحجام العناصر تحسب عند قراءتها (قد تكون items مولداً)
+        sizes = {}
+
+        def measured():
+            for index, item in enumerate(items):
+                if size is not None:
+                    sizes[index] = size(item)
+                yield item
+
+        try:
+            for result in optimizer.imap(func, measured(), cancel=self.token, **imap_kwargs):
+                self.advance(1, sizes.pop(result.index, 0))
+                yield result
+        finally:
+            if not self.token.cancelled:
+                self.finish()
+            else:
+                self._report(force=True)
+
+
+def _default_optimizer():
+    """المحسن العام (نسخة الوحدة نفسها التي يستخدمها arabic_processor)"""
+    try:
+        from performance_optimizer import performance_optimizer
+    except ImportError:
+        from utils.performance_optimizer import performance_optimizer
+    return performance_optimizer
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    """عرض الوقت المتبقي بصيغة مختصرة (دقائق:ثوانٍ)"""
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
@@ -3,24 +3,260 @@
 Advanced Caching System for Linguistic Processor
 """
 
+import atexit
+import gc
 import pickle
 import hashlib
 import os
+import re
+import sys
 import time
 import threading
+import weakref
+from collections import ChainMap, OrderedDict, deque
 from pathlib import Path
-from typing import Any, Optional, Dict, Callable
+from typing import Any, Optional, Dict, Callable, Iterable, Iterator, List, NamedTuple, Tuple
 from functools import wraps, lru_cache
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 import multiprocessing
+import multiprocessing.util
 import json
 from datetime import datetime, timedelta
 
+try:
+    from utils.cache_backends import DiskBackend, PickleDirBackend, SQLiteBackend, encode_entry, decode_entry
+except ImportError:
+    from cache_backends import DiskBackend, PickleDirBackend, SQLiteBackend, encode_entry, decode_entry
+
+# الإعدادات التي يقرأها المعالج (نسخة الوحدة نفسها التي يستوردها arabic_processor)
+try:
+    from settings_manager import settings_manager
+except ImportError:
+    try:
+        from utils.settings_manager import settings_manager
+    except ImportError:
+        settings_manager = None
+
+# قياس الذاكرة على الأنظمة التي لا توفر /proc (اختياري)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# قيمة مميزة للدلالة على عدم وجود العنصر (None قيمة صالحة للتخزين)
+MISSING = object()
+
+# حدود الكلمات: تتابع المسافات البيضاء
+WHITESPACE_RUN = re.compile(r'\s+')
+
+
+class _Flight:
+    """حساب جارٍ لمفتاح ينتظره المستدعون المتزامنون"""
+    
+    __slots__ = ('owner', 'event', 'result', 'error')
+    
+    def __init__(self):
+        self.owner = threading.get_ident()
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class CacheBudget:
+    """
+    ميزانية البايتات المشتركة بين أجزاء AdvancedCache
+    
+    تحاسب الحجم الإجمالي ولكل مجموعة على مستوى التخزين كله لا لكل جزء، فيقبل
+    في الذاكرة أي عنصر لا يتجاوز الميزانية كلها (أو حصة مجموعته منها).
+    """
+    
+    def __init__(self, max_bytes: Optional[int], group_budgets: Dict[str, float]):
+        self.max_bytes = max_bytes
+        self.group_budgets = group_budgets  # النسب لكل مجموعة (set_group_budget)
+        self.lock = threading.Lock()
+        self.total = 0
+        self.group_totals: Dict[str, int] = {}
+    
+    def group_limit(self, group: str) -> Optional[int]:
+        """حصة المجموعة من الميزانية بالبايت، أو None"""
+        if self.max_bytes is None or group not in self.group_budgets:
+            return None
+        return int(self.max_bytes * self.group_budgets[group])
+    
+    def admits(self, size: int, group: str) -> bool:
+        """هل يتسع عنصر بهذا الحجم في الذاكرة (عند خلوها من غيره)"""
+        if self.max_bytes is None:
+            return True
+        group_limit = self.group_limit(group)
+        return size <= self.max_bytes and (group_limit is None or size <= group_limit)
+    
+    def charge(self, group: str, size: int):
+        """إضافة حجم عنصر (size سالب عند حذفه)"""
+        with self.lock:
+            self.total += size
+            self.group_totals[group] = self.group_totals.get(group, 0) + size
+    
+    def exceeded(self, group: Optional[str] = None) -> bool:
+        """هل تجاوز الحجم الإجمالي (أو حجم المجموعة group) الميزانية"""
+        if self.max_bytes is None:
+            return False
+        with self.lock:
+            if group is None:
+                return self.total > self.max_bytes
+            group_limit = self.group_limit(group)
+            return group_limit is not None and self.group_totals.get(group, 0) > group_limit
+
+
+class CacheShard:
+    """
+    جزء من ذاكرة AdvancedCache بقفل مستقل
+    
+    يحتفظ بعناصره مرتبة حسب آخر استخدام مع محاسبة الحجم لكل مجموعة، ويطبق
+    حصته من العدد الأقصى. تحاسب البايتات في CacheBudget المشتركة وتفرضها
+    AdvancedCache على الأجزاء كلها.
+    """
+    
+    def __init__(self, max_size: int, budget: CacheBudget, ttl: int):
+        self.max_size = max_size
+        self.budget = budget  # مشتركة بين الأجزاء
+        self.ttl = ttl
+        self.lock = threading.RLock()
+        
+        # تخزين مؤقت في الذاكرة مرتب حسب آخر استخدام (الأقدم أولاً)
+        self.memory_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.access_times: Dict[str, float] = {}
+        
+        # محاسبة الحجم: الإجمالي ولكل مجموعة (دالة)
+        self.memory_bytes = 0
+        self.groups: Dict[str, "OrderedDict[str, None]"] = {}
+        self.group_bytes: Dict[str, int] = {}
+        
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    def lookup(self, key: str) -> Any:
+        """البحث عن عنصر صالح في الذاكرة (MISSING إن لم يوجد)؛ يستدعى مع القفل"""
+        entry = self.memory_cache.get(key)
+        if entry is None:
+            return MISSING
+        
+        if time.time() - self.access_times[key] > entry['ttl']:
+            # إزالة العنصر المنتهي الصلاحية
+            self.remove(key)
+            return MISSING
+        
+        self.access_times[key] = time.time()
+        self.memory_cache.move_to_end(key)
+        self.groups[entry['group']].move_to_end(key)
+        return entry['data']
+    
+    def remove(self, key: str):
+        """حذف عنصر من الذاكرة مع تحديث محاسبة الحجم"""
+        entry = self.memory_cache.pop(key)
+        self.access_times.pop(key, None)
+        
+        group = entry['group']
+        self.memory_bytes -= entry['size']
+        self.group_bytes[group] -= entry['size']
+        del self.groups[group][key]
+        self.budget.charge(group, -entry['size'])
+    
+    def evict_lru(self):
+        """إزالة العنصر الأقل استخداماً"""
+        if not self.memory_cache:
+            return
+        
+        # العنصر الأقدم في بداية القاموس المرتب
+        self.remove(next(iter(self.memory_cache)))
+        self.stats['evictions'] += 1
+    
+    def evict_group_lru(self, group: str):
+        """إزالة العنصر الأقل استخداماً داخل مجموعة"""
+        self.remove(next(iter(self.groups[group])))
+        self.stats['evictions'] += 1
+    
+    def oldest_access(self, group: Optional[str] = None) -> Optional[float]:
+        """وقت آخر استخدام للعنصر الأقدم (في المجموعة group إن حددت)، أو None"""
+        keys = self.memory_cache if group is None else self.groups.get(group)
+        if not keys:
+            return None
+        return self.access_times[next(iter(keys))]
+    
+    def store(self, key: str, data: Any, group: str, ttl: Optional[float] = None):
+        """
+        حفظ عنصر مع الالتزام بالعدد الأقصى؛ يستدعى مع القفل
+        
+        يحاسب حجمه في الميزانية المشتركة، ويتولى AdvancedCache بعدها إزالة
+        الأقدم من الأجزاء كلها إن تجاوزتها.
+        """
+        if key in self.memory_cache:
+            self.remove(key)
+        
+        size = estimate_size(data)
+        
+        # عنصر أكبر من الميزانية كلها (أو حصة مجموعته) يبقى على القرص فقط
+        if not self.budget.admits(size, group):
+            return
+        
+        while self.memory_cache and len(self.memory_cache) >= self.max_size:
+            self.evict_lru()
+        
+        self.memory_cache[key] = {'data': data, 'size': size, 'group': group,
+                                  'ttl': self.ttl if ttl is None else ttl}
+        self.access_times[key] = time.time()
+        self.memory_bytes += size
+        self.group_bytes[group] = self.group_bytes.get(group, 0) + size
+        self.groups.setdefault(group, OrderedDict())[key] = None
+        self.budget.charge(group, size)
+    
+    def clear(self):
+        """مسح عناصر هذا الجزء"""
+        for group, size in self.group_bytes.items():
+            self.budget.charge(group, -size)
+        self.memory_cache.clear()
+        self.access_times.clear()
+        self.memory_bytes = 0
+        self.groups.clear()
+        self.group_bytes.clear()
+
 
 class AdvancedCache:
-    """نظام تخزين مؤقت متقدم مع دعم متعدد المستويات"""
+    """
+    نظام تخزين مؤقت متقدم مع دعم متعدد المستويات
+    
+    تقسم الذاكرة إلى أجزاء (CacheShard) حسب بصمة المفتاح، لكل منها قفله، وتتم
+    القراءة والكتابة على القرص خارج هذه الأقفال. عند تحديد sweep_interval يتولى
+    خيط صيانة خلفي حذف القيم المنتهية وتطبيق حصة القرص وضغط الملف دفعات صغيرة،
+    ولا يعمل إلا بعد فترة هدوء في العمليات الأمامية. يمكن تعطيل إحدى الطبقتين
+    (الذاكرة أو القرص) حسب استراتيجية التخزين (set_strategy).
+    """
+    
+    # اسم ملف قاعدة البيانات الافتراضية داخل مجلد التخزين المؤقت
+    DB_FILENAME = "cache.sqlite3"
     
-    def __init__(self, cache_dir: str = "cache", max_size: int = 1000, ttl: int = 3600):
+    # مستويات الضغط: (الحد الأدنى لحجم القيمة بالبايت، برنامج الضغط)، الأكبر أولاً
+    DEFAULT_COMPRESSION = ((1024 * 1024, 'lzma'), (1024, 'zlib'))
+    
+    # الصيانة: حجم الدفعة، والحد الأقصى للدفعات في كل دورة، ومدة الهدوء المطلوبة
+    # قبل كل دفعة (بالثواني)
+    MAINTENANCE_BATCH = 500
+    MAINTENANCE_MAX_BATCHES = 20
+    MAINTENANCE_IDLE = 0.5
+    
+    # الطبقات المفعلة (الذاكرة، القرص) لكل استراتيجية تخزين (CacheStrategy)
+    STRATEGIES = {
+        'hybrid': (True, True),
+        'memory_only': (True, False),
+        'disk_only': (False, True),
+    }
+    
+    def __init__(self, cache_dir: str = "cache", max_size: int = 1000, ttl: int = 3600,
+                 backend: Optional[DiskBackend] = None, write_behind: bool = True,
+                 flush_interval: float = 1.0, write_batch_size: int = 256,
+                 max_bytes: Optional[int] = None, compression: Optional[tuple] = None,
+                 shards: int = 1, disk_quota_bytes: Optional[int] = None,
+                 sweep_interval: Optional[float] = None):
         """
         تهيئة نظام التخزين المؤقت
         
@@ -28,177 +264,1127 @@ class AdvancedCache:
             cache_dir: مجلد التخزين المؤقت
             max_size: الحد الأقصى لعدد العناصر في الذاكرة
             ttl: وقت انتهاء الصلاحية بالثواني
+            backend: طبقة التخزين على القرص (الافتراضي: ملف SQLite واحد داخل cache_dir)
+            write_behind: تأجيل الكتابة على القرص إلى خيط خلفي
+            flush_interval: المدة بالثواني بين عمليات الكتابة الدورية
+            write_batch_size: عدد الكتابات المعلقة التي توقظ الخيط الخلفي قبل موعده
+            max_bytes: الحجم التقريبي الأقصى للعناصر في الذاكرة بالبايت (None: بلا حد)
+            compression: مستويات الضغط على القرص (الافتراضي: DEFAULT_COMPRESSION، و() للتعطيل)
+            shards: عدد أجزاء الذاكرة المستقلة الأقفال (يقسم عليها max_size، أما
+                max_bytes وحصص المجموعات فتفرض على التخزين كله)
+            disk_quota_bytes: الحجم الأقصى للقيم على القرص بالبايت (None: بلا حد)
+            sweep_interval: المدة بالثواني بين دورات الصيانة الخلفية (None: بلا صيانة تلقائية)
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
         self.max_size = max_size
+        self.max_bytes = max_bytes
         self.ttl = ttl
+        self.disk_quota_bytes = disk_quota_bytes
+        self.sweep_interval = sweep_interval
+        self.backend = backend or SQLiteBackend(self.cache_dir / self.DB_FILENAME)
+        self.compression = self.DEFAULT_COMPRESSION if compression is None else compression
+        self.memory_tier = True
+        self.disk_tier = True
         
-        # تخزين مؤقت في الذاكرة
-        self.memory_cache: Dict[str, Dict[str, Any]] = {}
-        self.access_times: Dict[str, float] = {}
-        
-        # قفل للعمليات المتزامنة
-        self.lock = threading.RLock()
+        # أجزاء الذاكرة: كل جزء يأخذ حصة متساوية من العدد الأقصى، وميزانية
+        # البايتات مشتركة حتى لا يرفض عنصر كبير لمجرد تجاوزه حصة جزء واحد
+        self.group_budgets: Dict[str, float] = {}
+        self.budget = CacheBudget(max_bytes, self.group_budgets)
+        shard_size = -(-max_size // shards)
+        self.shards = [CacheShard(shard_size, self.budget, ttl) for _ in range(shards)]
         
-        # إحصائيات الأداء
-        self.stats = {
-            'hits': 0,
-            'misses': 0,
-            'evictions': 0,
+        # عدادات القرص والاستدعاءات المدمجة (إحصائيات الذاكرة لكل جزء)
+        self._stats_lock = threading.Lock()
+        self.counters = {
             'disk_reads': 0,
-            'disk_writes': 0
+            'disk_writes': 0,
+            'coalesced_writes': 0,
+            # حجم القيم قبل الضغط وبعده، وزمن القراءة والكتابة على القرص
+            'raw_bytes_written': 0,
+            'stored_bytes_written': 0,
+            'write_seconds': 0.0,
+            'stored_bytes_read': 0,
+            'read_seconds': 0.0,
+            # استدعاءات انتظرت نتيجة استدعاء متزامن للمفتاح نفسه
+            'coalesced': 0,
+            # الصيانة الخلفية: قيم منتهية محذوفة، وقيم أزيلت لتطبيق الحصة، وعمليات ضغط
+            'swept_entries': 0,
+            'disk_evictions': 0,
+            'compactions': 0
         }
+        
+        # الحسابات الجارية لكل مفتاح (single-flight)
+        self._flight_lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        
+        # الكتابة المؤجلة: آخر قيمة لكل مفتاح تنتظر الخيط الخلفي
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.write_batch_size = write_batch_size
+        self._init_writer_state()
+        
+        # الصيانة الخلفية تنتظر هدوء العمليات الأمامية (آخر get/set)، ويبدأ
+        # خيطها عند أول كتابة على القرص لا عند الإنشاء
+        self._last_activity = time.monotonic()
+        self._maintenance_lock = threading.Lock()
+        self._maintenance_event = threading.Event()
+        self._maintenance: Optional[threading.Thread] = None
+        self._legacy_checked = False
+        
+        # القفل والخيط لا ينتقلان سليمين إلى العمليات المتفرعة
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()._after_fork())
+        
+        # العمليات العاملة تكتب نتائجها قبل خروجها (سواء ورثت الكائن أو أنشأته)
+        multiprocessing.util.register_after_fork(self, AdvancedCache._register_worker_exit)
+        if multiprocessing.parent_process() is not None:
+            self._register_worker_exit()
     
-    def _generate_key(self, *args, **kwargs) -> str:
-        """توليد مفتاح فريد للعنصر"""
-        key_data = str(args) + str(sorted(kwargs.items()))
-        return hashlib.md5(key_data.encode()).hexdigest()
+    def _init_writer_state(self):
+        """تهيئة حالة الكتابة المؤجلة"""
+        self._write_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._write_event = threading.Event()
+        self._pending_writes: Dict[str, Any] = {}
+        self._inflight_writes: Dict[str, Any] = {}
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
     
-    def _is_expired(self, timestamp: float) -> bool:
-        """التحقق من انتهاء صلاحية العنصر"""
-        return time.time() - timestamp > self.ttl
+    def _after_fork(self):
+        """إعادة تهيئة الأقفال في العملية الابنة (الكتابات المعلقة تخص العملية الأم)"""
+        for shard in self.shards:
+            shard.lock = threading.RLock()
+        self._stats_lock = threading.Lock()
+        self._flight_lock = threading.Lock()
+        self._flights = {}
+        self._init_writer_state()
+        # خيط الصيانة لا ينتقل إلى العملية الابنة، وتتولاه العملية الأم
+        self._maintenance_lock = threading.Lock()
+        self._maintenance_event = threading.Event()
+        self._maintenance = None
     
-    def _evict_lru(self):
-        """إزالة العنصر الأقل استخداماً"""
-        if not self.access_times:
+    def _register_worker_exit(self):
+        """
+        كتابة القيم المعلقة عند خروج العملية العاملة
+        
+        عمليات multiprocessing تنتهي دون تنفيذ atexit، فتسجل الكتابة عبر
+        multiprocessing.util.Finalize لتصل نتائج العمال إلى ملف التخزين المشترك.
+        """
+        multiprocessing.util.Finalize(self, self.close, exitpriority=10)
+    
+    def set_strategy(self, strategy: Any):
+        """
+        تفعيل طبقات التخزين حسب الاستراتيجية
+        
+        Args:
+            strategy: CacheStrategy أو قيمتها النصية (hybrid، memory_only، disk_only)
+            
+        Raises:
+            ValueError: إذا كانت الاستراتيجية غير معروفة
+        """
+        strategy = getattr(strategy, 'value', strategy)
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"استراتيجية تخزين غير معروفة: {strategy}")
+        memory_tier, disk_tier = self.STRATEGIES[strategy]
+        if self.disk_tier and not disk_tier:
+            # الكتابات المعلقة تكتمل على القرص قبل تعطيله
+            self.flush()
+        if self.memory_tier and not memory_tier:
+            self.clear_memory()
+        self.memory_tier, self.disk_tier = memory_tier, disk_tier
+    
+    @property
+    def strategy(self) -> str:
+        """الاستراتيجية الحالية"""
+        for name, tiers in self.STRATEGIES.items():
+            if tiers == (self.memory_tier, self.disk_tier):
+                return name
+        return 'hybrid'
+    
+    def _shard(self, key: str) -> CacheShard:
+        """الجزء المسؤول عن المفتاح"""
+        return self.shards[hash(key) % len(self.shards)]
+    
+    @property
+    def memory_cache(self) -> ChainMap:
+        """عرض للقراءة فقط لعناصر الذاكرة في جميع الأجزاء"""
+        return ChainMap(*(shard.memory_cache for shard in self.shards))
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """إحصائيات الأجزاء مجمعة مع عدادات القرص"""
+        totals = {'hits': 0, 'misses': 0, 'evictions': 0}
+        for shard in self.shards:
+            for name, value in shard.stats.items():
+                totals[name] += value
+        return {**totals, **self.counters}
+    
+    def _count(self, **increments):
+        """زيادة العدادات (تستدعى من عدة خيوط)"""
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.counters[name] += value
+    
+    def _ensure_writer(self):
+        """تشغيل الخيط الخلفي عند أول كتابة"""
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._writer_loop,
+                                            name="AdvancedCacheWriter", daemon=True)
+            self._writer.start()
+    
+    def _ensure_maintenance(self):
+        """تشغيل خيط الصيانة عند أول كتابة على القرص (في العملية الرئيسية فقط)"""
+        if self.sweep_interval is None or self._maintenance is not None:
             return
+        if multiprocessing.parent_process() is not None:
+            return
+        with self._maintenance_lock:
+            if self._maintenance is None and not self._closed:
+                self._maintenance = threading.Thread(target=self._maintenance_loop,
+                                                     name="AdvancedCacheMaintenance", daemon=True)
+                self._maintenance.start()
+    
+    def _writer_loop(self):
+        """حلقة الخيط الخلفي: كتابة دورية أو عند تراكم عدد كافٍ من القيم"""
+        while not self._closed:
+            self._write_event.wait(self.flush_interval)
+            self._write_event.clear()
+            self._drain_writes()
+    
+    def _maintenance_loop(self):
+        """حلقة خيط الصيانة: دورة كل sweep_interval ثانية حتى الإغلاق"""
+        while not self._closed:
+            self._maintenance_event.wait(self.sweep_interval)
+            if self._closed:
+                break
+            try:
+                self.maintain()
+            except Exception as e:
+                print(f"خطأ في صيانة التخزين المؤقت: {e}")
+    
+    def _wait_for_idle(self, idle: float) -> bool:
+        """الانتظار حتى تمر idle ثانية دون get/set؛ يعيد False عند الإغلاق"""
+        while not self._closed:
+            remaining = self._last_activity + idle - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(remaining)
+        return False
+    
+    def maintain(self, idle: Optional[float] = None) -> Dict[str, int]:
+        """
+        دورة صيانة للتخزين على القرص
         
-        # العثور على العنصر الأقدم
-        oldest_key = min(self.access_times.keys(), key=lambda k: self.access_times[k])
+        تحذف ملفات الطبقة القديمة (أول دورة فقط) والقيم المنتهية، ثم تزيل
+        الأقدم استخداماً حتى يقل الحجم عن
+        disk_quota_bytes، ثم تضغط الملف إذا حذف شيء. تعمل دفعات من
+        MAINTENANCE_BATCH قيمة لا تتجاوز MAINTENANCE_MAX_BATCHES، وتنتظر قبل كل
+        دفعة مرور idle ثانية (الافتراضي: MAINTENANCE_IDLE) دون get/set.
         
-        # إزالة العنصر
-        if oldest_key in self.memory_cache:
-            del self.memory_cache[oldest_key]
-        if oldest_key in self.access_times:
-            del self.access_times[oldest_key]
+        Returns:
+            عدد القيم المحذوفة لانتهاء صلاحيتها ولتطبيق الحصة، وعدد عمليات الضغط
+        """
+        idle = self.MAINTENANCE_IDLE if idle is None else idle
+        result = {'swept': 0, 'evicted': 0, 'compacted': 0}
         
-        self.stats['evictions'] += 1
+        # الكتابات المعلقة تحسب في الحصة، ووقت آخر قراءة يحدث عند الكتابة
+        self.flush()
+        
+        if not self._legacy_checked:
+            self._legacy_checked = True
+            result['swept'] += self._remove_legacy_files()
+        
+        for _ in range(self.MAINTENANCE_MAX_BATCHES):
+            if not self._wait_for_idle(idle):
+                return result
+            removed = self.backend.sweep_expired(self.MAINTENANCE_BATCH)
+            result['swept'] += removed
+            if removed < self.MAINTENANCE_BATCH:
+                break
+        
+        if self.disk_quota_bytes is not None:
+            for _ in range(self.MAINTENANCE_MAX_BATCHES):
+                if not self._wait_for_idle(idle):
+                    return result
+                removed = self.backend.evict_to_quota(self.disk_quota_bytes, self.MAINTENANCE_BATCH)
+                result['evicted'] += removed
+                if removed < self.MAINTENANCE_BATCH:
+                    break
+        
+        if (result['swept'] or result['evicted']) and self._wait_for_idle(idle):
+            result['compacted'] = int(self.backend.compact())
+        
+        self._count(swept_entries=result['swept'], disk_evictions=result['evicted'],
+                    compactions=result['compacted'])
+        return result
+    
+    def _remove_legacy_files(self) -> int:
+        """
+        حذف ملفات pickle التي تركتها الطبقة القديمة في مجلد التخزين
+        
+        مفاتيحها بصمات md5 للوسائط لا تطابق make_key، فلا تقرأ أبداً. لا يحذف
+        شيء إذا كانت الطبقة الحالية نفسها PickleDirBackend في المجلد ذاته.
+        """
+        if isinstance(self.backend, PickleDirBackend) and self.backend.cache_dir == self.cache_dir:
+            return 0
+        removed = 0
+        for cache_file in self.cache_dir.glob("*.pkl"):
+            try:
+                cache_file.unlink()
+                removed += 1
+            except OSError as e:
+                print(f"خطأ في حذف ملف التخزين المؤقت: {e}")
+        return removed
+    
+    def _drain_writes(self):
+        """تحويل القيم المعلقة إلى bytes وكتابتها على القرص دفعة واحدة"""
+        with self._drain_lock:
+            with self._write_lock:
+                if not self._pending_writes:
+                    return
+                # تبقى الدفعة مرئية لـ get() حتى تكتمل كتابتها
+                batch = self._inflight_writes = self._pending_writes
+                self._pending_writes = {}
+            
+            start_time = time.perf_counter()
+            items = []
+            for key, (data, expires_at) in batch.items():
+                try:
+                    items.append((key, self._encode(data), expires_at))
+                except Exception as e:
+                    print(f"خطأ في حفظ التخزين المؤقت: {e}")
+            
+            try:
+                self.backend.save_many(items)
+                self.backend.flush()
+                self._count(disk_writes=len(items), write_seconds=time.perf_counter() - start_time)
+            except Exception as e:
+                print(f"خطأ في حفظ التخزين المؤقت: {e}")
+            finally:
+                with self._write_lock:
+                    self._inflight_writes = {}
     
-    def _save_to_disk(self, key: str, data: Any):
-        """حفظ البيانات على القرص"""
+    def _encode(self, data: Any) -> bytes:
+        """تحويل البيانات إلى bytes مضغوطة حسب حجمها"""
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        codec = 'raw'
+        for threshold, name in self.compression:
+            if len(payload) >= threshold:
+                codec = name
+                break
+        
+        value = encode_entry(payload, codec)
+        self._count(raw_bytes_written=len(payload), stored_bytes_written=len(value))
+        return value
+    
+    def _pending_entry(self, key: str) -> Optional[tuple]:
+        """(القيمة، وقت انتهاء الصلاحية) لعنصر لم يكتب بعد على القرص، أو None"""
+        with self._write_lock:
+            entry = self._pending_writes.get(key) or self._inflight_writes.get(key)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry
+    
+    def make_key(self, func: Callable, args: tuple, kwargs: dict, fingerprint: str = "") -> str:
+        """
+        توليد مفتاح ثابت عبر العمليات والجلسات
+        
+        يتكون من هوية الدالة (الوحدة والاسم المؤهل) وبصمة محتوى الوسائط وبصمة
+        الإعدادات، ولا يدخل فيه عنوان أي كائن في الذاكرة (مثل self).
+        """
+        parts = [f"{func.__module__}.{func.__qualname__}", fingerprint]
+        parts.extend(_stable_repr(arg) for arg in args)
+        parts.extend(f"{name}={_stable_repr(value)}" for name, value in sorted(kwargs.items()))
+        return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).hexdigest()
+    
+    def set_group_budget(self, group: str, fraction: float):
+        """
+        تحديد حصة مجموعة من ميزانية البايتات
+        
+        Args:
+            group: اسم المجموعة (اسم الدالة المخزنة نتائجها)
+            fraction: النسبة من max_bytes (بين 0 و 1)
+        """
+        self.group_budgets[group] = fraction
+    
+    def _save_to_disk(self, key: str, data: Any, ttl: Optional[float] = None):
+        """حفظ البيانات على القرص (أو جدولتها للخيط الخلفي)"""
+        if self._closed:
+            return
+        
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        if self.write_behind:
+            with self._write_lock:
+                coalesced = key in self._pending_writes
+                self._pending_writes[key] = (data, expires_at)
+                self._ensure_writer()
+                self._ensure_maintenance()
+                if len(self._pending_writes) >= self.write_batch_size:
+                    self._write_event.set()
+            if coalesced:
+                self._count(coalesced_writes=1)
+            return
+        
+        self._ensure_maintenance()
         try:
-            cache_file = self.cache_dir / f"{key}.pkl"
-            with open(cache_file, 'wb') as f:
-                pickle.dump({
-                    'data': data,
-                    'timestamp': time.time()
-                }, f)
-            self.stats['disk_writes'] += 1
+            start_time = time.perf_counter()
+            self.backend.save(key, self._encode(data), expires_at)
+            self._count(disk_writes=1, write_seconds=time.perf_counter() - start_time)
         except Exception as e:
             print(f"خطأ في حفظ التخزين المؤقت: {e}")
     
-    def _load_from_disk(self, key: str) -> Optional[Any]:
-        """تحميل البيانات من القرص"""
+    def _load_from_disk(self, key: str) -> Optional[tuple]:
+        """تحميل (البيانات، وقت انتهاء الصلاحية) من القرص، أو None"""
         try:
-            cache_file = self.cache_dir / f"{key}.pkl"
-            if not cache_file.exists():
+            # الطبقة تتحقق من انتهاء الصلاحية وتحذف القيم المنتهية
+            start_time = time.perf_counter()
+            entry = self.backend.load_entry(key)
+            if entry is None:
                 return None
             
-            with open(cache_file, 'rb') as f:
-                cached_data = pickle.load(f)
-            
-            # التحقق من انتهاء الصلاحية
-            if self._is_expired(cached_data['timestamp']):
-                cache_file.unlink()  # حذف الملف المنتهي الصلاحية
-                return None
-            
-            self.stats['disk_reads'] += 1
-            return cached_data['data']
+            value, expires_at = entry
+            data = pickle.loads(decode_entry(value))
+            self._count(disk_reads=1, stored_bytes_read=len(value),
+                        read_seconds=time.perf_counter() - start_time)
+            return data, expires_at
         except Exception as e:
             print(f"خطأ في تحميل التخزين المؤقت: {e}")
             return None
     
-    def get(self, key: str) -> Optional[Any]:
-        """الحصول على عنصر من التخزين المؤقت"""
-        with self.lock:
-            # البحث في الذاكرة أولاً
-            if key in self.memory_cache:
-                if not self._is_expired(self.access_times[key]):
-                    self.access_times[key] = time.time()
-                    self.stats['hits'] += 1
-                    return self.memory_cache[key]['data']
-                else:
-                    # إزالة العنصر المنتهي الصلاحية
-                    del self.memory_cache[key]
-                    del self.access_times[key]
+    def get(self, key: str, default: Any = None, group: str = "") -> Any:
+        """
+        الحصول على عنصر من التخزين المؤقت
+        
+        Args:
+            key: مفتاح العنصر
+            default: القيمة المعادة عند عدم وجوده (MISSING للتمييز بين الغياب وقيمة None مخزنة)
+            group: المجموعة التي يحاسب عليها العنصر عند إعادة تحميله من القرص
+        """
+        self._last_activity = time.monotonic()
+        shard = self._shard(key)
+        memory_tier = self.memory_tier
+        if memory_tier:
+            with shard.lock:
+                # البحث في الذاكرة أولاً
+                data = shard.lookup(key)
+                if data is not MISSING:
+                    shard.stats['hits'] += 1
+                    return data
+        
+        # البحث في الكتابات المعلقة ثم على القرص (خارج قفل الجزء)
+        disk_entry = None
+        if self.disk_tier:
+            disk_entry = self._pending_entry(key)
+            if disk_entry is None:
+                disk_entry = self._load_from_disk(key)
+        
+        with shard.lock:
+            # قد يكون خيط آخر حفظ قيمة أحدث أثناء القراءة من القرص
+            data = shard.lookup(key) if memory_tier else MISSING
+            if data is not MISSING:
+                shard.stats['hits'] += 1
+                return data
             
-            # البحث على القرص
-            disk_data = self._load_from_disk(key)
-            if disk_data is not None:
-                # إعادة تخزين في الذاكرة
-                self.memory_cache[key] = {'data': disk_data}
-                self.access_times[key] = time.time()
-                self.stats['hits'] += 1
-                return disk_data
+            if disk_entry is None:
+                shard.stats['misses'] += 1
+                return default
             
-            self.stats['misses'] += 1
-            return None
+            # إعادة تخزين في الذاكرة للمدة المتبقية من صلاحيته
+            disk_data, expires_at = disk_entry
+            if memory_tier:
+                shard.store(key, disk_data, group, expires_at - time.time())
+            shard.stats['hits'] += 1
+        
+        if memory_tier:
+            self._enforce_budget(group)
+        return disk_data
     
-    def set(self, key: str, data: Any):
-        """حفظ عنصر في التخزين المؤقت"""
-        with self.lock:
-            # التحقق من الحد الأقصى
-            if len(self.memory_cache) >= self.max_size:
-                self._evict_lru()
+    def set(self, key: str, data: Any, group: str = "", ttl: Optional[float] = None):
+        """
+        حفظ عنصر في التخزين المؤقت
+        
+        Args:
+            key: مفتاح العنصر
+            data: البيانات
+            group: المجموعة التي يحاسب عليها حجم العنصر
+            ttl: وقت انتهاء صلاحية هذا العنصر بالثواني (الافتراضي: ttl العام)
+        """
+        self._last_activity = time.monotonic()
+        if self.memory_tier:
+            shard = self._shard(key)
+            with shard.lock:
+                # حفظ في الذاكرة
+                shard.store(key, data, group, ttl)
+            self._enforce_budget(group)
+        
+        # حفظ على القرص أيضاً
+        if self.disk_tier:
+            self._save_to_disk(key, data, ttl)
+    
+    def contains(self, key: str) -> bool:
+        """هل للمفتاح قيمة صالحة في الذاكرة أو الكتابات المعلقة أو على القرص"""
+        shard = self._shard(key)
+        with shard.lock:
+            if shard.lookup(key) is not MISSING:
+                return True
+        return self._pending_entry(key) is not None or self.backend.load_entry(key) is not None
+    
+    def preload(self, items: Iterable[Tuple[str, Any, Optional[float]]], batch_size: int = 1000) -> int:
+        """
+        تحميل قيم محسوبة مسبقاً إلى القرص مباشرة دفعات (دون المرور بالذاكرة)
+        
+        Args:
+            items: ثلاثيات (المفتاح، البيانات، ttl أو None للقيمة العامة)
+            batch_size: عدد القيم في كل دفعة كتابة
             
-            # حفظ في الذاكرة
-            self.memory_cache[key] = {'data': data}
-            self.access_times[key] = time.time()
+        Returns:
+            عدد القيم المكتوبة
+        """
+        written = 0
+        batch = []
+        
+        def write_batch():
+            self._ensure_maintenance()
+            start_time = time.perf_counter()
+            self.backend.save_many((key, self._encode(data), expires_at)
+                                   for key, data, expires_at in batch)
+            self.backend.flush()
+            self._count(disk_writes=len(batch), write_seconds=time.perf_counter() - start_time)
+        
+        # البيانات قد تحسب أثناء المرور على items، فلا يدخل زمن حسابها في زمن الكتابة
+        for key, data, ttl in items:
+            batch.append((key, data, time.time() + (self.ttl if ttl is None else ttl)))
+            if len(batch) >= batch_size:
+                write_batch()
+                written += len(batch)
+                batch = []
+        
+        if batch:
+            write_batch()
+            written += len(batch)
+        
+        return written
+    
+    def single_flight(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        تنفيذ compute مرة واحدة للمفتاح مهما تعدد المستدعون المتزامنون
+        
+        المستدعي الأول يحسب النتيجة، وينتظرها الآخرون ثم يعيدونها، وإن فشل
+        الحساب رفع الخطأ نفسه لجميعهم.
+        """
+        with self._flight_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        
+        if not leader:
+            # استدعاء متداخل من الخيط نفسه لا ينتظر نفسه
+            if flight.owner == threading.get_ident():
+                return compute()
             
-            # حفظ على القرص أيضاً
-            self._save_to_disk(key, data)
+            self._count(coalesced=1)
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
+        try:
+            flight.result = compute()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flight_lock:
+                del self._flights[key]
+            flight.event.set()
+    
+    def _enforce_budget(self, group: str):
+        """إزالة الأقل استخداماً من الأجزاء كلها حتى يعود الحجم الإجمالي وحصة group ضمن الميزانية"""
+        for scope in (None, group):
+            while self.budget.exceeded(scope):
+                if not self._evict_oldest(scope):
+                    break
+    
+    def _evict_oldest(self, group: Optional[str]) -> bool:
+        """
+        إزالة العنصر الأقدم استخداماً بين الأجزاء (في المجموعة group إن حددت)
+        
+        تقفل الأجزاء واحداً تلو الآخر فلا يمسك قفلان معاً.
+        """
+        victim, oldest = None, None
+        for shard in self.shards:
+            with shard.lock:
+                access_time = shard.oldest_access(group)
+            if access_time is not None and (oldest is None or access_time < oldest):
+                victim, oldest = shard, access_time
+        if victim is None:
+            return False
+        
+        with victim.lock:
+            if group is None:
+                victim.evict_lru()
+            elif victim.groups.get(group):
+                victim.evict_group_lru(group)
+        return True
+    
+    def shrink(self, fraction: float = 0.5) -> int:
+        """
+        تقليص عناصر الذاكرة في كل جزء إلى fraction من عددها بإزالة الأقل استخداماً
+        (تبقى القيم على القرص)، ويعيد عدد العناصر المزالة
+        """
+        removed = 0
+        for shard in self.shards:
+            with shard.lock:
+                target = int(len(shard.memory_cache) * fraction)
+                while len(shard.memory_cache) > target:
+                    shard.evict_lru()
+                    removed += 1
+        return removed
+    
+    def clear_memory(self):
+        """مسح الذاكرة فقط مع إبقاء القيم على القرص"""
+        for shard in self.shards:
+            with shard.lock:
+                shard.clear()
     
     def clear(self):
         """مسح التخزين المؤقت بالكامل"""
-        with self.lock:
-            self.memory_cache.clear()
-            self.access_times.clear()
-            
-            # مسح ملفات القرص
-            for cache_file in self.cache_dir.glob("*.pkl"):
-                try:
-                    cache_file.unlink()
-                except Exception as e:
-                    print(f"خطأ في حذف ملف التخزين المؤقت: {e}")
+        self.clear_memory()
+        
+        # مسح الكتابات المعلقة وطبقة القرص
+        with self._drain_lock:
+            with self._write_lock:
+                self._pending_writes.clear()
+            self.backend.clear()
+    
+    def flush(self):
+        """كتابة أي قيم معلقة على القرص"""
+        self._drain_writes()
+        self.backend.flush()
+    
+    def close(self):
+        """إيقاف الخيوط الخلفية وكتابة القيم المعلقة وإغلاق طبقة القرص"""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_event.set()
+        self._maintenance_event.set()
+        for thread in (self._writer, self._maintenance):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+        self._drain_writes()
+        self.backend.close()
     
     def get_stats(self) -> Dict[str, Any]:
         """الحصول على إحصائيات التخزين المؤقت"""
-        total_requests = self.stats['hits'] + self.stats['misses']
-        hit_rate = (self.stats['hits'] / total_requests * 100) if total_requests > 0 else 0
+        stats = self.stats
+        total_requests = stats['hits'] + stats['misses']
+        hit_rate = (stats['hits'] / total_requests * 100) if total_requests > 0 else 0
+        
+        groups: Dict[str, Dict[str, Any]] = {}
+        for shard in self.shards:
+            with shard.lock:
+                for group, keys in shard.groups.items():
+                    if not keys:
+                        continue
+                    totals = groups.setdefault(group, {'items': 0, 'bytes': 0, 'budget': None})
+                    totals['items'] += len(keys)
+                    totals['bytes'] += shard.group_bytes[group]
+                    totals['budget'] = self.budget.group_limit(group)
         
         return {
             'hit_rate': hit_rate,
-            'memory_items': len(self.memory_cache),
-            'disk_files': len(list(self.cache_dir.glob("*.pkl"))),
-            **self.stats
+            'compression_ratio': (stats['raw_bytes_written'] / stats['stored_bytes_written']
+                                  if stats['stored_bytes_written'] else 1.0),
+            # الإنتاجية بالميغابايت في الثانية (حجم البيانات المخزنة على القرص)
+            'write_mb_per_second': (stats['stored_bytes_written'] / stats['write_seconds'] / 1e6
+                                    if stats['write_seconds'] else 0.0),
+            'read_mb_per_second': (stats['stored_bytes_read'] / stats['read_seconds'] / 1e6
+                                   if stats['read_seconds'] else 0.0),
+            'memory_items': sum(len(shard.memory_cache) for shard in self.shards),
+            'memory_bytes': sum(shard.memory_bytes for shard in self.shards),
+            'max_bytes': self.max_bytes,
+            'shards': len(self.shards),
+            'strategy': self.strategy,
+            'groups': groups,
+            'pending_writes': len(self._pending_writes),
+            'disk_files': self.backend.count(),
+            'disk_bytes': self.backend.size_bytes(),
+            **stats
         }
 
 
-def cached(cache: AdvancedCache, ttl: Optional[int] = None):
-    """ديكوراتور للتخزين المؤقت"""
+def estimate_words(text: str) -> int:
+    """عدد تقريبي للكلمات من عدد المسافات وفواصل الأسطر (دون تقسيم النص)"""
+    return text.count(' ') + text.count('\n') + 1
+
+
+def estimate_size(obj: Any) -> int:
+    """تقدير تقريبي لحجم كائن في الذاكرة بالبايت (يشمل محتوى الحاويات)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in obj)
+    return size
+
+
+def _hash_bytes(data: bytes) -> str:
+    """بصمة سريعة لمحتوى ثنائي"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _stable_repr(value: Any) -> str:
+    """تمثيل ثابت لوسيط لا يعتمد على عنوان الذاكرة"""
+    if isinstance(value, str):
+        return 's:' + _hash_bytes(value.encode('utf-8'))
+    if isinstance(value, bytes):
+        return 'b:' + _hash_bytes(value)
+    if value is None or isinstance(value, (bool, int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join(_stable_repr(item) for item in value) + ']'
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+        return '{' + ','.join(f"{_stable_repr(k)}:{_stable_repr(v)}" for k, v in items) + '}'
+    
+    # التمثيل الافتراضي للكائنات يتضمن عنوانها في الذاكرة، فيكتفى بنوعها
+    value_type = type(value)
+    if value_type.__repr__ is object.__repr__:
+        return f"{value_type.__module__}.{value_type.__qualname__}"
+    return repr(value)
+
+
+# (رقم نسخة الإعدادات، البصمة) لآخر بصمة محسوبة
+_fingerprint_memo: Tuple[int, str] = (-1, "")
+
+
+def arabic_settings_fingerprint() -> str:
+    """
+    بصمة إعدادات المعالجة العربية (تتغير نتائج التطبيع والتقطيع بتغيرها)
+    
+    تحسب مرة واحدة لكل نسخة من الإعدادات (settings_manager.version).
+    """
+    global _fingerprint_memo
+    if settings_manager is None:
+        return ""
+    version, fingerprint = _fingerprint_memo
+    if version != settings_manager.version:
+        category = settings_manager.get_category('arabic_processing')
+        version = settings_manager.version
+        fingerprint = _hash_bytes(repr(sorted(category.items())).encode('utf-8'))
+        _fingerprint_memo = (version, fingerprint)
+    return fingerprint
+
+
+def cached(cache: AdvancedCache, ttl: Optional[int] = None,
+           fingerprint: Optional[Callable[[], str]] = None, budget: Optional[float] = None,
+           negative_ttl: Optional[int] = None, is_negative: Callable[[Any], bool] = lambda result: result is None,
+           key_args: Optional[Callable[..., Tuple[tuple, dict]]] = None):
+    """
+    ديكوراتور للتخزين المؤقت
+    
+    Args:
+        cache: نظام التخزين المؤقت
+        ttl: وقت انتهاء الصلاحية (الافتراضي: ttl نظام التخزين)
+        fingerprint: دالة تعيد بصمة الحالة التي تؤثر في النتيجة (مثل الإعدادات)
+        budget: حصة نتائج الدالة من ميزانية البايتات (نسبة بين 0 و 1)
+        negative_ttl: مدة تخزين النتائج السلبية (None: لا تخزن)
+        is_negative: دالة تحدد النتائج السلبية (الافتراضي: None)
+        key_args: دالة تعيد (args, kwargs) موحدة للمفتاح (مثل إبدال الإعدادات بقيم None)،
+            فتشترك الاستدعاءات المتكافئة في نتيجة واحدة
+    """
     def decorator(func: Callable) -> Callable:
+        group = func.__qualname__
+        if budget is not None:
+            cache.set_group_budget(group, budget)
+        
+        def cache_key(*args, **kwargs) -> str:
+            """مفتاح نتيجة الاستدعاء في التخزين المؤقت"""
+            if key_args is not None:
+                args, kwargs = key_args(*args, **kwargs)
+            return cache.make_key(func, args, kwargs, fingerprint() if fingerprint else "")
+        
+        def store_ttl(result: Any) -> Optional[float]:
+            """مدة تخزين النتيجة بالثواني، أو None إذا كانت لا تخزن"""
+            if not is_negative(result):
+                return cache.ttl if ttl is None else ttl
+            return negative_ttl
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # توليد المفتاح
-            key = cache._generate_key(func.__name__, *args, **kwargs)
+            key = cache_key(*args, **kwargs)
             
             # محاولة الحصول من التخزين المؤقت
-            result = cache.get(key)
-            if result is not None:
+            result = cache.get(key, MISSING, group)
+            if result is not MISSING:
                 return result
             
-            # تنفيذ الدالة وحفظ النتيجة
-            result = func(*args, **kwargs)
-            cache.set(key, result)
-            return result
+            def compute():
+                # تنفيذ الدالة وحفظ النتيجة
+                result = func(*args, **kwargs)
+                result_ttl = store_ttl(result)
+                if result_ttl is not None:
+                    cache.set(key, result, group, result_ttl)
+                return result
+            
+            # المستدعون المتزامنون للمفتاح نفسه ينتظرون نتيجة الحساب الأول
+            return cache.single_flight(key, compute)
         
+        # واجهة للتحميل المسبق (مثل utils/cache_warmup.py) وللمسارات غير المتزامنة
+        wrapper.cache = cache
+        wrapper.cache_group = group
+        wrapper.cache_key = cache_key
+        wrapper.store_ttl = store_ttl
+        wrapper.uncached = func
         return wrapper
     return decorator
 
 
+class WorkerTask(NamedTuple):
+    """
+    وصف مهمة قابل للتسلسل للمعالجة في عمليات منفصلة
+    
+    يستدعي func (دالة على مستوى الوحدة) لكل عنصر مع args وkwargs الثابتة، بدلاً
+    من الدوال المجهولة (lambda) والدوال المحلية التي لا يمكن إرسالها إلى العمليات.
+    """
+    func: Callable
+    args: tuple = ()
+    kwargs: Optional[Dict[str, Any]] = None
+    
+    def __call__(self, item: Any) -> Any:
+        return self.func(item, *self.args, **(self.kwargs or {}))
+
+
+class MapResult(NamedTuple):
+    """نتيجة عنصر واحد من imap: موضعه في المدخلات وقيمته أو الخطأ الذي أثاره"""
+    index: int
+    value: Any = None
+    error: Optional[BaseException] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _TimedTask(NamedTuple):
+    """تغليف مهمة لقياس زمن تنفيذها داخل العامل نفسه (دون زمن الانتظار والإرسال)"""
+    func: Callable
+    
+    def __call__(self, item: Any) -> Tuple[Any, float]:
+        start_time = time.perf_counter()
+        result = self.func(item)
+        return result, time.perf_counter() - start_time
+
+
+class ChunkSizer:
+    """
+    ضبط حجم الأجزاء أثناء التشغيل من الزمن المقاس لمعالجة كل جزء
+    
+    يحتفظ بمتوسط متحرك لسرعة المعالجة (كلمة/ثانية)، ويختار حجماً يستغرق
+    target_seconds تقريباً لتوزيع تكلفة الإرسال والجدولة، دون أن يقل عدد الأجزاء
+    عن CHUNKS_PER_WORKER لكل عامل حتى يبقى جميع العمال مشغولين.
+    """
+    
+    CHUNKS_PER_WORKER = 4
+    
+    def __init__(self, min_size: int = 50, max_size: int = 100000, smoothing: float = 0.3):
+        """
+        Args:
+            min_size: أصغر حجم للجزء بالكلمات
+            max_size: أكبر حجم للجزء بالكلمات
+            smoothing: وزن القياس الجديد في المتوسط المتحرك
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.rate: Optional[float] = None
+        self.chunk_seconds: Optional[float] = None
+        self.sizes = deque(maxlen=32)
+        self.lock = threading.Lock()
+    
+    def size_for(self, total_units: int, workers: int, target_seconds: float, initial: int) -> int:
+        """
+        حجم الجزء للعمل التالي
+        
+        Args:
+            total_units: عدد الكلمات الإجمالي (تقديري)
+            workers: عدد العمال
+            target_seconds: الزمن المستهدف لمعالجة جزء واحد
+            initial: الحجم المستخدم قبل أول قياس
+        """
+        with self.lock:
+            size = initial if self.rate is None else int(self.rate * target_seconds)
+            busy_limit = -(-total_units // (workers * self.CHUNKS_PER_WORKER))
+            size = max(self.min_size, min(size, busy_limit, self.max_size))
+            self.sizes.append(size)
+            return size
+    
+    def record(self, units: int, seconds: float):
+        """تسجيل زمن معالجة جزء من units كلمة"""
+        if units <= 0 or seconds <= 0:
+            return
+        with self.lock:
+            rate = units / seconds
+            if self.rate is None:
+                self.rate, self.chunk_seconds = rate, seconds
+            else:
+                self.rate += self.smoothing * (rate - self.rate)
+                self.chunk_seconds += self.smoothing * (seconds - self.chunk_seconds)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """السرعة المقاسة والأحجام المختارة مؤخراً"""
+        with self.lock:
+            return {
+                'words_per_second': self.rate,
+                'chunk_seconds': self.chunk_seconds,
+                'last_size': self.sizes[-1] if self.sizes else None,
+                'recent_sizes': list(self.sizes),
+            }
+
+
+def current_rss() -> Optional[int]:
+    """الذاكرة المقيمة (RSS) للعملية الحالية بالبايت، أو None إذا تعذر قياسها"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+class MemoryMonitor:
+    """
+    مراقبة ذاكرة العملية أثناء المهام الكبيرة
+    
+    تعد العمليات المنجزة (tick) وتشغل جمع المهملات كل gc_threshold عملية، وتقيس
+    الذاكرة المقيمة كل SAMPLE_INTERVAL ثانية على الأكثر. عند بلوغ HIGH_WATER من
+    memory_limit_mb تستدعى دوال التحرير المسجلة (تقليص التخزين المؤقت) ويبقى الضغط
+    مفعلاً، فتقلل imap المهام الجارية، حتى تنخفض الذاكرة تحت LOW_WATER. أثناء الضغط
+    لا يتكرر التحرير إلا إذا زادت الذاكرة RELEASE_GROWTH من الحد منذ آخر تحرير أو
+    مرت RELEASE_INTERVAL ثانية عليه.
+    """
+    
+    # نسب من الحد: بداية الضغط ونهايته
+    HIGH_WATER = 0.9
+    LOW_WATER = 0.75
+    
+    # أقل مدة بالثواني بين قياسين للذاكرة
+    SAMPLE_INTERVAL = 0.05
+    
+    # تكرار التحرير أثناء الضغط: زيادة (نسبة من الحد) أو مدة بالثواني منذ آخر تحرير
+    RELEASE_GROWTH = 0.05
+    RELEASE_INTERVAL = 5.0
+    
+    def __init__(self, limit_bytes: Optional[int] = None, gc_threshold: Optional[int] = None):
+        """
+        Args:
+            limit_bytes: حد الذاكرة بالبايت (الافتراضي: الإعداد memory_limit_mb)
+            gc_threshold: عدد العمليات بين جمعين للمهملات (الافتراضي: الإعداد gc_threshold)
+        """
+        self._limit_bytes = limit_bytes
+        self._gc_threshold = gc_threshold
+        self._lock = threading.Lock()
+        self._release_lock = threading.Lock()
+        self._operations = 0
+        self._last_sample = 0.0
+        self._released_rss = 0
+        self._released_at = 0.0
+        self._callbacks: list = []
+        self.under_pressure = False
+        self.stats = {
+            'current_rss': 0,
+            'peak_rss': 0,
+            'gc_runs': 0,
+            'gc_collected': 0,
+            # مرات بلوغ HIGH_WATER، ومرات التحرير، والعناصر المحررة
+            'pressure_events': 0,
+            'releases': 0,
+            'released_items': 0,
+            # مهام أجل إرسالها بسبب الضغط
+            'throttled': 0
+        }
+    
+    @property
+    def limit_bytes(self) -> Optional[int]:
+        """حد الذاكرة بالبايت (None أو 0: بلا حد)"""
+        if self._limit_bytes is not None:
+            return self._limit_bytes
+        return _performance_setting('memory_limit_mb', 512) * 1024 * 1024
+    
+    @property
+    def gc_threshold(self) -> int:
+        if self._gc_threshold is not None:
+            return self._gc_threshold
+        return _performance_setting('gc_threshold', 1000)
+    
+    def on_pressure(self, callback: Callable[[], Optional[int]]):
+        """
+        تسجيل دالة تحرر ذاكرة عند الضغط وتعيد عدد العناصر المحررة
+        
+        الدوال المرتبطة بكائن تحفظ بمرجع ضعيف فلا تبقي الكائن حياً.
+        """
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        with self._lock:
+            self._callbacks.append(ref)
+    
+    def tick(self, operations: int = 1) -> bool:
+        """
+        تسجيل عمليات منجزة (آمن من عدة خيوط)
+        
+        Returns:
+            True إذا كانت الذاكرة تحت الضغط
+        """
+        with self._lock:
+            before = self._operations
+            self._operations += operations
+            threshold = self.gc_threshold
+            collect = threshold > 0 and self._operations // threshold > before // threshold
+        if collect:
+            collected = gc.collect()
+            with self._lock:
+                self.stats['gc_runs'] += 1
+                self.stats['gc_collected'] += collected
+        return self.check()
+    
+    def check(self, force: bool = False) -> bool:
+        """
+        قياس الذاكرة (إذا مرت SAMPLE_INTERVAL أو force) وتحرير الذاكرة عند الضغط
+        
+        يحرر عند بداية الضغط، ثم مرة أخرى فقط إذا زادت الذاكرة RELEASE_GROWTH من
+        الحد منذ آخر تحرير أو مرت عليه RELEASE_INTERVAL ثانية.
+        
+        Returns:
+            True إذا كانت الذاكرة تحت الضغط
+        """
+        limit = self.limit_bytes
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sample < self.SAMPLE_INTERVAL:
+                return self.under_pressure
+            self._last_sample = now
+            rss = current_rss()
+            if rss is None:
+                return False
+            self.stats['current_rss'] = rss
+            self.stats['peak_rss'] = max(self.stats['peak_rss'], rss)
+            if not limit:
+                self.under_pressure = False
+                return False
+            
+            release = False
+            if rss >= limit * self.HIGH_WATER:
+                if not self.under_pressure:
+                    self.under_pressure = True
+                    self.stats['pressure_events'] += 1
+                    release = True
+                else:
+                    release = (rss >= self._released_rss + limit * self.RELEASE_GROWTH
+                               or now - self._released_at >= self.RELEASE_INTERVAL)
+                if release:
+                    self._released_rss = rss
+                    self._released_at = now
+            elif self.under_pressure and rss < limit * self.LOW_WATER:
+                self.under_pressure = False
+        
+        if release:
+            self.release()
+        return self.under_pressure
+    
+    def release(self) -> int:
+        """استدعاء دوال التحرير المسجلة ثم جمع المهملات؛ يعيد عدد العناصر المحررة"""
+        # تحرير واحد في كل مرة (الخيوط الأخرى لا تنتظره)
+        if not self._release_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                callbacks = list(self._callbacks)
+            released = 0
+            for ref in callbacks:
+                callback = ref()
+                if callback is None:
+                    with self._lock:
+                        self._callbacks.remove(ref)
+                    continue
+                released += callback() or 0
+            gc.collect()
+            with self._lock:
+                self.stats['releases'] += 1
+                self.stats['released_items'] += released
+            return released
+        finally:
+            self._release_lock.release()
+    
+    def throttle(self) -> bool:
+        """True إذا وجب تأجيل إرسال مهمة جديدة بسبب الضغط (ويسجل التأجيل)"""
+        if not self.under_pressure:
+            return False
+        with self._lock:
+            self.stats['throttled'] += 1
+        return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """إحصائيات الذاكرة (الأحجام بالميغابايت)"""
+        limit = self.limit_bytes
+        with self._lock:
+            stats = dict(self.stats)
+        mb = 1024 * 1024
+        return {
+            **stats,
+            'current_rss_mb': stats['current_rss'] / mb,
+            'peak_rss_mb': stats['peak_rss'] / mb,
+            'limit_mb': limit / mb if limit else None,
+            'under_pressure': self.under_pressure,
+            'operations': self._operations,
+            'gc_threshold': self.gc_threshold
+        }
+
+
+def _task_name(func: Callable) -> str:
+    """اسم ثابت للمهمة يجمع قياسات أحجام أجزائها"""
+    func = getattr(func, 'func', func)
+    return f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__name__)}"
+
+
 class PerformanceOptimizer:
-    """محسن الأداء للنصوص الكبيرة"""
+    """
+    محسن الأداء للنصوص الكبيرة
+    
+    مجمعات الخيوط والعمليات تنشأ عند أول استخدام، وتعاد تهيئتها عند تغير عدد
+    العمال (resize() أو الإعداد max_workers) فلا يكلف الاستيراد شيئاً. يختار
+    process_text_parallel وbatch_process نوع المجمع حسب نمط المعالجة (EXECUTORS).
+    تسجل العناصر المنجزة في مراقب الذاكرة (memory)، وتقلل imap المهام الجارية
+    إلى مهمة واحدة ما دامت الذاكرة تحت الضغط.
+    """
+    
+    # نوع المجمع لكل نمط معالجة: العمليات تستفيد من جميع المعالجات، والخيوط
+    # تعمل داخل العملية الرئيسية بتخزينها المؤقت ومحللاتها المحملة
+    # ('auto': عمليات فقط عندما تكفي العناصر لتشغيل جميع العمال)
+    EXECUTORS = {
+        'fast': 'process',
+        'balanced': 'auto',
+        'accurate': 'thread',
+    }
+    
+    # عدد مجمعات العمليات المحتفظ بها (مجمع لكل دالة تهيئة ومعاملاتها)؛ يغلق
+    # الأقدم استخداماً عند تجاوزه حتى لا تتراكم العمليات العاملة
+    MAX_PROCESS_POOLS = 2
     
     def __init__(self, max_workers: Optional[int] = None):
         """
@@ -206,18 +1392,301 @@ class PerformanceOptimizer:
         
         Args:
             max_workers: الحد الأقصى لعدد العمال المتوازيين
+                (الافتراضي: الإعداد max_workers، أو عدد المعالجات)
         """
-        self.max_workers = max_workers or multiprocessing.cpu_count()
-        self.thread_pool = ThreadPoolExecutor(max_workers=self.max_workers)
-        self.process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._max_workers = max_workers
+        self._pool_lock = threading.Lock()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        # ((عدد العمال، initializer، initargs)، المجمع)، الأحدث استخداماً في النهاية
+        self._process_pools: List[Tuple[tuple, ProcessPoolExecutor]] = []
+        self._pool_configs: Dict[str, tuple] = {}
+        
+        # أحجام الأجزاء المتكيفة لكل مهمة
+        self.chunk_sizers: Dict[str, ChunkSizer] = {}
+        
+        # مراقبة الذاكرة وجمع المهملات (الإعدادان memory_limit_mb وgc_threshold)
+        self.memory = MemoryMonitor()
         
         # إحصائيات الأداء
         self.stats = {
             'parallel_operations': 0,
             'total_time_saved': 0,
-            'texts_processed': 0
+            'texts_processed': 0,
+            'pools_created': 0,
+            'process_operations': 0
         }
     
+    @property
+    def max_workers(self) -> int:
+        """عدد العمال: المحدد عند الإنشاء أو في resize()، وإلا فالإعداد الحالي"""
+        if self._max_workers:
+            return self._max_workers
+        return _performance_setting('max_workers', multiprocessing.cpu_count())
+    
+    def _pool(self, attr: str, factory: Callable, config: tuple = ()):
+        """المجمع المخزن في attr، ينشأ عند أول طلب أو عند تغير عدد العمال أو config"""
+        config = (self.max_workers,) + config
+        with self._pool_lock:
+            pool = getattr(self, attr)
+            if pool is not None and self._pool_configs[attr] != config:
+                # المهام الجارية تكتمل في المجمع القديم دون انتظارها
+                pool.shutdown(wait=False)
+                pool = None
+            if pool is None:
+                pool = factory(max_workers=config[0])
+                setattr(self, attr, pool)
+                self._pool_configs[attr] = config
+                self.stats['pools_created'] += 1
+            return pool
+    
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """التخلي عن مجمع عمليات معطل (توقف أحد عماله) ليعاد إنشاؤه عند الطلب التالي"""
+        with self._pool_lock:
+            for index, (_, candidate) in enumerate(self._process_pools):
+                if candidate is pool:
+                    del self._process_pools[index]
+                    pool.shutdown(wait=False)
+                    break
+    
+    @property
+    def thread_pool(self) -> ThreadPoolExecutor:
+        """مجمع الخيوط (ينشأ عند أول استخدام)"""
+        return self._pool('_thread_pool', ThreadPoolExecutor)
+    
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        """مجمع العمليات دون دالة تهيئة (ينشأ عند أول استخدام)"""
+        return self.get_process_pool()
+    
+    def get_process_pool(self, initializer: Optional[Callable] = None,
+                         initargs: tuple = ()) -> ProcessPoolExecutor:
+        """
+        مجمع العمليات المهيأ بدالة التهيئة المعطاة
+        
+        تنفذ دالة التهيئة مرة واحدة في كل عملية عاملة، وتبقى العمليات لاستدعاءات
+        لاحقة بالتهيئة نفسها. لكل (initializer, initargs) مجمعه، فلا يعيد التناوب
+        بين مهام بتهيئات مختلفة إنشاء العمليات، ويغلق الأقدم استخداماً إذا زاد
+        عددها على MAX_PROCESS_POOLS.
+        """
+        config = (self.max_workers, initializer, initargs)
+        with self._pool_lock:
+            for index, (pool_config, pool) in enumerate(self._process_pools):
+                if pool_config[1:] == config[1:]:
+                    del self._process_pools[index]
+                    if pool_config[0] == config[0]:
+                        self._process_pools.append((pool_config, pool))
+                        return pool
+                    # تغير عدد العمال: المهام الجارية تكتمل في المجمع القديم
+                    pool.shutdown(wait=False)
+                    break
+            
+            pool = ProcessPoolExecutor(max_workers=config[0], initializer=initializer,
+                                       initargs=initargs)
+            self._process_pools.append((config, pool))
+            self.stats['pools_created'] += 1
+            while len(self._process_pools) > self.MAX_PROCESS_POOLS:
+                _, oldest = self._process_pools.pop(0)
+                oldest.shutdown(wait=False)
+            return pool
+    
+    def choose_executor(self, func: Callable, item_count: int, mode: Any = None) -> str:
+        """
+        اختيار نوع المجمع ('process' أو 'thread') حسب نمط المعالجة
+        
+        Args:
+            func: الدالة المطلوب تنفيذها (العمليات تتطلب دالة قابلة للتسلسل)
+            item_count: عدد العناصر
+            mode: نمط المعالجة (ProcessingMode أو قيمته النصية؛ الافتراضي: الإعداد processing_mode)
+        """
+        if mode is None:
+            mode = _performance_setting('processing_mode', 'balanced')
+        executor = self.EXECUTORS.get(getattr(mode, 'value', mode), 'auto')
+        if executor == 'auto':
+            executor = 'process' if item_count >= self.max_workers > 1 else 'thread'
+        
+        if executor == 'process':
+            try:
+                pickle.dumps(func)
+            except Exception:
+                # الدوال المحلية وlambda لا تصل إلى العمليات
+                return 'thread'
+        return executor
+    
+    def chunk_size_for(self, func: Callable, total_units: int, initial: Optional[int] = None) -> int:
+        """
+        حجم الجزء (بالكلمات) المتكيف مع السرعة المقاسة للمهمة func
+        
+        Args:
+            func: المهمة التي ستعالج الأجزاء
+            total_units: عدد الكلمات الإجمالي (تقديري)
+            initial: الحجم قبل أول قياس (الافتراضي: الإعداد chunk_size)
+        """
+        sizer = self.chunk_sizers.setdefault(_task_name(func), ChunkSizer())
+        if initial is None:
+            initial = _performance_setting('chunk_size', 500)
+        target_seconds = _performance_setting('chunk_target_ms', 50) / 1000
+        return sizer.size_for(total_units, self.max_workers, target_seconds, initial)
+    
+    def _map(self, func: Callable, items: list, mode: Any = None,
+             initializer: Optional[Callable] = None, initargs: tuple = (),
+             units: Optional[list] = None) -> list:
+        """
+        تطبيق func على العناصر بالترتيب في المجمع المختار حسب نمط المعالجة
+        
+        عند تحديد units (عدد كلمات كل عنصر، أو None لعنصر غير معروف الحجم) يقاس
+        زمن كل عنصر داخل العامل ويسجل في ChunkSizer الخاص بالمهمة.
+        """
+        executor = self.choose_executor(func, len(items), mode)
+        task = _TimedTask(func) if units is not None else func
+        self.memory.check(force=True)
+        
+        if executor == 'thread':
+            # الخيوط تشارك العملية الرئيسية حالتها، فلا حاجة لدالة التهيئة
+            results = list(self.thread_pool.map(task, items))
+        else:
+            # العمال يقرؤون ملف التخزين المشترك، فتكتب القيم المعلقة قبل إرسال المهام
+            main_cache.flush()
+            pool = self.get_process_pool(initializer, initargs)
+            # دفعات تقلل تكلفة التسلسل والإرسال لكل عنصر
+            chunksize = max(1, len(items) // (self.max_workers * 4))
+            try:
+                results = list(pool.map(task, items, chunksize=chunksize))
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                raise
+            self.stats['process_operations'] += 1
+        self.memory.tick(len(items))
+        
+        if units is None:
+            return results
+        
+        sizer = self.chunk_sizers.setdefault(_task_name(func), ChunkSizer())
+        for count, (_, seconds) in zip(units, results):
+            if count is not None:
+                sizer.record(count, seconds)
+        return [result for result, _ in results]
+    
+    def imap(self, func: Callable, items: Iterable, mode: Any = None,
+             initializer: Optional[Callable] = None, initargs: tuple = (),
+             ordered: bool = True, max_in_flight: Optional[int] = None,
+             capture_errors: bool = False, cancel: Any = None) -> Iterator[MapResult]:
+        """
+        تطبيق func على العناصر مع إرجاع النتائج تدريجياً
+        
+        لا يتجاوز عدد المهام المرسلة غير المكتملة max_in_flight (ومهمة واحدة عند
+        ضغط الذاكرة)، فتقرأ العناصر من items عند الحاجة ولا تتراكم النتائج في
+        الذاكرة. إيقاف التكرار (break أو close()) أو تفعيل cancel يلغي المهام التي
+        لم تبدأ.
+        
+        Args:
+            func: الدالة المطبقة على كل عنصر (WorkerTask للعمليات)
+            items: العناصر (أي كائن قابل للتكرار، ويقرأ تدريجياً)
+            mode: نمط المعالجة الذي يحدد نوع المجمع (الافتراضي: الإعداد processing_mode)
+            initializer: دالة تهيئة تنفذ مرة واحدة في كل عملية عاملة
+            initargs: معاملات دالة التهيئة
+            ordered: إرجاع النتائج بترتيب المدخلات (False: بترتيب الاكتمال)
+            max_in_flight: الحد الأقصى للمهام غير المكتملة (الافتراضي: ضعف عدد العمال)
+            capture_errors: إرجاع أخطاء العناصر في MapResult.error بدلاً من إثارتها
+            cancel: كائن له is_set() (مثل threading.Event) يوقف المعالجة عند تفعيله
+            
+        Yields:
+            MapResult لكل عنصر مكتمل
+        """
+        start_time = time.time()
+        size_hint = len(items) if hasattr(items, '__len__') else self.max_workers
+        max_in_flight = max(1, max_in_flight or self.max_workers * 2)
+        
+        if self.choose_executor(func, size_hint, mode) == 'thread':
+            pool = self.thread_pool
+        else:
+            main_cache.flush()
+            pool = self.get_process_pool(initializer, initargs)
+            self.stats['process_operations'] += 1
+        
+        source = enumerate(items)
+        in_flight: Dict[Any, int] = {}
+        order = deque()
+        completed = 0
+        
+        def submit_next() -> bool:
+            """إرسال العنصر التالي إن وجد"""
+            if cancel is not None and cancel.is_set():
+                return False
+            try:
+                index, item = next(source)
+            except StopIteration:
+                return False
+            future = pool.submit(func, item)
+            in_flight[future] = index
+            if ordered:
+                order.append(future)
+            return True
+        
+        def collect(future) -> MapResult:
+            """نتيجة مهمة مكتملة (مع إثارة خطأها إذا لم يطلب التقاطه)"""
+            index = in_flight.pop(future)
+            try:
+                return MapResult(index, future.result())
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                raise
+            except Exception as e:
+                if not capture_errors:
+                    raise
+                return MapResult(index, error=e)
+        
+        try:
+            self.memory.check(force=True)
+            while len(in_flight) < max_in_flight and submit_next():
+                if self.memory.under_pressure:
+                    break
+            
+            while in_flight:
+                if cancel is not None and cancel.is_set():
+                    break
+                
+                if ordered:
+                    future = order.popleft()
+                    # انتظار قصير متكرر حتى يلاحظ الإلغاء أثناء مهمة طويلة
+                    while cancel is not None and not cancel.is_set() and not future.done():
+                        wait([future], timeout=0.1)
+                    if cancel is not None and cancel.is_set():
+                        order.appendleft(future)
+                        break
+                    done = [future]
+                else:
+                    done, _ = wait(in_flight, timeout=None if cancel is None else 0.1,
+                                   return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    result = collect(future)
+                    completed += 1
+                    # تعويض المهام المكتملة، أو تأجيلها حتى تنخفض الذاكرة
+                    pressure = self.memory.tick()
+                    while len(in_flight) < max_in_flight:
+                        if pressure and in_flight and self.memory.throttle():
+                            break
+                        if not submit_next():
+                            break
+                    yield result
+        finally:
+            # إلغاء ما لم يبدأ عند الإيقاف المبكر أو الخطأ (المهام الجارية تكتمل في الخلفية)
+            for future in in_flight:
+                future.cancel()
+            self.stats['parallel_operations'] += 1
+            self.stats['texts_processed'] += completed
+            self.stats['total_time_saved'] += time.time() - start_time
+    
+    def resize(self, max_workers: Optional[int]):
+        """
+        تغيير عدد العمال أثناء التشغيل
+        
+        Args:
+            max_workers: العدد الجديد (None للعودة إلى الإعداد max_workers)
+        """
+        self._max_workers = max_workers
+        # المجمعات الحالية تستبدل عند استخدامها التالي إذا اختلف حجمها
+    
     def split_text_into_chunks(self, text: str, chunk_size: int = 1000) -> list:
         """تقسيم النص إلى أجزاء للمعالجة المتوازية"""
         words = text.split()
@@ -229,16 +1698,92 @@ class PerformanceOptimizer:
         
         return chunks
     
-    def process_text_parallel(self, text: str, processor_func: Callable, chunk_size: int = 1000) -> list:
-        """معالجة النص بشكل متوازي"""
+    def split_text_at_token_boundaries(self, text: str, chunk_size: int = 1000) -> list:
+        """
+        تقسيم النص إلى أجزاء عند حدود الكلمات دون تعديل محتواه
+        
+        Args:
+            text: النص المراد تقسيمه
+            chunk_size: عدد الكلمات التقريبي في كل جزء
+            
+        Returns:
+            قائمة بالأجزاء، ودمجها يعيد النص الأصلي حرفياً
+        """
+        chunks = []
+        start = 0
+        
+        for i, match in enumerate(WHITESPACE_RUN.finditer(text), 1):
+            if i % chunk_size == 0:
+                chunks.append(text[start:match.end()])
+                start = match.end()
+        
+        if start < len(text):
+            chunks.append(text[start:])
+        
+        return chunks
+    
+    def process_chunks_in_processes(self, chunks: list, worker_func: Callable,
+                                    initializer: Optional[Callable] = None, initargs: tuple = (),
+                                    chunk_units: Optional[list] = None, mode: Any = None) -> list:
+        """
+        معالجة الأجزاء بالتوازي مع الحفاظ على ترتيب النتائج
+        
+        تعمل في عمليات منفصلة أو في خيوط حسب نمط المعالجة كبقية الدوال.
+        
+        Args:
+            chunks: الأجزاء المراد معالجتها
+            worker_func: دالة على مستوى الوحدة (قابلة للتسلسل) تعالج جزءاً واحداً
+            initializer: دالة تهيئة تنفذ مرة واحدة في كل عملية (تبقى العمليات
+                لاستدعاءات لاحقة بالتهيئة نفسها)
+            initargs: معاملات دالة التهيئة
+            chunk_units: عدد كلمات كل جزء لقياس السرعة وضبط chunk_size_for()
+                (None لجزء غير معروف الحجم)
+            mode: نمط المعالجة الذي يحدد نوع المجمع (الافتراضي: الإعداد processing_mode)
+            
+        Returns:
+            قائمة النتائج بنفس ترتيب الأجزاء
+        """
+        start_time = time.time()
+        
+        results = self._map(worker_func, chunks, mode, initializer, initargs, chunk_units)
+        
+        # تحديث الإحصائيات
+        duration = time.time() - start_time
+        self.stats['parallel_operations'] += 1
+        self.stats['texts_processed'] += len(chunks)
+        self.stats['total_time_saved'] += duration
+        
+        return results
+    
+    def process_text_parallel(self, text: str, processor_func: Callable,
+                              chunk_size: Optional[int] = None, mode: Any = None,
+                              initializer: Optional[Callable] = None, initargs: tuple = ()) -> list:
+        """
+        معالجة النص بشكل متوازي
+        
+        Args:
+            text: النص المراد معالجته
+            processor_func: دالة تعالج جزءاً واحداً (WorkerTask أو دالة على مستوى
+                الوحدة لتنفيذها في عمليات منفصلة)
+            chunk_size: عدد الكلمات في كل جزء (الافتراضي: حجم متكيف مع السرعة المقاسة)
+            mode: نمط المعالجة الذي يحدد نوع المجمع (الافتراضي: الإعداد processing_mode)
+            initializer: دالة تهيئة تنفذ مرة واحدة في كل عملية عاملة
+            initargs: معاملات دالة التهيئة
+        """
         start_time = time.time()
         
-        # تقسيم النص
+        # تقسيم النص (الحجم المتكيف يقاس زمن أجزائه لضبط الاستدعاءات اللاحقة)
+        units = None
+        if chunk_size is None:
+            chunk_size = self.chunk_size_for(processor_func, estimate_words(text))
+            units = []
         chunks = self.split_text_into_chunks(text, chunk_size)
+        if units is not None:
+            # الجزء الأخير أقصر عادة، فلا يحسب في القياس
+            units = [chunk_size] * (len(chunks) - 1) + [None]
         
         # معالجة متوازية
-        futures = [self.thread_pool.submit(processor_func, chunk) for chunk in chunks]
-        results = [future.result() for future in futures]
+        results = self._map(processor_func, chunks, mode, initializer, initargs, units)
         
         # دمج النتائج
         final_result = []
@@ -256,12 +1801,12 @@ class PerformanceOptimizer:
         
         return final_result
     
-    def batch_process(self, texts: list, processor_func: Callable) -> list:
-        """معالجة مجموعة من النصوص بشكل متوازي"""
+    def batch_process(self, texts: list, processor_func: Callable, mode: Any = None,
+                      initializer: Optional[Callable] = None, initargs: tuple = ()) -> list:
+        """معالجة مجموعة من النصوص بشكل متوازي (المعاملات كما في process_text_parallel)"""
         start_time = time.time()
         
-        futures = [self.thread_pool.submit(processor_func, text) for text in texts]
-        results = [future.result() for future in futures]
+        results = self._map(processor_func, list(texts), mode, initializer, initargs)
         
         duration = time.time() - start_time
         self.stats['parallel_operations'] += 1
@@ -277,6 +1822,13 @@ class PerformanceOptimizer:
             'texts_processed': self.stats['texts_processed'],
             'total_time_saved': self.stats['total_time_saved'],
             'max_workers': self.max_workers,
+            'thread_pool_active': self._thread_pool is not None,
+            'process_pool_active': bool(self._process_pools),
+            'process_pools': len(self._process_pools),
+            'pools_created': self.stats['pools_created'],
+            'process_operations': self.stats['process_operations'],
+            'chunk_sizes': {name: sizer.get_stats() for name, sizer in self.chunk_sizers.items()},
+            'memory': self.memory.get_stats(),
             'average_time_per_text': (
                 self.stats['total_time_saved'] / self.stats['texts_processed']
                 if self.stats['texts_processed'] > 0 else 0
@@ -284,32 +1836,55 @@ class PerformanceOptimizer:
         }
     
     def cleanup(self):
-        """تنظيف الموارد"""
-        self.thread_pool.shutdown(wait=True)
-        self.process_pool.shutdown(wait=True)
+        """تنظيف الموارد (الاستخدام التالي ينشئ مجمعات جديدة)"""
+        with self._pool_lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=True)
+            for _, pool in self._process_pools:
+                pool.shutdown(wait=True)
+            self._thread_pool = None
+            self._process_pools = []
 
 
 # إنشاء مثيلات عامة
-main_cache = AdvancedCache("cache", max_size=2000, ttl=7200)  # ساعتان
-performance_optimizer = PerformanceOptimizer()
+def _performance_setting(key: str, default: Any) -> Any:
+    """قراءة إعداد أداء مع قيمة افتراضية عند غياب مدير الإعدادات"""
+    if settings_manager is None:
+        return default
+    return settings_manager.get_setting('performance', key, default)
 
 
-# ديكوراتورات مساعدة
-def cached_arabic_processing(func):
-    """ديكوراتور للتخزين المؤقت لمعالجة النصوص العربية"""
-    return cached(main_cache)(func)
+main_cache = AdvancedCache(
+    "cache",
+    max_size=_performance_setting('cache_size', 2000),
+    ttl=_performance_setting('cache_ttl', 7200),  # ساعتان
+    # جزء من حد الذاكرة فقط، فلو امتلأ التخزين حتى الحد كله لبقيت العملية
+    # فوق عتبة الضغط في MemoryMonitor دائماً
+    max_bytes=int(_performance_setting('memory_limit_mb', 512) * 1024 * 1024
+                  * _performance_setting('cache_memory_fraction', 0.25)),
+    shards=_performance_setting('cache_shards', 16),
+    disk_quota_bytes=_performance_setting('cache_disk_quota_mb', 1024) * 1024 * 1024,
+    sweep_interval=_performance_setting('cache_sweep_interval', 300)  # خمس دقائق
+)
+main_cache.set_strategy(_performance_setting('cache_strategy', 'hybrid'))
+atexit.register(main_cache.close)
+performance_optimizer = PerformanceOptimizer()
+performance_optimizer.memory.on_pressure(main_cache.shrink)
 
 
-def parallel_processing(chunk_size: int = 1000):
-    """ديكوراتور للمعالجة المتوازية"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(self, text: str, *args, **kwargs):
-            if isinstance(text, str) and len(text.split()) > chunk_size:
-                return performance_optimizer.process_text_parallel(
-                    text, lambda t: func(self, t, *args, **kwargs), chunk_size
-                )
-            else:
-                return func(self, text, *args, **kwargs)
-        return wrapper
-    return decorator
+# ديكوراتورات مساعدة
+def cached_arabic_processing(func: Optional[Callable] = None, *, budget: Optional[float] = None,
+                             negative: bool = False,
+                             key_args: Optional[Callable[..., Tuple[tuple, dict]]] = None):
+    """
+    ديكوراتور للتخزين المؤقت لمعالجة النصوص العربية
+    
+    يستخدم مباشرة (@cached_arabic_processing) أو مع خيارات
+    (@cached_arabic_processing(budget=0.5) لحصة من ميزانية الذاكرة،
+    و@cached_arabic_processing(negative=True) لتخزين النتائج None لمدة cache_negative_ttl،
+    وkey_args لتوحيد معاملات المفتاح كما في cached).
+    """
+    negative_ttl = _performance_setting('cache_negative_ttl', 600) if negative else None
+    decorator = cached(main_cache, fingerprint=arabic_settings_fingerprint, budget=budget,
+                       negative_ttl=negative_ttl, key_args=key_args)
+    return decorator(func) if func is not None else decorator
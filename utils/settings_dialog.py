@@ -27,11 +27,20 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 try:
-    from utils.settings_manager import settings_manager, SettingsManager
+    from utils.settings_manager import (
+        settings_manager, SettingsManager, ProcessingMode, PROCESSING_PROFILES
+    )
     from utils.advanced_logger import AdvancedLogger
 except ImportError:
     settings_manager = None
     AdvancedLogger = None
+    ProcessingMode = None
+    PROCESSING_PROFILES = {}
+
+try:
+    from arabic_processor import apply_processing_mode
+except ImportError:
+    apply_processing_mode = None
 
 
 # @unittest.skipIf(not PYQT_AVAILABLE, "PyQt6 غير متاح")
@@ -226,6 +235,7 @@ class SettingsDialog(QDialog):
         
         self.processing_mode_combo = QComboBox()
         self.processing_mode_combo.addItems(["fast", "balanced", "accurate"])
+        self.processing_mode_combo.textActivated.connect(self.on_processing_mode_selected)
         
         processing_layout.addRow("نمط المعالجة:", self.processing_mode_combo)
         
@@ -700,6 +710,24 @@ class SettingsDialog(QDialog):
         # تحميل باقي الإعدادات...
         # (يمكن إضافة المزيد حسب الحاجة)
     
+    def mode_profile(self, mode: str) -> Dict[str, Dict[str, Any]]:
+        """إعدادات ملف نمط المعالجة (فارغة إذا كان النمط غير معروف)"""
+        try:
+            return PROCESSING_PROFILES.get(ProcessingMode(mode), {})
+        except (TypeError, ValueError):
+            return {}
+    
+    def on_processing_mode_selected(self, mode: str):
+        """عرض إعدادات النمط المختار في حقولها (يمكن تعديلها قبل الحفظ)"""
+        profile = self.mode_profile(mode)
+        if not profile:
+            return
+        value = lambda v: getattr(v, 'value', v)
+        self.stemming_algorithm_combo.setCurrentText(profile['arabic_processing']['stemming_algorithm'])
+        self.cache_strategy_combo.setCurrentText(value(profile['performance']['cache_strategy']))
+        self.parallel_processing_cb.setChecked(profile['performance']['parallel_processing'])
+        self.log_level_combo.setCurrentText(value(profile['logging']['log_level']))
+    
     def apply_settings(self):
         """تطبيق الإعدادات"""
         try:
@@ -713,8 +741,7 @@ class SettingsDialog(QDialog):
                 return
             
             # تطبيق الإعدادات
-            for category, category_settings in settings.items():
-                self.settings_manager.set_category(category, category_settings)
+            self.store_settings(settings)
             
             # إرسال إشارة التغيير
             self.settings_changed.emit(settings)
@@ -731,8 +758,7 @@ class SettingsDialog(QDialog):
             settings = self.collect_settings()
             
             # تطبيق الإعدادات
-            for category, category_settings in settings.items():
-                self.settings_manager.set_category(category, category_settings)
+            self.store_settings(settings)
             
             # حفظ الإعدادات
             self.settings_manager.save_settings()
@@ -742,6 +768,19 @@ class SettingsDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "خطأ", f"فشل في حفظ الإعدادات: {e}")
     
+    def store_settings(self, settings: Dict[str, Dict[str, Any]]):
+        """
+        دمج الإعدادات المجمعة في فئاتها وتطبيقها على المحرك
+        
+        تدمج القيم بدلاً من استبدال الفئات، فتبقى الإعدادات التي لا تعرض في
+        النافذة (مثل cache_shards وchunk_target_ms).
+        """
+        for category, category_settings in settings.items():
+            self.settings_manager.update_category(category, category_settings)
+        if apply_processing_mode is not None:
+            # المحرك يقرأ مدير إعدادات مستقلاً (من مسار utils)، فتمرر إليه القيم
+            apply_processing_mode(settings=settings)
+    
     def accept_and_save(self):
         """قبول الإعدادات وحفظها"""
         self.save_settings()
@@ -815,6 +854,12 @@ class SettingsDialog(QDialog):
             'stemming_algorithm': self.stemming_algorithm_combo.currentText()
         }
         
+        # الإعدادات التي لا تعرض في النافذة تتبع ملف نمط المعالجة المختار
+        profile = self.mode_profile(self.processing_mode_combo.currentText())
+        if profile:
+            settings['arabic_processing']['khalil_max_candidates'] = \
+                profile['arabic_processing']['khalil_max_candidates']
+        
         # إعدادات الأداء
         settings['performance'] = {
             'cache_enabled': self.cache_enabled_cb.isChecked(),
@@ -828,6 +873,8 @@ class SettingsDialog(QDialog):
             'gc_threshold': self.gc_threshold_spin.value(),
             'processing_mode': self.processing_mode_combo.currentText()
         }
+        if profile:
+            settings['performance']['parallel_threshold'] = profile['performance']['parallel_threshold']
         
         # إعدادات التسجيل
         settings['logging'] = {
@@ -908,8 +955,7 @@ class SettingsDialog(QDialog):
         """حفظ تلقائي للإعدادات"""
         try:
             settings = self.collect_settings()
-            for category, category_settings in settings.items():
-                self.settings_manager.set_category(category, category_settings)
+            self.store_settings(settings)
             self.settings_manager.save_settings()
         except Exception as e:
             if self.logger:
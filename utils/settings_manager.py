@@ -59,6 +59,7 @@ class ArabicProcessingSettings:
     # إعدادات استخراج الجذور
     enable_stemming: bool = True
     stemming_algorithm: str = "light"  # light, advanced, khalil
+    khalil_max_candidates: int = 3  # تقسيمات الكلمة التي تطابق مع أنماط الخليل (0: الكل دون تقليم)
     
     def __post_init__(self):
         if self.custom_stop_words is None:
@@ -73,14 +74,21 @@ class PerformanceSettings:
     cache_strategy: CacheStrategy = CacheStrategy.HYBRID
     cache_size: int = 2000
     cache_ttl: int = 7200  # ساعتان
+    cache_negative_ttl: int = 600  # مدة تخزين النتائج السلبية (مثل الكلمات التي لا جذر لها)
+    cache_shards: int = 16  # أجزاء الذاكرة المستقلة الأقفال للوصول من عدة خيوط
+    cache_memory_fraction: float = 0.25  # نسبة memory_limit_mb المتاحة للتخزين المؤقت في الذاكرة
+    cache_disk_quota_mb: int = 1024  # الحجم الأقصى للتخزين المؤقت على القرص
+    cache_sweep_interval: int = 300  # ثوانٍ بين دورات صيانة التخزين على القرص
     
     # إعدادات المعالجة المتوازية
     parallel_processing: bool = True
     max_workers: int = 4
-    chunk_size: int = 500
+    chunk_size: int = 500  # حجم الأجزاء الأولي بالكلمات قبل قياس سرعة المعالجة
+    chunk_target_ms: int = 50  # الزمن المستهدف لمعالجة جزء واحد عند ضبط الحجم تلقائياً
+    parallel_threshold: int = 200000  # الحد الأدنى لطول النص (بالأحرف) للمعالجة المتوازية
     
     # إعدادات الذاكرة
-    memory_limit_mb: int = 512
+    memory_limit_mb: int = 512  # حد ذاكرة العملية: يقلص التخزين المؤقت ويبطئ الإرسال عند الاقتراب منه
     gc_threshold: int = 1000  # عدد العمليات قبل تنظيف الذاكرة
     
     # إعدادات الأداء
@@ -210,6 +218,50 @@ class ApplicationSettings:
     send_crash_reports: bool = True
 
 
+# إعدادات كل نمط معالجة، تكتب فوق الإعدادات الحالية عند اختياره (apply_processing_mode).
+# الأنماط: المعالجة المتوازية في العمليات أو الخيوط أو التسلسلية، وطبقات التخزين
+# المؤقت، وخوارزمية الجذور، ودرجة تقليم محلل الخليل، ومستوى التسجيل. نمط balanced
+# يطابق الإعدادات الافتراضية.
+PROCESSING_PROFILES: Dict[ProcessingMode, Dict[str, Dict[str, Any]]] = {
+    ProcessingMode.FAST: {
+        'performance': {
+            'parallel_processing': True,
+            'parallel_threshold': 50000,
+            'cache_strategy': CacheStrategy.MEMORY_ONLY,
+        },
+        'arabic_processing': {
+            'stemming_algorithm': 'light',
+            'khalil_max_candidates': 1,
+        },
+        'logging': {'log_level': LogLevel.WARNING},
+    },
+    ProcessingMode.BALANCED: {
+        'performance': {
+            'parallel_processing': True,
+            'parallel_threshold': 200000,
+            'cache_strategy': CacheStrategy.HYBRID,
+        },
+        'arabic_processing': {
+            'stemming_algorithm': 'light',
+            'khalil_max_candidates': 3,
+        },
+        'logging': {'log_level': LogLevel.INFO},
+    },
+    ProcessingMode.ACCURATE: {
+        'performance': {
+            'parallel_processing': False,
+            'parallel_threshold': 200000,
+            'cache_strategy': CacheStrategy.HYBRID,
+        },
+        'arabic_processing': {
+            'stemming_algorithm': 'khalil',
+            'khalil_max_candidates': 0,
+        },
+        'logging': {'log_level': LogLevel.INFO},
+    },
+}
+
+
 class SettingsManager:
     """مدير الإعدادات المتقدم"""
     
@@ -221,6 +273,8 @@ class SettingsManager:
             config_file: مسار ملف الإعدادات
         """
         self.config_file = Path(config_file)
+        # رقم يزداد مع كل تعديل، لتعرف البصمات المحفوظة أن الإعدادات تغيرت
+        self.version = 0
         self.settings = self._create_default_settings()
         self._load_settings()
     
@@ -255,6 +309,7 @@ class SettingsManager:
     
     def _merge_settings(self, loaded_settings: Dict[str, Any]):
         """دمج الإعدادات المحملة مع الافتراضية"""
+        self.version += 1
         for category, settings in loaded_settings.items():
             if category in self.settings:
                 if isinstance(settings, dict):
@@ -318,6 +373,28 @@ class SettingsManager:
             self.settings[category] = {}
         
         self.settings[category][key] = value
+        self.version += 1
+    
+    def apply_processing_mode(self, mode: Any) -> Dict[str, Dict[str, Any]]:
+        """
+        اختيار نمط معالجة وكتابة إعدادات ملفه (PROCESSING_PROFILES)
+        
+        Args:
+            mode: نمط المعالجة (ProcessingMode أو قيمته النصية)
+            
+        Returns:
+            إعدادات الملف المطبقة لكل فئة
+            
+        Raises:
+            ValueError: إذا كان النمط غير معروف
+        """
+        mode = ProcessingMode(getattr(mode, 'value', mode))
+        profile = PROCESSING_PROFILES[mode]
+        self.set_setting('performance', 'processing_mode', mode)
+        for category, values in profile.items():
+            for key, value in values.items():
+                self.set_setting(category, key, value)
+        return profile
     
     def get_category(self, category: str) -> Dict[str, Any]:
         """
@@ -340,10 +417,23 @@ class SettingsManager:
             settings: الإعدادات الجديدة
         """
         self.settings[category] = settings
+        self.version += 1
+    
+    def update_category(self, category: str, settings: Dict[str, Any]):
+        """
+        دمج إعدادات في فئة مع إبقاء مفاتيحها الأخرى
+        
+        Args:
+            category: فئة الإعدادات
+            settings: الإعدادات المعدلة
+        """
+        self.settings.setdefault(category, {}).update(settings)
+        self.version += 1
     
     def reset_to_defaults(self):
         """إعادة تعيين جميع الإعدادات للقيم الافتراضية"""
         self.settings = self._create_default_settings()
+        self.version += 1
         self.save_settings()
     
     def export_settings(self, file_path: str):
@@ -450,6 +540,11 @@ def set_setting(category: str, key: str, value: Any):
     settings_manager.set_setting(category, key, value)
 
 
+def apply_processing_mode(mode: Any) -> Dict[str, Dict[str, Any]]:
+    """دالة مساعدة لتطبيق إعدادات نمط معالجة"""
+    return settings_manager.apply_processing_mode(mode)
+
+
 def save_settings():
     """دالة مساعدة لحفظ الإعدادات"""
     settings_manager.save_settings()